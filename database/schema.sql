@@ -93,16 +93,21 @@ CREATE TABLE aula (
     tiene_proyector BOOLEAN DEFAULT FALSE
 );
 
--- Matrículas (Enrollments)
+-- Matrículas (Enrollments), particionadas por periodo académico:
+-- una partición por año, subparticionada por semestre (ver crear_particion_matricula)
 CREATE TABLE matricula (
     estudiante_id INTEGER NOT NULL REFERENCES estudiante(id),
     curso_id INTEGER NOT NULL REFERENCES curso(id),
+    anio_academico SMALLINT NOT NULL CHECK (anio_academico BETWEEN 1900 AND 2200),
     semestre tipo_semestre NOT NULL,
     calificacion tipo_calificacion,
     estado estado_matricula NOT NULL DEFAULT 'Activa',
     fecha_matricula TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    PRIMARY KEY (estudiante_id, curso_id, semestre)
-);
+    PRIMARY KEY (estudiante_id, curso_id, anio_academico, semestre)
+) PARTITION BY LIST (anio_academico);
+
+-- Partición por defecto: solo recibe filas de años sin partición creada
+CREATE TABLE matricula_default PARTITION OF matricula DEFAULT;
 
 -- Horarios (Schedules)
 CREATE TABLE horario (
@@ -229,16 +234,169 @@ CREATE TABLE tesis (
     archivo_url TEXT
 );
 
--- Auditoría de cambios
+-- Auditoría de cambios (particionada por mes sobre fecha)
+-- La PK debe incluir la llave de partición; id sigue siendo único por la secuencia
 CREATE TABLE auditoria_cambios (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     tabla_afectada VARCHAR(50) NOT NULL,
     id_registro INTEGER NOT NULL,
     tipo_operacion VARCHAR(10) NOT NULL CHECK (tipo_operacion IN ('INSERT', 'UPDATE', 'DELETE')),
     fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     usuario VARCHAR(50) NOT NULL,
     valores_anteriores JSONB,
-    valores_nuevos JSONB
+    valores_nuevos JSONB,
+    -- Transacción que escribió la fila: CDC solo entrega filas de
+    -- transacciones ya terminadas (ver src/cdc.py)
+    transaccion BIGINT NOT NULL DEFAULT txid_current(),
+    PRIMARY KEY (id, fecha)
+) PARTITION BY RANGE (fecha);
+
+-- Partición por defecto: solo recibe filas si falta la partición del mes
+CREATE TABLE auditoria_cambios_default PARTITION OF auditoria_cambios DEFAULT;
+
+-- Offsets de los consumidores CDC que leen auditoria_cambios (src/cdc.py)
+CREATE TABLE cdc_offset (
+    consumidor VARCHAR(50) PRIMARY KEY,
+    ultimo_id BIGINT NOT NULL DEFAULT 0 CHECK (ultimo_id >= 0),
+    ultima_transaccion BIGINT NOT NULL DEFAULT 0 CHECK (ultima_transaccion >= 0),
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Cupos por curso y periodo (src/cruds.py SeatCRUD). Cada curso puede tener
+-- varias franjas que se reparten la capacidad: las reservas concurrentes del
+-- mismo curso toman franjas distintas con FOR UPDATE SKIP LOCKED
+CREATE TABLE cupo_curso (
+    curso_id INTEGER REFERENCES curso(id),
+    anio_academico SMALLINT NOT NULL,
+    semestre tipo_semestre NOT NULL,
+    franja SMALLINT NOT NULL DEFAULT 0,
+    capacidad INTEGER NOT NULL CHECK (capacidad >= 0),
+    ocupados INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (curso_id, anio_academico, semestre, franja),
+    CONSTRAINT ck_cupo_curso_ocupados CHECK (ocupados >= 0 AND ocupados <= capacidad)
+);
+
+-- Resumen de asistencia: una fila por matrícula, actualizada con cada
+-- sesión marcada; las tasas y alertas no recorren asistencia
+CREATE TABLE resumen_asistencia (
+    anio_academico SMALLINT NOT NULL,
+    semestre tipo_semestre NOT NULL,
+    curso_id INTEGER NOT NULL REFERENCES curso(id),
+    estudiante_id INTEGER NOT NULL REFERENCES estudiante(id),
+    sesiones INTEGER NOT NULL DEFAULT 0,
+    presentes INTEGER NOT NULL DEFAULT 0,
+    justificadas INTEGER NOT NULL DEFAULT 0,
+    racha_ausencias INTEGER NOT NULL DEFAULT 0,
+    ultima_fecha DATE,
+    PRIMARY KEY (anio_academico, semestre, curso_id, estudiante_id)
+);
+
+CREATE INDEX idx_resumen_asistencia_estudiante ON resumen_asistencia(estudiante_id);
+
+CREATE TYPE estado_espera AS ENUM ('Esperando', 'Promovido', 'Cancelado');
+
+-- Lista de espera: la cabeza de la cola sale del índice parcial, sin
+-- recorrer las solicitudes ya atendidas
+CREATE TABLE lista_espera (
+    id SERIAL PRIMARY KEY,
+    estudiante_id INTEGER NOT NULL REFERENCES estudiante(id),
+    curso_id INTEGER NOT NULL REFERENCES curso(id),
+    anio_academico SMALLINT NOT NULL,
+    semestre tipo_semestre NOT NULL,
+    prioridad INTEGER NOT NULL DEFAULT 0,
+    regla VARCHAR(20) NOT NULL,
+    estado estado_espera NOT NULL DEFAULT 'Esperando',
+    fecha_solicitud TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    fecha_promocion TIMESTAMP
+);
+
+CREATE INDEX idx_lista_espera_cola ON lista_espera (curso_id, anio_academico, semestre, prioridad DESC, id)
+    WHERE estado = 'Esperando';
+CREATE UNIQUE INDEX uq_lista_espera_estudiante ON lista_espera (estudiante_id, curso_id, anio_academico, semestre)
+    WHERE estado = 'Esperando';
+
+-- Notas por evaluación: la nota final de cada matrícula es el promedio
+-- ponderado por evaluacion.porcentaje (ver GradeCRUD)
+CREATE TABLE nota_evaluacion (
+    evaluacion_id INTEGER NOT NULL REFERENCES evaluacion(id),
+    estudiante_id INTEGER NOT NULL REFERENCES estudiante(id),
+    nota DECIMAL(5,2) NOT NULL CONSTRAINT ck_nota_evaluacion_nota CHECK (nota >= 0 AND nota <= 100),
+    fecha_registro TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (evaluacion_id, estudiante_id)
+);
+
+-- Créditos y promedio por estudiante, recalculados al cerrar cada periodo
+CREATE TABLE resumen_academico (
+    estudiante_id INTEGER PRIMARY KEY REFERENCES estudiante(id),
+    cursos_finalizados INTEGER NOT NULL DEFAULT 0,
+    creditos_cursados INTEGER NOT NULL DEFAULT 0,
+    creditos_aprobados INTEGER NOT NULL DEFAULT 0,
+    promedio DECIMAL(3,2),
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Avance del cierre de cada periodo: cada paso confirma su avance en la
+-- misma transacción que su trabajo, así que un cierre interrumpido se reanuda
+CREATE TABLE cierre_periodo (
+    anio_academico SMALLINT NOT NULL,
+    semestre tipo_semestre NOT NULL,
+    paso VARCHAR(20) NOT NULL DEFAULT 'calificaciones',
+    ultimo_curso_id INTEGER NOT NULL DEFAULT 0,
+    cursos_cerrados INTEGER NOT NULL DEFAULT 0,
+    iniciado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    terminado TIMESTAMP,
+    PRIMARY KEY (anio_academico, semestre)
+);
+
+CREATE TYPE tipo_movimiento AS ENUM ('Cargo', 'Pago', 'Beca');
+
+-- Cuenta corriente de cada estudiante: los cargos (pago), pagos recibidos y
+-- descuentos de beca quedan como movimientos con el saldo resultante.
+-- cargos_acumulados permite saber qué cargos siguen impagos (los abonos
+-- cubren primero los más antiguos)
+CREATE TABLE movimiento_cuenta (
+    id SERIAL PRIMARY KEY,
+    estudiante_id INTEGER NOT NULL REFERENCES estudiante(id),
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    tipo tipo_movimiento NOT NULL,
+    monto DECIMAL(12,2) NOT NULL,
+    saldo DECIMAL(12,2) NOT NULL,
+    cargos_acumulados DECIMAL(14,2),
+    vencimiento DATE,
+    pago_id INTEGER UNIQUE REFERENCES pago(id),
+    beca_id INTEGER REFERENCES beca(id),
+    referencia VARCHAR(50) UNIQUE,
+    descripcion TEXT,
+    CONSTRAINT ck_movimiento_cuenta_signo CHECK ((tipo = 'Cargo') = (monto > 0))
+);
+
+CREATE INDEX idx_movimiento_cuenta_estudiante ON movimiento_cuenta(estudiante_id, id);
+CREATE INDEX idx_movimiento_cuenta_cargos ON movimiento_cuenta(estudiante_id, cargos_acumulados)
+    WHERE tipo = 'Cargo';
+
+-- Saldo por estudiante, actualizado con cada movimiento. pendiente_desde es
+-- el vencimiento del cargo impago más antiguo
+CREATE TABLE saldo_estudiante (
+    estudiante_id INTEGER PRIMARY KEY REFERENCES estudiante(id),
+    saldo DECIMAL(12,2) NOT NULL DEFAULT 0,
+    total_cargos DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total_abonos DECIMAL(14,2) NOT NULL DEFAULT 0,
+    pendiente_desde DATE,
+    actualizado TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_saldo_estudiante_saldo ON saldo_estudiante(saldo) WHERE saldo > 0;
+CREATE INDEX idx_saldo_estudiante_pendiente ON saldo_estudiante(pendiente_desde) WHERE saldo > 0;
+
+-- Corridas de facturación: sus cargos en pago llevan referencia
+-- '<id>:<estudiante_id>', así que repetir una corrida no duplica cargos
+CREATE TABLE corrida_facturacion (
+    id VARCHAR(30) PRIMARY KEY CHECK (id NOT LIKE '%:%'),
+    anio_academico SMALLINT NOT NULL,
+    semestre tipo_semestre NOT NULL,
+    tarifa_credito DECIMAL(10,2) NOT NULL CHECK (tarifa_credito > 0),
+    fecha TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 -- VISTAS
@@ -360,6 +518,9 @@ END;
 $$ LANGUAGE plpgsql;
 
 -- Función 3: Generar reporte de pagos pendientes
+-- Lee saldo_estudiante (índice parcial sobre saldo > 0) en lugar de agrupar
+-- todos los pagos; pagos_atrasados cuenta los cargos impagos vencidos hace
+-- más de 30 días
 CREATE OR REPLACE FUNCTION reporte_pagos_pendientes()
 RETURNS TABLE (
     estudiante_id INTEGER,
@@ -370,26 +531,114 @@ RETURNS TABLE (
 ) AS $$
 BEGIN
     RETURN QUERY
-    SELECT 
+    SELECT
         e.id,
         e.nombre || ' ' || e.apellido,
         e.email,
-        COALESCE(SUM(p.monto), 0) AS total_pendiente,
-        COUNT(p.id) AS pagos_atrasados
-    FROM 
-        estudiante e
-    LEFT JOIN 
-        pago p ON e.id = p.estudiante_id AND p.fecha < CURRENT_DATE - INTERVAL '30 days'
-    GROUP BY 
-        e.id, e.nombre, e.apellido, e.email
-    HAVING 
-        COALESCE(SUM(p.monto), 0) > 0
-    ORDER BY 
+        s.saldo::DECIMAL(10,2) AS total_pendiente,
+        (SELECT COUNT(*)::INTEGER
+         FROM movimiento_cuenta m
+         WHERE m.estudiante_id = s.estudiante_id
+           AND m.tipo = 'Cargo'
+           AND m.cargos_acumulados > s.total_abonos
+           AND m.vencimiento < CURRENT_DATE - 30) AS pagos_atrasados
+    FROM
+        saldo_estudiante s
+    JOIN
+        estudiante e ON e.id = s.estudiante_id
+    WHERE
+        s.saldo > 0
+    ORDER BY
         total_pendiente DESC;
 END;
 $$ LANGUAGE plpgsql;
 
 
+-- Función 4: Crear la partición mensual de auditoría que contiene una fecha.
+-- Si la partición DEFAULT ya tiene filas de ese mes (el job de retención no
+-- corrió a tiempo), PostgreSQL no deja crear la partición: se crea como tabla
+-- aparte, se mueven las filas y se adjunta, todo en la misma transacción
+CREATE OR REPLACE FUNCTION crear_particion_auditoria(mes DATE)
+RETURNS TEXT AS $$
+DECLARE
+    inicio DATE := date_trunc('month', mes)::DATE;
+    fin DATE := (date_trunc('month', mes) + INTERVAL '1 month')::DATE;
+    nombre TEXT := 'auditoria_cambios_' || to_char(mes, 'YYYYMM');
+BEGIN
+    IF to_regclass(quote_ident(nombre)) IS NOT NULL THEN
+        RETURN nombre;
+    END IF;
+    LOCK TABLE auditoria_cambios_default IN EXCLUSIVE MODE;
+    IF NOT EXISTS (SELECT 1 FROM auditoria_cambios_default WHERE fecha >= inicio AND fecha < fin) THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF auditoria_cambios FOR VALUES FROM (%L) TO (%L)',
+            nombre, inicio, fin
+        );
+        RETURN nombre;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE auditoria_cambios INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', nombre);
+    EXECUTE format(
+        'INSERT INTO %I SELECT * FROM auditoria_cambios_default WHERE fecha >= %L AND fecha < %L',
+        nombre, inicio, fin
+    );
+    DELETE FROM auditoria_cambios_default WHERE fecha >= inicio AND fecha < fin;
+    EXECUTE format(
+        'ALTER TABLE auditoria_cambios ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        nombre, inicio, fin
+    );
+    RETURN nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Particiones del mes actual y los dos siguientes (el job de retención crea las demás)
+SELECT crear_particion_auditoria((CURRENT_DATE + make_interval(months => n))::DATE)
+FROM generate_series(0, 2) AS n;
+
+-- Función 5: Crear la partición de matrículas de un año académico,
+-- con una subpartición por semestre. Las filas del año que ya estén en
+-- matricula_default se mueven a la nueva partición (ver Función 4)
+CREATE OR REPLACE FUNCTION crear_particion_matricula(anio INTEGER)
+RETURNS TEXT AS $$
+DECLARE
+    nombre TEXT := 'matricula_' || anio;
+    pendientes BOOLEAN;
+BEGIN
+    IF to_regclass(quote_ident(nombre)) IS NOT NULL THEN
+        RETURN nombre;
+    END IF;
+    LOCK TABLE matricula_default IN EXCLUSIVE MODE;
+    pendientes := EXISTS (SELECT 1 FROM matricula_default WHERE anio_academico = anio);
+    IF pendientes THEN
+        EXECUTE format(
+            'CREATE TABLE %I (LIKE matricula INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY LIST (semestre)',
+            nombre
+        );
+    ELSE
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF matricula FOR VALUES IN (%s) PARTITION BY LIST (semestre)',
+            nombre, anio
+        );
+    END IF;
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+        nombre || '_primer', nombre, 'Primer Semestre');
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+        nombre || '_verano', nombre, 'Verano');
+    EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%L)',
+        nombre || '_segundo', nombre, 'Segundo Semestre');
+    IF pendientes THEN
+        EXECUTE format('INSERT INTO %I SELECT * FROM matricula_default WHERE anio_academico = %s', nombre, anio);
+        DELETE FROM matricula_default WHERE anio_academico = anio;
+        EXECUTE format('ALTER TABLE matricula ATTACH PARTITION %I FOR VALUES IN (%s)', nombre, anio);
+    END IF;
+    RETURN nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Años académicos de los datos de prueba y el siguiente
+SELECT crear_particion_matricula(EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + n)
+FROM generate_series(-5, 1) AS n;
+
+
 -- TRIGGERS (3+ REQUERIDAS)
 -- Trigger 1: Auditoría de cambios en estudiantes
 CREATE OR REPLACE FUNCTION auditoria_estudiantes()
@@ -478,27 +727,93 @@ BEFORE INSERT OR UPDATE ON horario
 FOR EACH ROW EXECUTE FUNCTION validar_cupo_aula();
 
 -- Trigger 3: Actualizar estado de libro al prestar/devolver
+-- A nivel de sentencia con tablas de transición: un UPDATE libro por
+-- sentencia, no uno por préstamo. La multa de la devolución se calcula en un
+-- trigger BEFORE (en uno AFTER, asignar NEW.multa no tiene efecto); la de los
+-- préstamos abiertos la acumula el proceso nocturno (library.py)
+CREATE OR REPLACE FUNCTION calcular_multa_devolucion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.fecha_devolucion_real IS NOT NULL AND OLD.fecha_devolucion_real IS NULL THEN
+        NEW.multa = GREATEST(NEW.fecha_devolucion_real - NEW.fecha_devolucion, 0) * 5.00; -- $5 por día de retraso
+    END IF;
+    
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_calcular_multa_devolucion
+BEFORE UPDATE OF fecha_devolucion_real ON prestamo_libro
+FOR EACH ROW EXECUTE FUNCTION calcular_multa_devolucion();
+
 CREATE OR REPLACE FUNCTION actualizar_estado_libro()
 RETURNS TRIGGER AS $$
 BEGIN
     IF TG_OP = 'INSERT' THEN
-        UPDATE libro SET estado = 'Prestado' WHERE id = NEW.libro_id;
-    ELSIF TG_OP = 'UPDATE' AND NEW.fecha_devolucion_real IS NOT NULL THEN
-        UPDATE libro SET estado = 'Disponible' WHERE id = NEW.libro_id;
-        
-        -- Calcular multa si hay retraso
-        IF NEW.fecha_devolucion_real > NEW.fecha_devolucion THEN
-            NEW.multa = (NEW.fecha_devolucion_real - NEW.fecha_devolucion) * 5.00; -- $5 por día de retraso
-        END IF;
+        UPDATE libro SET estado = 'Prestado'
+        WHERE id IN (SELECT libro_id FROM prestamos_nuevos WHERE fecha_devolucion_real IS NULL)
+          AND estado <> 'Prestado';
+    ELSE
+        UPDATE libro SET estado = 'Disponible'
+        WHERE id IN (SELECT libro_id FROM prestamos_nuevos WHERE fecha_devolucion_real IS NOT NULL)
+          AND estado = 'Prestado'
+          AND NOT EXISTS (SELECT 1 FROM prestamo_libro p
+                          WHERE p.libro_id = libro.id AND p.fecha_devolucion_real IS NULL);
     END IF;
     
-    RETURN NEW;
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
 CREATE TRIGGER trigger_actualizar_estado_libro
-AFTER INSERT OR UPDATE ON prestamo_libro
-FOR EACH ROW EXECUTE FUNCTION actualizar_estado_libro();
+AFTER INSERT ON prestamo_libro
+REFERENCING NEW TABLE AS prestamos_nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION actualizar_estado_libro();
+
+CREATE TRIGGER trigger_actualizar_estado_libro_devolucion
+AFTER UPDATE ON prestamo_libro
+REFERENCING NEW TABLE AS prestamos_nuevos
+FOR EACH STATEMENT EXECUTE FUNCTION actualizar_estado_libro();
+
+-- Trigger 4: Despertar a los consumidores CDC cuando hay auditoría nueva
+-- A nivel de sentencia: un NOTIFY por INSERT, no uno por fila
+CREATE OR REPLACE FUNCTION notificar_auditoria()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('auditoria_cambios', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_notificar_auditoria
+AFTER INSERT ON auditoria_cambios
+FOR EACH STATEMENT EXECUTE FUNCTION notificar_auditoria();
+
+-- Trigger 5: Rechazar ciclos en la cadena de prerrequisitos
+-- (la aplicación valida contra prerequisites.PrerequisiteGraph; esto cubre
+-- escrituras concurrentes o hechas fuera de ella)
+CREATE OR REPLACE FUNCTION validar_prerrequisito()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.prerequisito_id IS NOT NULL AND EXISTS (
+        WITH RECURSIVE cadena(id) AS (
+            SELECT NEW.prerequisito_id
+            UNION
+            SELECT c.prerequisito_id FROM curso c JOIN cadena ON c.id = cadena.id
+            WHERE c.prerequisito_id IS NOT NULL
+        )
+        SELECT 1 FROM cadena WHERE id = NEW.id
+    ) THEN
+        RAISE EXCEPTION 'El prerrequisito % crea un ciclo con el curso %', NEW.prerequisito_id, NEW.id;
+    END IF;
+    
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_validar_prerrequisito
+BEFORE INSERT OR UPDATE OF prerequisito_id ON curso
+FOR EACH ROW EXECUTE FUNCTION validar_prerrequisito();
 
 -- ÍNDICES PARA MEJORAR RENDIMIENTO
 CREATE INDEX idx_matricula_estudiante ON matricula(estudiante_id);
@@ -506,4 +821,9 @@ CREATE INDEX idx_matricula_curso ON matricula(curso_id);
 CREATE INDEX idx_horario_curso ON horario(curso_id);
 CREATE INDEX idx_horario_aula ON horario(aula_id);
 CREATE INDEX idx_estudiante_carrera ON estudiante(carrera_id);
-CREATE INDEX idx_curso_carrera ON curso(carrera_id);
\ No newline at end of file
+CREATE INDEX idx_curso_carrera ON curso(carrera_id);
+CREATE INDEX idx_asistencia_curso_fecha ON asistencia(curso_id, fecha);
+CREATE INDEX idx_evaluacion_curso_fecha ON evaluacion(curso_id, fecha);
+CREATE INDEX idx_prestamo_libro_abiertos ON prestamo_libro(fecha_devolucion) WHERE fecha_devolucion_real IS NULL;
+CREATE INDEX idx_auditoria_tabla_registro_fecha ON auditoria_cambios(tabla_afectada, id_registro, fecha);
+CREATE INDEX idx_auditoria_transaccion ON auditoria_cambios(transaccion, id);
@@ -0,0 +1,116 @@
+'''
+Asistencia: alertas, recálculo del resumen y simulación de carga.
+
+    python attendance.py alertas --tasa 0.8 --racha 3 --csv
+    python attendance.py recalcular --anio 2025 --semestre "Segundo Semestre"
+    python attendance.py simular --sesiones 30        # marcar 30 sesiones de cada curso
+
+La API está en cruds.AttendanceCRUD (crud.attendance): mark_session escribe
+una sesión completa por sentencia y get_summary / at_risk leen solo
+resumen_asistencia. Sin --anio/--semestre se usa el periodo vigente.
+simular marca sesiones en días hábiles consecutivos desde el inicio del
+periodo, con asistencia al azar (cada estudiante tiene su propia
+probabilidad), y compara al final el resumen incremental con uno
+recalculado desde asistencia.
+'''
+
+from models import session, Enrollment, AttendanceSummary, current_academic_period, academic_period_range
+from cruds import UniversityCRUD
+from reports import ReportGenerator
+from sqlalchemy import select
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+
+def class_days(anio_academico: int, semestre: str, sessions: int):
+    """Primeras `sessions` fechas hábiles del periodo"""
+    day, end = academic_period_range(anio_academico, semestre)
+    days = []
+    while len(days) < sessions and day < end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def simulate(crud, anio_academico: int, semestre: str, sessions: int, seed: int = 42):
+    """Marcar `sessions` sesiones de todos los cursos con matrícula en el periodo"""
+    rng = random.Random(seed)
+    rosters = {}
+    for estudiante_id, curso_id in session.execute(select(Enrollment.estudiante_id, Enrollment.curso_id).where(
+            Enrollment.anio_academico == anio_academico, Enrollment.semestre == semestre,
+            Enrollment.estado == 'Activa')):
+        rosters.setdefault(curso_id, []).append(estudiante_id)
+    session.commit()
+    attendance_odds = {estudiante_id: rng.uniform(0.5, 1.0)
+                       for roster in rosters.values() for estudiante_id in roster}
+
+    rows = 0
+    start = time.perf_counter()
+    for fecha in class_days(anio_academico, semestre, sessions):
+        for curso_id, roster in rosters.items():
+            present = [estudiante_id for estudiante_id in roster if rng.random() < attendance_odds[estudiante_id]]
+            rows += crud.attendance.mark_session(curso_id, fecha, present)
+    return rows, time.perf_counter() - start
+
+
+def summary_snapshot(anio_academico: int, semestre: str):
+    rows = session.execute(select(AttendanceSummary).where(
+        AttendanceSummary.anio_academico == anio_academico, AttendanceSummary.semestre == semestre
+    )).scalars()
+    snapshot = {(row.curso_id, row.estudiante_id): (row.sesiones, row.presentes, row.justificadas,
+                                                    row.racha_ausencias, row.ultima_fecha) for row in rows}
+    session.commit()
+    return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asistencia: alertas y mantenimiento del resumen")
+    parser.add_argument('accion', choices=['alertas', 'recalcular', 'simular'])
+    parser.add_argument('--anio', type=int)
+    parser.add_argument('--semestre')
+    parser.add_argument('--curso', type=int, help="Solo este curso")
+    parser.add_argument('--tasa', type=float, default=0.75, help="Alertar bajo esta tasa de asistencia")
+    parser.add_argument('--racha', type=int, default=3, help="Alertar con estas ausencias seguidas sin justificar")
+    parser.add_argument('--minimo', type=int, default=4, help="Sesiones mínimas para alertar")
+    parser.add_argument('--sesiones', type=int, default=20, help="Sesiones por curso a simular")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--csv', action='store_true', help="Exportar alertas a reports/")
+    args = parser.parse_args()
+
+    year, semester = current_academic_period()
+    year, semester = args.anio or year, args.semestre or semester
+    crud = UniversityCRUD()
+
+    if args.accion == 'simular':
+        rows, elapsed = simulate(crud, year, semester, args.sesiones, args.semilla)
+        print(f"📝 {rows} asistencias en {elapsed:.2f} s ({rows / max(elapsed, 1e-9):,.0f} filas/s)")
+        incremental = summary_snapshot(year, semester)
+        crud.attendance.rebuild_summary(year, semester)
+        rebuilt = summary_snapshot(year, semester)
+        print("✅ Resumen incremental igual al recalculado" if incremental == rebuilt
+              else "❌ El resumen incremental difiere del recalculado")
+        return
+
+    if args.accion == 'recalcular':
+        start = time.perf_counter()
+        rows = crud.attendance.rebuild_summary(year, semester, args.curso)
+        print(f"🔄 {rows} filas de resumen recalculadas en {time.perf_counter() - start:.2f} s")
+        return
+
+    start = time.perf_counter()
+    records = crud.attendance.at_risk(year, semester, args.tasa, args.racha, args.minimo, args.curso)
+    print(f"⚠️  {len(records)} estudiantes en riesgo en {year} {semester} "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    for record in records[:20]:
+        print(f"  {record.codigo:<10} {record.nombre} {record.apellido}: {record.presentes}/{record.sesiones} "
+              f"({record.tasa:.0%}), {record.racha_ausencias} ausencias seguidas")
+    if args.csv and records:
+        filename = f"asistencia_riesgo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(records, filename)}")
+
+
+if __name__ == "__main__":
+    main()
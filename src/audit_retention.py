@@ -0,0 +1,245 @@
+'''
+Job de retención de auditoria_cambios.
+
+    python audit_retention.py --meses 12 --destino ../archive/auditoria
+
+En PostgreSQL la tabla está particionada por mes (ver schema.sql):
+    1. Crea por adelantado las particiones de los próximos meses, para que
+       la partición DEFAULT no reciba filas.
+    2. Las particiones más antiguas que el periodo de retención se exportan
+       a un CSV comprimido y luego se separan (DETACH) y eliminan en la misma
+       transacción: si algo falla la partición queda adjunta y se reintenta.
+    3. Las filas antiguas que cayeron en la partición DEFAULT (meses sin
+       partición) se exportan y borran por mes.
+
+Cada archivo lleva el mes y la fecha de la ejecución
+(auditoria_cambios_YYYYMM_<AAAAMMDD_HHMMSS>.csv.gz), así que archivar de
+nuevo un mes (filas tardías en DEFAULT o en SQLite) no pisa lo ya exportado.
+
+En SQLite no hay particiones: se exportan y borran las filas por mes.
+'''
+
+from models import session, engine, AuditLog
+from sqlalchemy import text
+from datetime import date, datetime
+import argparse
+import csv
+import gzip
+import json
+import os
+
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), '..', 'archive', 'auditoria')
+PARTITION_PREFIX = 'auditoria_cambios_'
+COLUMNS = ['id', 'tabla_afectada', 'id_registro', 'tipo_operacion', 'fecha', 'usuario',
+           'valores_anteriores', 'valores_nuevos']
+
+
+def _month_start(value: date, offset: int = 0) -> date:
+    """Primer día del mes de `value` desplazado `offset` meses"""
+    month_index = value.year * 12 + (value.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+class AuditRetention:
+    def __init__(self, retain_months: int = 12, archive_dir: str = DEFAULT_ARCHIVE_DIR, months_ahead: int = 3):
+        if retain_months < 1:
+            raise ValueError("El periodo de retención debe ser de al menos 1 mes")
+        self.retain_months = retain_months
+        self.archive_dir = archive_dir
+        self.months_ahead = months_ahead
+        self.is_postgres = engine.dialect.name == 'postgresql'
+        self.run_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    def cutoff(self, today: date = None) -> date:
+        """Las filas con fecha anterior a este día se archivan"""
+        return _month_start(today or date.today(), -self.retain_months + 1)
+
+    def _archive_path(self, month: date, prefix: str = PARTITION_PREFIX) -> str:
+        """Ruta nueva para el archivo del mes; nunca sobrescribe uno de otra ejecución"""
+        if not os.path.exists(self.archive_dir):
+            os.makedirs(self.archive_dir)
+        base = os.path.join(self.archive_dir, f"{prefix}{month.strftime('%Y%m')}_{self.run_stamp}")
+        path, sequence = f"{base}.csv.gz", 1
+        while os.path.exists(path):
+            sequence += 1
+            path = f"{base}_{sequence}.csv.gz"
+        return path
+
+    # --- PostgreSQL ---
+
+    def ensure_partitions(self, today: date = None):
+        """Crear las particiones del mes actual y los `months_ahead` siguientes"""
+        if not self.is_postgres:
+            return []
+        today = today or date.today()
+        created = []
+        for offset in range(self.months_ahead + 1):
+            name = session.execute(
+                text("SELECT crear_particion_auditoria(:mes)"),
+                {'mes': _month_start(today, offset)}
+            ).scalar()
+            created.append(name)
+        session.commit()
+        return created
+
+    def list_partitions(self):
+        """Tablas mensuales como [(nombre, primer día del mes, adjunta)].
+
+        Incluye las auditoria_cambios_AAAAMM que quedaron separadas (DETACH)
+        sin eliminar, para que el job las vuelva a intentar.
+        """
+        rows = session.execute(text("""
+            SELECT c.relname, i.inhrelid IS NOT NULL AS adjunta
+            FROM pg_class c
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+                AND i.inhparent = 'auditoria_cambios'::regclass
+            WHERE c.relkind = 'r' AND c.relname LIKE 'auditoria_cambios_%'
+              AND pg_table_is_visible(c.oid)
+        """)).all()
+        session.commit()
+        partitions = []
+        for name, attached in rows:
+            suffix = name[len(PARTITION_PREFIX):]
+            if name.startswith(PARTITION_PREFIX) and suffix.isdigit() and len(suffix) == 6:
+                partitions.append((name, date(int(suffix[:4]), int(suffix[4:]), 1), attached))
+        return sorted(partitions, key=lambda item: item[1])
+
+    @staticmethod
+    def _copy_to(cursor, query: str, path: str):
+        with gzip.open(path, 'wt', encoding='utf-8', newline='') as file:
+            cursor.copy_expert(f'COPY ({query}) TO STDOUT WITH CSV HEADER', file)
+
+    def _archive_partition(self, name: str, month: date, attached: bool = True) -> str:
+        """Exportar la partición y luego separarla y eliminarla, todo en una transacción.
+
+        Si la exportación o el DROP fallan se hace rollback y la partición
+        sigue adjunta y consultable; la próxima ejecución lo vuelve a intentar.
+        """
+        path = self._archive_path(month)
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            # Bloquea escrituras tardías a la partición mientras se exporta
+            cursor.execute(f'LOCK TABLE "{name}" IN SHARE MODE')
+            self._copy_to(cursor, f'SELECT {", ".join(COLUMNS)} FROM "{name}" ORDER BY id', path)
+            if attached:
+                cursor.execute(f'ALTER TABLE auditoria_cambios DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+            raw.commit()
+            cursor.close()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return path
+
+    def _archive_default(self, cutoff: date):
+        """Archivar por mes las filas anteriores al corte que cayeron en la partición DEFAULT"""
+        first = session.execute(text(
+            "SELECT min(fecha) FROM auditoria_cambios_default WHERE fecha < :corte"
+        ), {'corte': cutoff}).scalar()
+        session.commit()
+        archived = []
+        if first is None:
+            return archived
+
+        month = _month_start(first.date())
+        while month < cutoff:
+            start, end = month, _month_start(month, 1)
+            path = self._archive_path(month, f"{PARTITION_PREFIX}default_")
+            raw = engine.raw_connection()
+            try:
+                cursor = raw.cursor()
+                cursor.execute('LOCK TABLE auditoria_cambios_default IN SHARE MODE')
+                cursor.execute('SELECT count(*) FROM auditoria_cambios_default WHERE fecha >= %s AND fecha < %s',
+                               (start, end))
+                if cursor.fetchone()[0]:
+                    self._copy_to(cursor, cursor.mogrify(
+                        f'SELECT {", ".join(COLUMNS)} FROM auditoria_cambios_default '
+                        'WHERE fecha >= %s AND fecha < %s ORDER BY id', (start, end)).decode(), path)
+                    cursor.execute('DELETE FROM auditoria_cambios_default WHERE fecha >= %s AND fecha < %s',
+                                   (start, end))
+                    archived.append(path)
+                raw.commit()
+                cursor.close()
+            except Exception:
+                raw.rollback()
+                raise
+            finally:
+                raw.close()
+            month = _month_start(month, 1)
+        return archived
+
+    # --- SQLite (sin particiones) ---
+
+    def _archive_rows(self, cutoff: date):
+        cutoff_dt = datetime.combine(cutoff, datetime.min.time())
+        first = session.query(AuditLog.fecha).filter(AuditLog.fecha < cutoff_dt)\
+            .order_by(AuditLog.fecha).first()
+        archived = []
+        if not first:
+            return archived
+
+        month = _month_start(first.fecha.date())
+        while month < cutoff:
+            start = datetime.combine(month, datetime.min.time())
+            end = datetime.combine(_month_start(month, 1), datetime.min.time())
+            query = session.query(AuditLog).filter(AuditLog.fecha >= start, AuditLog.fecha < end)
+            rows = query.order_by(AuditLog.id).all()
+            if rows:
+                path = self._archive_path(month)
+                with gzip.open(path, 'wt', encoding='utf-8', newline='') as file:
+                    writer = csv.writer(file)
+                    writer.writerow(COLUMNS)
+                    for row in rows:
+                        writer.writerow([
+                            row.id, row.tabla_afectada, row.id_registro, row.tipo_operacion,
+                            row.fecha.isoformat(sep=' '), row.usuario,
+                            json.dumps(row.valores_anteriores) if row.valores_anteriores is not None else '',
+                            json.dumps(row.valores_nuevos) if row.valores_nuevos is not None else ''
+                        ])
+                query.delete(synchronize_session=False)
+                session.commit()
+                archived.append(path)
+            month = _month_start(month, 1)
+        return archived
+
+    def run(self, today: date = None):
+        """Ejecutar el job completo. Retorna las rutas de los archivos generados."""
+        try:
+            self.run_stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            cutoff = self.cutoff(today)
+            if not self.is_postgres:
+                return self._archive_rows(cutoff)
+
+            self.ensure_partitions(today)
+            archived = []
+            for name, month, attached in self.list_partitions():
+                # La partición cubre [month, mes siguiente): se archiva completa
+                if _month_start(month, 1) <= cutoff:
+                    archived.append(self._archive_partition(name, month, attached))
+            return archived + self._archive_default(cutoff)
+        except Exception as e:
+            session.rollback()
+            raise ValueError(f"Error en retención de auditoría: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retención y archivo de auditoria_cambios")
+    parser.add_argument('--meses', type=int, default=12, help="Meses de auditoría a conservar en línea")
+    parser.add_argument('--destino', default=DEFAULT_ARCHIVE_DIR, help="Directorio de los archivos .csv.gz")
+    parser.add_argument('--adelanto', type=int, default=3, help="Meses futuros con partición creada")
+    args = parser.parse_args()
+
+    job = AuditRetention(retain_months=args.meses, archive_dir=args.destino, months_ahead=args.adelanto)
+    archived = job.run()
+    print(f"✅ Retención completada. Corte: {job.cutoff().isoformat()}")
+    for path in archived:
+        print(f"  📦 {path}")
+    if not archived:
+        print("  No había datos para archivar.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+'''
+Micro-benchmark del costo por llamada de las lecturas CRUD.
+
+Compara cada método de cruds.py (sentencias cacheadas con lambda_stmt) con
+la forma anterior, que construía un Query del ORM en cada llamada:
+
+    python bench_crud.py --llamadas 5000
+    DATABASE_URL=postgresql://... python bench_crud.py   # usa datos existentes
+
+Con la URL por defecto usa un SQLite temporal con datos mínimos. Después de
+cada llamada se vacía el identity map para que todas vayan a la base.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import date
+
+if 'DATABASE_URL' not in os.environ:
+    _path = os.path.join(tempfile.gettempdir(), 'sgu_bench_crud.db')
+    if os.path.exists(_path):
+        os.remove(_path)
+    os.environ['DATABASE_URL'] = f"sqlite:///{_path}"
+
+from models import session, engine, init_sqlite_schema, Faculty, Major, Department, Student, Professor, Course
+from cruds import FacultyCRUD, StudentCRUD, ProfessorCRUD, CourseCRUD
+
+
+def seed_minimal():
+    """Unas pocas filas por tabla: el benchmark mide el costo fijo por llamada"""
+    if not init_sqlite_schema() or session.query(Student).count():
+        return
+    faculty = Faculty(nombre="Facultad de Benchmark", ubicacion="Edificio B")
+    session.add(faculty)
+    session.flush()
+    major = Major(nombre="Carrera de Benchmark", facultad_id=faculty.id, duracion_anos=4, creditos_totales=160)
+    department = Department(nombre="Departamento de Benchmark", facultad_id=faculty.id)
+    session.add_all([major, department])
+    session.flush()
+    for i in range(20):
+        session.add(Student(nombre=f"N{i}", apellido=f"A{i}", fecha_nacimiento=date(2000, 1, 1),
+                            email=f"e{i}@bench.edu", carrera_id=major.id))
+        session.add(Professor(nombre=f"N{i}", apellido=f"A{i}", departamento_id=department.id,
+                              fecha_contratacion=date(2015, 1, 1), email=f"p{i}@bench.edu"))
+        session.add(Course(codigo=f"BEN{i:03d}", nombre=f"Curso {i}", creditos=3, carrera_id=major.id))
+    session.commit()
+
+
+def per_call_us(function, calls: int) -> float:
+    function()  # calentar: la primera llamada compila y llena las cachés
+    session.expunge_all()
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+        session.expunge_all()
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo por llamada de las lecturas CRUD")
+    parser.add_argument('--llamadas', type=int, default=5000)
+    args = parser.parse_args()
+
+    seed_minimal()
+    student_id = session.query(Student.id).limit(1).scalar()
+    faculty_id = session.query(Faculty.id).limit(1).scalar()
+    professor_id = session.query(Professor.id).limit(1).scalar()
+    course_id = session.query(Course.id).limit(1).scalar()
+    session.commit()
+
+    cases = [
+        ('get_student',
+         lambda: session.query(Student).filter(Student.id == student_id).first(),
+         lambda: StudentCRUD.get_student(student_id)),
+        ('get_faculty',
+         lambda: session.query(Faculty).filter(Faculty.id == faculty_id).first(),
+         lambda: FacultyCRUD.get_faculty(faculty_id)),
+        ('get_professor',
+         lambda: session.query(Professor).filter(Professor.id == professor_id).first(),
+         lambda: ProfessorCRUD.get_professor(professor_id)),
+        ('get_course',
+         lambda: session.query(Course).filter(Course.id == course_id).first(),
+         lambda: CourseCRUD.get_course(course_id)),
+        ('list_faculties',
+         lambda: session.query(Faculty).order_by(Faculty.nombre).all(),
+         FacultyCRUD.list_faculties),
+        ('list_courses',
+         lambda: session.query(Course).join(Major).order_by(Course.codigo).all(),
+         CourseCRUD.list_courses),
+    ]
+
+    print(f"📊 Costo por llamada en {engine.dialect.name} ({args.llamadas} llamadas, µs)")
+    print("{:<18} {:>14} {:>14} {:>10}".format("Método", "Query ORM", "Cacheada", "Mejora"))
+    print("-" * 58)
+    for name, legacy, cached in cases:
+        before = per_call_us(legacy, args.llamadas)
+        after = per_call_us(cached, args.llamadas)
+        print("{:<18} {:>14.1f} {:>14.1f} {:>9.2f}x".format(name, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
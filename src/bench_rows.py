@@ -0,0 +1,102 @@
+'''
+Benchmark de memoria y CPU por fila en listados grandes.
+
+Compara, para N estudiantes (100k por defecto):
+    orm             StudentCRUD.list_students (instancias del ORM)
+    registros       StudentCRUD.list_student_records (tuplas con nombre)
+    registros_lote  StudentCRUD.list_student_records(batch_size=...) recorrido en lotes
+
+    python bench_rows.py --filas 100000
+
+Usa un SQLite temporal. El tiempo se mide sin tracemalloc y la memoria pico
+en una segunda pasada con tracemalloc.
+'''
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+
+_path = os.path.join(tempfile.gettempdir(), 'sgu_bench_rows.db')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{_path}")
+
+from models import session, init_sqlite_schema, Faculty, Major, Student
+from cruds import StudentCRUD
+
+
+def seed_students(rows: int):
+    init_sqlite_schema()
+    if session.query(Student).count() >= rows:
+        return
+    session.query(Student).delete()
+    major = session.query(Major).first()
+    if major is None:
+        faculty = Faculty(nombre="Facultad de Benchmark", ubicacion="Edificio B")
+        session.add(faculty)
+        session.flush()
+        major = Major(nombre="Carrera de Benchmark", facultad_id=faculty.id, duracion_anos=4, creditos_totales=160)
+        session.add(major)
+        session.flush()
+    # Inserción con executemany por Core: no interesa medir la carga
+    session.execute(Student.__table__.insert(), [
+        {'nombre': f"Nombre{i}", 'apellido': f"Apellido{i % 5000}", 'fecha_nacimiento': date(2000, 1, 1),
+         'email': f"e{i}@bench.edu", 'carrera_id': major.id if i % 10 else None,
+         'fecha_ingreso': date(2022, 1, 1), 'estado': 'Activo'}
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def consume(result):
+    """Recorrer el resultado tocando las columnas que muestra main.py"""
+    count = 0
+    for row in result:
+        row.id, row.nombre, row.apellido, row.email
+        count += 1
+    return count
+
+
+def run_case(name, function):
+    session.expunge_all()
+    start = time.perf_counter()
+    count = consume(function())
+    elapsed = time.perf_counter() - start
+
+    session.expunge_all()
+    tracemalloc.start()
+    result = function()
+    consume(result)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    session.expunge_all()
+    return name, count, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria y CPU por fila en listados")
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--lote', type=int, default=1000)
+    args = parser.parse_args()
+
+    seed_students(args.filas)
+    cases = [
+        ('orm', StudentCRUD.list_students),
+        ('registros', StudentCRUD.list_student_records),
+        ('registros_lote', lambda: StudentCRUD.list_student_records(batch_size=args.lote)),
+    ]
+
+    print(f"📊 Listado de {args.filas} estudiantes")
+    print("{:<16} {:>10} {:>12} {:>14} {:>14}".format("Forma", "Filas", "Segundos", "µs/fila", "Bytes/fila"))
+    print("-" * 70)
+    for name, function in cases:
+        name, count, elapsed, peak = run_case(name, function)
+        print("{:<16} {:>10} {:>12.3f} {:>14.2f} {:>14.0f}".format(
+            name, count, elapsed, elapsed / count * 1_000_000, peak / count
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+'''
+Benchmark del perfil de SQLite (models.SQLITE_PRAGMAS).
+
+Ejecuta la misma carga con SQLITE_PROFILE=default y SQLITE_PROFILE=tuned,
+cada una en un proceso y archivo nuevos, y compara el rendimiento:
+
+    python bench_sqlite.py --filas 2000
+
+Cargas medidas:
+    escritura_por_fila   StudentCRUD.create_student (un commit por fila)
+    escritura_lote       inserción de todas las filas en un solo commit
+    lectura_pk           StudentCRUD.get_student con ids aleatorios
+    lectura_listado      StudentCRUD.list_students completo
+'''
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+PROFILES = ('default', 'tuned')
+
+
+def run_workload(rows: int, reads: int):
+    """Ejecutar la carga en el proceso actual. Retorna {carga: operaciones/s}"""
+    from models import session, init_sqlite_schema, Faculty, Major, Student
+    from cruds import StudentCRUD
+
+    init_sqlite_schema()
+    faculty = Faculty(nombre="Facultad de Benchmark", ubicacion="Edificio B")
+    session.add(faculty)
+    session.flush()
+    major = Major(nombre="Carrera de Benchmark", facultad_id=faculty.id, duracion_anos=4, creditos_totales=160)
+    session.add(major)
+    session.commit()
+
+    results = {}
+
+    start = time.perf_counter()
+    for i in range(rows):
+        StudentCRUD.create_student(
+            nombre=f"Nombre{i}", apellido=f"Apellido{i}", fecha_nacimiento=date(2000, 1, 1),
+            email=f"fila{i}@bench.edu", carrera_id=major.id
+        )
+    results['escritura_por_fila'] = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    session.add_all([
+        Student(nombre=f"Nombre{i}", apellido=f"Apellido{i}", fecha_nacimiento=date(2000, 1, 1),
+                email=f"lote{i}@bench.edu", carrera_id=major.id)
+        for i in range(rows)
+    ])
+    session.commit()
+    results['escritura_lote'] = rows / (time.perf_counter() - start)
+
+    ids = [row.id for row in session.query(Student.id).all()]
+    session.expunge_all()
+    rng = random.Random(42)
+    start = time.perf_counter()
+    for _ in range(reads):
+        StudentCRUD.get_student(rng.choice(ids))
+        session.expunge_all()  # evitar que el identity map responda sin ir a la base
+    results['lectura_pk'] = reads / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    repeat = 5
+    for _ in range(repeat):
+        StudentCRUD.list_students()
+        session.expunge_all()
+    results['lectura_listado'] = repeat / (time.perf_counter() - start)
+    return results
+
+
+def run_profile(profile: str, rows: int, reads: int):
+    """Ejecutar la carga en un proceso nuevo con el perfil indicado"""
+    path = os.path.join(tempfile.gettempdir(), f"sgu_bench_{profile}.db")
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    env = dict(os.environ, SQLITE_PROFILE=profile, DATABASE_URL=f"sqlite:///{path}")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', '--filas', str(rows), '--lecturas', str(reads)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    # La última línea es el JSON de resultados (models imprime la conexión antes)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del perfil de SQLite")
+    parser.add_argument('--filas', type=int, default=2000)
+    parser.add_argument('--lecturas', type=int, default=5000)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_workload(args.filas, args.lecturas)))
+        return
+
+    results = {profile: run_profile(profile, args.filas, args.lecturas) for profile in PROFILES}
+    print(f"📊 SQLite: {args.filas} filas, {args.lecturas} lecturas por PK (operaciones/s)")
+    print("{:<22} {:>14} {:>14} {:>10}".format("Carga", "default", "tuned", "Mejora"))
+    print("-" * 62)
+    for workload in results['default']:
+        before, after = results['default'][workload], results['tuned'][workload]
+        print("{:<22} {:>14,.1f} {:>14,.1f} {:>9.1f}x".format(workload, before, after, after / before))
+
+
+if __name__ == "__main__":
+    main()
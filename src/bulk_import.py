@@ -0,0 +1,283 @@
+'''
+Importación masiva de estudiantes y profesores desde CSV.
+
+    python bulk_import.py estudiantes nuevo_ingreso.csv
+    python bulk_import.py profesores planilla.csv --lote 10000 --rechazos rechazos.csv
+
+El archivo se lee por lotes (no se carga completo en memoria). Cada lote se
+valida con las reglas de schema.sql (formato de email, valores de estado,
+longitudes, fechas) y contra conjuntos precargados de carreras,
+departamentos y emails existentes, sin consultas por fila. Las filas válidas
+se escriben con COPY en PostgreSQL y con executemany en SQLite, un commit
+por lote. Las inválidas van al archivo de rechazos con la línea y el motivo.
+
+Con --actualizar los emails existentes no se rechazan: el lote se escribe con
+SyncCRUD.upsert (ON CONFLICT por email) y se cuentan las filas insertadas,
+actualizadas y sin cambios. En ese modo el email es obligatorio.
+
+Encabezados esperados (los opcionales pueden faltar o ir vacíos):
+    estudiantes: nombre, apellido, fecha_nacimiento, email, [direccion, telefono, carrera_id, fecha_ingreso, estado]
+    profesores:  nombre, apellido, departamento_id, fecha_contratacion, [especializacion, salario, email, activo]
+'''
+
+from models import session, engine, Student, Professor, Major, Department
+from cruds import SyncCRUD
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import argparse
+import csv
+import io
+import itertools
+import os
+import re
+import time
+
+# Mismo patrón que el CHECK de estudiante.email en schema.sql (~* : sin distinguir mayúsculas)
+EMAIL_PATTERN = re.compile(r'^[A-Za-z0-9._%-]+@[A-Za-z0-9.-]+[.][A-Za-z]+$')
+STUDENT_STATES = ('Activo', 'Inactivo', 'Graduado')
+TRUE_VALUES = ('1', 'true', 't', 'si', 'sí', 's', 'yes', 'y')
+FALSE_VALUES = ('0', 'false', 'f', 'no', 'n')
+
+ENTITIES = {
+    'estudiantes': Student,
+    'profesores': Professor,
+}
+
+
+class BulkImporter:
+    def __init__(self, entity: str, chunk_size: int = 5000, rejects_path: str = None, upsert: bool = False,
+                 policy: dict = None):
+        if entity not in ENTITIES:
+            raise ValueError(f"Entidad no soportada: {entity}. Opciones: {', '.join(ENTITIES)}")
+        self.entity = entity
+        self.model = ENTITIES[entity]
+        self.columns = [column.name for column in self.model.__table__.columns if column.name != 'id']
+        self.chunk_size = chunk_size
+        self.rejects_path = rejects_path
+        self.upsert = upsert
+        self.policy = policy
+        self.is_postgres = engine.dialect.name == 'postgresql'
+        self.major_ids = set()
+        self.department_ids = set()
+        self.emails = set()
+
+    def load_reference_sets(self):
+        """Precargar llaves foráneas válidas y emails ya usados"""
+        self.major_ids = set(session.execute(select(Major.id)).scalars())
+        self.department_ids = set(session.execute(select(Department.id)).scalars())
+        self.emails = {email.lower() for email in session.execute(
+            select(self.model.email).where(self.model.email.isnot(None))
+        ).scalars()}
+        session.commit()
+
+    # --- Validación ---
+
+    @staticmethod
+    def _text(row, field, errors, max_length, required=False):
+        value = (row.get(field) or '').strip()
+        if not value:
+            if required:
+                errors.append(f"{field} es obligatorio")
+            return None
+        if len(value) > max_length:
+            errors.append(f"{field} excede {max_length} caracteres")
+        return value
+
+    @staticmethod
+    def _date(row, field, errors, required=False):
+        value = (row.get(field) or '').strip()
+        if not value:
+            if required:
+                errors.append(f"{field} es obligatorio")
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            errors.append(f"{field} no es una fecha AAAA-MM-DD")
+            return None
+
+    @staticmethod
+    def _id(row, field, errors, valid_ids, required=False):
+        value = (row.get(field) or '').strip()
+        if not value:
+            if required:
+                errors.append(f"{field} es obligatorio")
+            return None
+        if not value.isdigit() or int(value) not in valid_ids:
+            errors.append(f"{field} {value} no existe")
+            return None
+        return int(value)
+
+    def _email(self, row, errors, required, seen):
+        email = self._text(row, 'email', errors, 100, required or self.upsert)
+        if email is None:
+            return None
+        if not EMAIL_PATTERN.match(email):
+            errors.append("email con formato inválido")
+        elif email.lower() in self.emails and not self.upsert:
+            errors.append("email ya registrado")
+        elif email.lower() in seen:
+            errors.append("email repetido en el archivo")
+        return email
+
+    def clean_student(self, row, seen):
+        errors = []
+        values = {
+            'nombre': self._text(row, 'nombre', errors, 50, required=True),
+            'apellido': self._text(row, 'apellido', errors, 50, required=True),
+            'fecha_nacimiento': self._date(row, 'fecha_nacimiento', errors, required=True),
+            'direccion': (row.get('direccion') or '').strip() or None,
+            'telefono': self._text(row, 'telefono', errors, 15),
+            'email': self._email(row, errors, True, seen),
+            'carrera_id': self._id(row, 'carrera_id', errors, self.major_ids),
+            'fecha_ingreso': self._date(row, 'fecha_ingreso', errors) or date.today(),
+            'estado': (row.get('estado') or '').strip() or 'Activo',
+        }
+        if values['estado'] not in STUDENT_STATES:
+            errors.append(f"estado debe ser uno de {', '.join(STUDENT_STATES)}")
+        return values, errors
+
+    def clean_professor(self, row, seen):
+        errors = []
+        values = {
+            'nombre': self._text(row, 'nombre', errors, 50, required=True),
+            'apellido': self._text(row, 'apellido', errors, 50, required=True),
+            'especializacion': self._text(row, 'especializacion', errors, 100),
+            'departamento_id': self._id(row, 'departamento_id', errors, self.department_ids, required=True),
+            'fecha_contratacion': self._date(row, 'fecha_contratacion', errors, required=True),
+            'salario': None,
+            'email': self._email(row, errors, False, seen),
+            'activo': True,
+        }
+        salary = (row.get('salario') or '').strip()
+        if salary:
+            try:
+                values['salario'] = Decimal(salary)
+                if values['salario'] <= 0:
+                    errors.append("salario debe ser mayor que 0")
+            except InvalidOperation:
+                errors.append("salario no es numérico")
+        active = (row.get('activo') or '').strip().lower()
+        if active in FALSE_VALUES:
+            values['activo'] = False
+        elif active and active not in TRUE_VALUES:
+            errors.append("activo debe ser verdadero/falso")
+        return values, errors
+
+    def validate_chunk(self, numbered_rows):
+        """Separar un lote en (filas válidas, [(línea, fila original, motivo)])"""
+        clean = self.clean_student if self.model is Student else self.clean_professor
+        valid, rejects, seen = [], [], set()
+        for line, row in numbered_rows:
+            values, errors = clean(row, seen)
+            if errors:
+                rejects.append((line, row, '; '.join(errors)))
+                continue
+            if values['email']:
+                seen.add(values['email'].lower())
+            valid.append(values)
+        return valid, rejects
+
+    # --- Escritura ---
+
+    def _copy_rows(self, rows):
+        """COPY ... FROM STDIN con las filas del lote serializadas como CSV"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for values in rows:
+            writer.writerow(['\\N' if values[column] is None else values[column] for column in self.columns])
+        buffer.seek(0)
+        cursor = session.connection().connection.cursor()
+        cursor.copy_expert(
+            f"COPY {self.model.__tablename__} ({', '.join(self.columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+
+    def write_chunk(self, rows):
+        """Escribir las filas válidas. Retorna los conteos del lote"""
+        if not rows:
+            return {}
+        if self.upsert:
+            return SyncCRUD.upsert(self.model, rows, self.policy)
+        if self.is_postgres:
+            self._copy_rows(rows)
+        else:
+            session.execute(insert(self.model.__table__), rows)
+        session.commit()
+        self.emails.update(values['email'].lower() for values in rows if values['email'])
+        return {'insertadas': len(rows)}
+
+    # --- Proceso completo ---
+
+    def run(self, path: str):
+        """Importar el archivo. Retorna un resumen con conteos y filas/s"""
+        rejects_path = self.rejects_path or os.path.splitext(path)[0] + '.rechazos.csv'
+        self.load_reference_sets()
+        summary = {'leidas': 0, 'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'rechazadas': 0, 'rechazos': None}
+        start = time.perf_counter()
+
+        with open(path, newline='', encoding='utf-8') as source:
+            reader = csv.DictReader(source)
+            rejects_file, rejects_writer = None, None
+            numbered = enumerate(reader, start=2)  # la línea 1 es el encabezado
+            try:
+                while True:
+                    chunk = list(itertools.islice(numbered, self.chunk_size))
+                    if not chunk:
+                        break
+                    summary['leidas'] += len(chunk)
+                    valid, rejects = self.validate_chunk(chunk)
+                    try:
+                        for count, value in self.write_chunk(valid).items():
+                            summary[count] += value
+                    except (SQLAlchemyError, ValueError) as e:
+                        # Otra sesión pudo insertar un email entre la precarga y el lote
+                        session.rollback()
+                        failed = {line for line, _, _ in rejects}
+                        rejects += [(line, row, f"lote rechazado: {e.__class__.__name__}")
+                                    for line, row in chunk if line not in failed]
+                    if rejects:
+                        if rejects_writer is None:
+                            rejects_file = open(rejects_path, 'w', newline='', encoding='utf-8')
+                            rejects_writer = csv.writer(rejects_file)
+                            rejects_writer.writerow(['linea', 'motivo'] + reader.fieldnames)
+                        rejects_writer.writerows(
+                            [line, reason] + [row.get(field) for field in reader.fieldnames]
+                            for line, row, reason in rejects
+                        )
+                        summary['rechazadas'] += len(rejects)
+            finally:
+                if rejects_file:
+                    rejects_file.close()
+                    summary['rechazos'] = rejects_path
+
+        summary['segundos'] = time.perf_counter() - start
+        summary['filas_por_segundo'] = summary['leidas'] / summary['segundos'] if summary['segundos'] else 0
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva desde CSV")
+    parser.add_argument('entidad', choices=sorted(ENTITIES))
+    parser.add_argument('archivo', help="CSV con encabezados")
+    parser.add_argument('--lote', type=int, default=5000, help="Filas por lote")
+    parser.add_argument('--rechazos', help="CSV de rechazos (por defecto <archivo>.rechazos.csv)")
+    parser.add_argument('--actualizar', action='store_true', help="Actualizar los registros existentes (upsert por email)")
+    parser.add_argument('--conservar', nargs='*', default=[], help="Con --actualizar: columnas que no se sobrescriben")
+    parser.add_argument('--completar', nargs='*', default=[], help="Con --actualizar: columnas que solo se llenan si están vacías")
+    args = parser.parse_args()
+
+    policy = dict({column: 'keep' for column in args.conservar}, **{column: 'if_null' for column in args.completar})
+    summary = BulkImporter(args.entidad, args.lote, args.rechazos, args.actualizar, policy).run(args.archivo)
+    print(f"✅ {summary['insertadas']} de {summary['leidas']} filas importadas "
+          f"en {summary['segundos']:.2f} s ({summary['filas_por_segundo']:,.0f} filas/s)")
+    if args.actualizar:
+        print(f"   {summary['actualizadas']} actualizadas, {summary['sin_cambios']} sin cambios")
+    if summary['rechazadas']:
+        print(f"⚠️  {summary['rechazadas']} filas rechazadas: {summary['rechazos']}")
+
+
+if __name__ == "__main__":
+    main()
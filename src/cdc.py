@@ -0,0 +1,229 @@
+'''
+Change-data-capture sobre auditoria_cambios.
+
+Un consumidor (caché, índice de búsqueda, exportación) lee la auditoría a
+partir de su último offset confirmado, en lotes:
+
+    tailer = AuditTailer('indice_busqueda', tablas=['estudiante'])
+    for batch in tailer.batches():
+        actualizar_indice(batch)     # el offset se confirma al pedir el siguiente lote
+
+Entrega al menos una vez: el offset solo avanza después de procesar el lote,
+así que si el consumidor falla a mitad de un lote, ese lote se vuelve a
+entregar al reiniciar. Los consumidores deben ser idempotentes.
+
+Orden y offset: en PostgreSQL cada fila guarda la transacción que la
+escribió (auditoria_cambios.transaccion) y solo se entregan filas de
+transacciones anteriores al xmin de la instantánea del servidor, es decir,
+ya terminadas: sus filas son todas visibles y ninguna puede aparecer
+después. Se entregan en orden (transaccion, id) y el offset es ese par. Una
+transacción larga retiene las posteriores hasta que termina, en lugar de
+perder sus filas. En SQLite (un solo escritor) el orden es por id y un
+hueco en la secuencia se da por definitivo pasado gap_timeout.
+
+En PostgreSQL el consumidor espera con LISTEN auditoria_cambios (ver
+trigger_notificar_auditoria en schema.sql) en lugar de consultar en ciclo.
+'''
+
+from models import session, engine, AuditLog, CdcOffset
+from sqlalchemy import func, tuple_
+from datetime import datetime
+import argparse
+import select
+import time
+
+AUDIT_COLUMNS = (
+    AuditLog.id, AuditLog.tabla_afectada, AuditLog.id_registro, AuditLog.tipo_operacion,
+    AuditLog.fecha, AuditLog.usuario, AuditLog.valores_anteriores, AuditLog.valores_nuevos, AuditLog.transaccion
+)
+NOTIFY_CHANNEL = 'auditoria_cambios'
+
+
+class AuditTailer:
+    def __init__(self, consumer: str, batch_size: int = 500, tablas=None, poll_interval: float = 1.0,
+                 gap_timeout: float = 30.0, listen: bool = True):
+        if batch_size < 1:
+            raise ValueError("batch_size debe ser mayor a 0")
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.tablas = set(tablas) if tablas else None
+        self.poll_interval = poll_interval
+        self.gap_timeout = gap_timeout
+        self.is_postgres = engine.dialect.name == 'postgresql'
+        self.listen = listen and self.is_postgres
+        self._listener = None
+        self.offset = self.load_offset()
+
+    # --- Offsets ---
+
+    def load_offset(self) -> int:
+        checkpoint = session.get(CdcOffset, self.consumer)
+        offset = checkpoint.ultimo_id if checkpoint else 0
+        self.transaction = checkpoint.ultima_transaccion if checkpoint else 0
+        session.commit()
+        return offset
+
+    def commit_offset(self, last_id: int, last_transaction: int = 0):
+        """Confirmar que todo hasta (last_transaction, last_id) inclusive fue procesado"""
+        try:
+            checkpoint = session.get(CdcOffset, self.consumer)
+            if checkpoint is None:
+                checkpoint = CdcOffset(consumidor=self.consumer, ultimo_id=last_id,
+                                       ultima_transaccion=last_transaction)
+                session.add(checkpoint)
+            elif (last_transaction, last_id) > (checkpoint.ultima_transaccion, checkpoint.ultimo_id):
+                checkpoint.ultimo_id = last_id
+                checkpoint.ultima_transaccion = last_transaction
+            session.commit()
+            self.transaction, self.offset = max((self.transaction, self.offset), (last_transaction, last_id))
+        except Exception as e:
+            session.rollback()
+            raise ValueError(f"Error guardando offset CDC: {str(e)}")
+
+    def reset_offset(self, last_id: int = 0):
+        """Reposicionar el consumidor justo después de la fila last_id (0: desde el principio).
+
+        En PostgreSQL, si last_id ya no existe se vuelve a empezar desde el
+        principio (la entrega es al menos una vez).
+        """
+        last_transaction = 0
+        if self.is_postgres and last_id:
+            last_transaction = session.query(AuditLog.transaccion).filter(AuditLog.id == last_id).scalar() or 0
+        checkpoint = session.get(CdcOffset, self.consumer)
+        if checkpoint is None:
+            session.add(CdcOffset(consumidor=self.consumer, ultimo_id=last_id, ultima_transaccion=last_transaction))
+        else:
+            checkpoint.ultimo_id = last_id
+            checkpoint.ultima_transaccion = last_transaction
+        session.commit()
+        self.offset, self.transaction = last_id, last_transaction
+
+    # --- Lectura ---
+
+    def fetch_batch(self):
+        """Leer el siguiente lote después del offset actual.
+
+        Retorna (filas, (transacción, id) de la última fila leída). Las filas
+        de tablas no seleccionadas se omiten pero igual cuentan para avanzar
+        el offset.
+        """
+        if self.is_postgres:
+            return self._fetch_finished()
+        return self._fetch_by_id()
+
+    def _fetch_finished(self):
+        """PostgreSQL: filas de transacciones terminadas, en orden (transaccion, id)"""
+        watermark = func.txid_snapshot_xmin(func.txid_current_snapshot())
+        rows = session.query(*AUDIT_COLUMNS)\
+            .filter(tuple_(AuditLog.transaccion, AuditLog.id) > tuple_(self.transaction, self.offset),
+                    AuditLog.transaccion < watermark)\
+            .order_by(AuditLog.transaccion, AuditLog.id)\
+            .limit(self.batch_size).all()
+        session.commit()
+        position = (rows[-1].transaccion, rows[-1].id) if rows else (self.transaction, self.offset)
+        return [row for row in rows if self.tablas is None or row.tabla_afectada in self.tablas], position
+
+    def _fetch_by_id(self):
+        """SQLite: en orden de id.
+
+        Un id puede hacerse visible después que ids mayores. Si aparece un
+        hueco en la secuencia y la fila posterior es reciente, el lote se
+        corta antes del hueco y se reintenta en la próxima lectura; pasado
+        gap_timeout el hueco se da por definitivo (rollback).
+        """
+        rows = session.query(*AUDIT_COLUMNS)\
+            .filter(AuditLog.id > self.offset)\
+            .order_by(AuditLog.id)\
+            .limit(self.batch_size).all()
+        # Cerrar la transacción: en SQLite la lectura mantiene una instantánea
+        session.commit()
+
+        batch = []
+        last_id = self.offset
+        now = datetime.now()
+        for row in rows:
+            if row.id != last_id + 1 and (now - row.fecha).total_seconds() < self.gap_timeout:
+                break
+            last_id = row.id
+            if self.tablas is None or row.tabla_afectada in self.tablas:
+                batch.append(row)
+        return batch, (self.transaction, last_id)
+
+    def _wait(self):
+        if not self.listen:
+            time.sleep(self.poll_interval)
+            return
+
+        if self._listener is None:
+            # Conexión dedicada fuera del pool, en autocommit, solo para LISTEN
+            proxied = engine.raw_connection()
+            proxied.detach()
+            self._listener = proxied.dbapi_connection
+            self._listener.autocommit = True
+            cursor = self._listener.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            cursor.close()
+
+        # El timeout cubre NOTIFY perdidos, los huecos pendientes de gap_timeout
+        # y las filas retenidas por transacciones aún abiertas
+        if select.select([self._listener], [], [], self.poll_interval)[0]:
+            self._listener.poll()
+            self._listener.notifies.clear()
+
+    def batches(self, stop_when_idle: bool = False):
+        """Generador de lotes no vacíos.
+
+        Pedir el siguiente lote confirma el offset del lote anterior. Con
+        stop_when_idle=True termina cuando ya no hay cambios pendientes.
+        """
+        try:
+            while True:
+                batch, (last_transaction, last_id) = self.fetch_batch()
+                if batch:
+                    yield batch
+                if (last_transaction, last_id) > (self.transaction, self.offset):
+                    self.commit_offset(last_id, last_transaction)
+                    continue
+                if stop_when_idle:
+                    return
+                self._wait()
+        finally:
+            self.close()
+
+    def run(self, handler, stop_when_idle: bool = False):
+        """Procesar lotes con handler(batch) hasta interrumpir. Retorna filas entregadas."""
+        delivered = 0
+        for batch in self.batches(stop_when_idle=stop_when_idle):
+            handler(batch)
+            delivered += len(batch)
+        return delivered
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seguir los cambios de auditoria_cambios")
+    parser.add_argument('consumidor', help="Nombre del consumidor (llave del offset)")
+    parser.add_argument('--tabla', action='append', help="Filtrar por tabla afectada (repetible)")
+    parser.add_argument('--lote', type=int, default=500)
+    parser.add_argument('--una-vez', action='store_true', help="Terminar al alcanzar el final")
+    args = parser.parse_args()
+
+    def print_batch(batch):
+        for row in batch:
+            print(f"{row.id:>10} {row.fecha:%Y-%m-%d %H:%M:%S} {row.tipo_operacion:<7} "
+                  f"{row.tabla_afectada}#{row.id_registro}")
+
+    tailer = AuditTailer(args.consumidor, batch_size=args.lote, tablas=args.tabla)
+    try:
+        total = tailer.run(print_batch, stop_when_idle=args.una_vez)
+        print(f"✅ {total} cambios entregados. Offset: {tailer.offset}")
+    except KeyboardInterrupt:
+        print(f"\nDetenido. Offset confirmado: {tailer.offset}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+'''
+Cierre de periodo: calificaciones, estados de matrícula y resumen académico.
+
+    python closeout.py --anio 2025 --semestre "Segundo Semestre"
+    python closeout.py --anio 2025 --semestre "Segundo Semestre" --estado
+    python closeout.py ... --detener-tras 10      # cerrar solo 10 cursos (prueba de reanudación)
+
+Pasos, cada uno en su propia transacción junto con el avance en
+cierre_periodo, así que volver a ejecutar un cierre interrumpido sigue donde
+quedó:
+
+    calificaciones  un UPDATE por curso con evaluaciones (GradeCRUD._close),
+                    en orden de id; el avance guarda el último curso cerrado
+    estados         un UPDATE para todo el periodo: Activa -> Finalizada, con
+                    'NP' donde no hay calificación; cancela la lista de espera
+    agregados       recalcula resumen_academico (créditos y promedio) de los
+                    estudiantes del periodo por conjuntos
+
+Las calificaciones de cursos sin evaluaciones se cargan antes con
+crud.grades.apply_grades (un UPDATE por curso).
+'''
+
+from models import session, Enrollment, Course, Evaluation, WaitlistEntry, AcademicSummary, PeriodCloseout, academic_period_range
+from cruds import BaseCRUD, GradeCRUD, WaitlistCRUD
+from prerequisites import PASSING_GRADES
+from sqlalchemy import select, func, case, literal, insert, update, delete
+from datetime import datetime
+import argparse
+import time
+
+
+class SemesterCloseout:
+    STEPS = ('calificaciones', 'estados', 'agregados', 'terminado')
+    GRADE_POINTS = {'A': 4, 'B': 3, 'C': 2, 'D': 1}  # F y NP valen 0
+
+    def __init__(self, anio_academico: int, semestre: str):
+        self.anio_academico = anio_academico
+        self.semestre = semestre
+        self.key = (anio_academico, semestre)
+
+    def _checkpoint(self, db, **values):
+        table = PeriodCloseout.__table__
+        db.execute(update(table).where(table.c.anio_academico == self.anio_academico,
+                                       table.c.semestre == self.semestre)
+                   .values(actualizado=datetime.now(), **values))
+
+    def _begin(self, db, restart: bool):
+        state = db.get(PeriodCloseout, self.key)
+        if state is None:
+            db.add(PeriodCloseout(anio_academico=self.anio_academico, semestre=self.semestre))
+        elif restart:
+            self._checkpoint(db, paso=self.STEPS[0], ultimo_curso_id=0, cursos_cerrados=0,
+                             iniciado=datetime.now(), terminado=None)
+
+    def status(self):
+        """Avance del cierre como diccionario (None si no se ha iniciado)"""
+        state = session.get(PeriodCloseout, self.key)
+        result = None if state is None else {
+            'paso': state.paso, 'cursos_cerrados': state.cursos_cerrados, 'ultimo_curso_id': state.ultimo_curso_id,
+            'iniciado': state.iniciado, 'terminado': state.terminado}
+        session.commit()
+        return result
+
+    # --- Pasos ---
+
+    def _pending_courses(self):
+        """Cursos con evaluaciones en el periodo que faltan por cerrar, en orden de id"""
+        start, end = academic_period_range(self.anio_academico, self.semestre)
+        last = session.get(PeriodCloseout, self.key).ultimo_curso_id
+        course_ids = session.execute(select(Evaluation.curso_id).where(
+            Evaluation.fecha >= start, Evaluation.fecha < end, Evaluation.curso_id > last
+        ).distinct().order_by(Evaluation.curso_id)).scalars().all()
+        session.commit()
+        return course_ids
+
+    def _grade_course(self, db, curso_id: int):
+        GradeCRUD._close(db, self.anio_academico, self.semestre, curso_id)
+        table = PeriodCloseout.__table__
+        self._checkpoint(db, ultimo_curso_id=curso_id, cursos_cerrados=table.c.cursos_cerrados + 1)
+
+    def _finish_grades(self, db):
+        self._checkpoint(db, paso='estados')
+
+    def _transition(self, db):
+        matricula = Enrollment.__table__
+        finalized = db.execute(update(matricula).where(
+            matricula.c.anio_academico == self.anio_academico, matricula.c.semestre == self.semestre,
+            matricula.c.estado == 'Activa'
+        ).values(estado='Finalizada',
+                 calificacion=func.coalesce(matricula.c.calificacion, GradeCRUD._as_grade(literal('NP'))))).rowcount
+        WaitlistCRUD._close(db, 'Cancelado', WaitlistEntry.anio_academico == self.anio_academico,
+                            WaitlistEntry.semestre == self.semestre)
+        self._checkpoint(db, paso='agregados')
+        return finalized
+
+    def _aggregate(self, db):
+        """Recalcular resumen_academico de los estudiantes con matrícula en el periodo"""
+        students = select(Enrollment.estudiante_id).where(
+            Enrollment.anio_academico == self.anio_academico, Enrollment.semestre == self.semestre).distinct()
+        points = case(*[(Enrollment.calificacion == grade, value) for grade, value in self.GRADE_POINTS.items()],
+                      else_=0)
+        # Por curso: intentos, puntos de todos los intentos y si se aprobó alguna vez
+        per_course = select(
+            Enrollment.estudiante_id, Course.creditos, func.count().label('intentos'),
+            func.sum(points * Course.creditos).label('puntos'),
+            func.max(case((Enrollment.calificacion.in_(PASSING_GRADES), 1), else_=0)).label('aprobado'),
+        ).join(Course, Course.id == Enrollment.curso_id).where(
+            Enrollment.estado == 'Finalizada', Enrollment.estudiante_id.in_(students)
+        ).group_by(Enrollment.estudiante_id, Enrollment.curso_id, Course.creditos).subquery()
+        attempted = func.sum(per_course.c.intentos * per_course.c.creditos)
+        rows = select(
+            per_course.c.estudiante_id, func.sum(per_course.c.intentos), attempted,
+            func.sum(per_course.c.aprobado * per_course.c.creditos),
+            func.round(func.sum(per_course.c.puntos) * 1.0 / func.nullif(attempted, 0), 2), literal(datetime.now())
+        ).group_by(per_course.c.estudiante_id)
+        summary = AcademicSummary.__table__
+        db.execute(delete(summary).where(summary.c.estudiante_id.in_(students)))
+        written = db.execute(insert(summary).from_select(
+            ['estudiante_id', 'cursos_finalizados', 'creditos_cursados', 'creditos_aprobados', 'promedio',
+             'actualizado'], rows
+        )).rowcount
+        self._checkpoint(db, paso='terminado', terminado=datetime.now())
+        return written
+
+    # --- Ejecución ---
+
+    def run(self, max_courses: int = None, restart: bool = False):
+        """Ejecutar (o reanudar) el cierre. Con max_courses se detiene tras cerrar esa cantidad de cursos.
+
+        Retorna el resultado de esta ejecución y el paso en que quedó.
+        """
+        BaseCRUD.write(self._begin, restart)
+        result = {'cursos': 0, 'finalizadas': 0, 'estudiantes': 0}
+        state = self.status()
+
+        if state['paso'] == 'calificaciones':
+            for curso_id in self._pending_courses():
+                if max_courses is not None and result['cursos'] >= max_courses:
+                    return dict(result, paso='calificaciones')
+                BaseCRUD.write(self._grade_course, curso_id)
+                result['cursos'] += 1
+            BaseCRUD.write(self._finish_grades)
+            state['paso'] = 'estados'
+
+        if state['paso'] == 'estados':
+            result['finalizadas'] = BaseCRUD.write(self._transition)
+            state['paso'] = 'agregados'
+
+        if state['paso'] == 'agregados':
+            result['estudiantes'] = BaseCRUD.write(self._aggregate)
+
+        return dict(result, paso='terminado')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cierre de periodo académico")
+    parser.add_argument('--anio', type=int, required=True)
+    parser.add_argument('--semestre', required=True)
+    parser.add_argument('--detener-tras', type=int, metavar='CURSOS', help="Detenerse tras cerrar estos cursos")
+    parser.add_argument('--reiniciar', action='store_true', help="Empezar de nuevo aunque haya un cierre previo")
+    parser.add_argument('--estado', action='store_true', help="Solo mostrar el avance del cierre")
+    args = parser.parse_args()
+
+    closeout = SemesterCloseout(args.anio, args.semestre)
+    if args.estado:
+        print(closeout.status() or "Sin cierre iniciado")
+        return
+
+    start = time.perf_counter()
+    result = closeout.run(args.detener_tras, args.reiniciar)
+    print(f"📘 Cierre {args.semestre} {args.anio} en {time.perf_counter() - start:.2f} s: "
+          f"{result['cursos']} cursos calificados, {result['finalizadas']} matrículas finalizadas, "
+          f"{result['estudiantes']} resúmenes académicos")
+    print("✅ Terminado" if result['paso'] == 'terminado'
+          else f"⏸️  Detenido en '{result['paso']}': ejecute de nuevo para continuar")
+
+
+if __name__ == "__main__":
+    main()
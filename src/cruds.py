@@ -1,13 +1,40 @@
-from models import session, Faculty, Department, Major, Student, Professor, Course, Enrollment, Base
-from sqlalchemy import Column, Integer, String
+from models import session, Faculty, Department, Major, Student, Professor, Course, Enrollment, AuditLog, CourseSeat, WaitlistEntry, Attendance, AttendanceSummary, Evaluation, EvaluationScore, Book, BookLoan, Payment, Scholarship, LedgerEntry, AccountBalance, BillingRun, CourseAssignment, Base, current_academic_period, academic_period_range
+from sqlalchemy import Column, Integer, String, Date, bindparam, tuple_, select, lambda_stmt, func, or_, and_, case, insert, update, delete, literal
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import column as sql_column
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from collections import namedtuple
 import logging
+from replicas import read_session, run_on_replica, stream_on_replica
+from single_writer import sqlite_writer
+from prerequisites import prerequisite_graph
+from professor_workload import professor_workload
+from degree_audit import DegreeAudit
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sentencias cacheadas: lambda_stmt guarda la construcción y el SQL compilado
+# de cada forma de consulta la primera vez que se ejecuta; las llamadas
+# siguientes solo sustituyen los parámetros (las variables del closure).
+def _by_id_statement(model, record_id):
+    return lambda_stmt(lambda: select(model).where(model.id == record_id), track_on=[model])
+
+# Registros de solo lectura para listados: tuplas con nombre, sin identity map,
+# instrumentación de atributos ni relaciones perezosas
+StudentRecord = namedtuple('StudentRecord', ['id', 'nombre', 'apellido', 'email', 'carrera_id', 'carrera', 'estado'])
+ProfessorRecord = namedtuple('ProfessorRecord', ['id', 'nombre', 'apellido', 'email', 'departamento_id', 'departamento', 'activo'])
+CourseRecord = namedtuple('CourseRecord', ['id', 'codigo', 'nombre', 'creditos', 'carrera_id', 'carrera'])
+AttendanceRecord = namedtuple('AttendanceRecord', ['estudiante_id', 'nombre', 'apellido', 'curso_id', 'codigo',
+                                                   'sesiones', 'presentes', 'justificadas', 'racha_ausencias', 'tasa'])
+GradeRecord = namedtuple('GradeRecord', ['estudiante_id', 'nombre', 'apellido', 'nota_final', 'evaluaciones_con_nota', 'calificacion'])
+OverdueLoanRecord = namedtuple('OverdueLoanRecord', ['prestamo_id', 'libro_id', 'titulo', 'estudiante_id', 'nombre', 'apellido', 'email',
+                                                     'fecha_prestamo', 'fecha_devolucion', 'dias_atraso', 'multa'])
+DebtorRecord = namedtuple('DebtorRecord', ['estudiante_id', 'nombre', 'apellido', 'email', 'saldo', 'pendiente_desde', 'dias_atraso'])
+
 class BaseCRUD:
     @staticmethod
     def handle_error(e: Exception, message: str = "Database error"):
@@ -15,6 +42,43 @@ class BaseCRUD:
         session.rollback()
         raise ValueError(f"{message}: {str(e)}")
 
+    @staticmethod
+    def write(operation, *args):
+        """Ejecutar operation(db, *args) en una transacción y confirmarla.
+
+        En SQLite va al escritor único (single_writer), que agrupa las
+        escrituras concurrentes en un solo commit; si no, usa la sesión.
+        """
+        if sqlite_writer is not None:
+            session.commit()  # confirmar lo pendiente: el escritor usa otra conexión
+            return sqlite_writer.submit(operation, *args)
+        result = operation(session, *args)
+        session.commit()
+        return result
+
+    @staticmethod
+    def get_by_id(model, record_id: int):
+        """Buscar por id con la sentencia cacheada del modelo"""
+        return session.execute(_by_id_statement(model, record_id)).scalars().first()
+
+    @staticmethod
+    def fetch_all(statement):
+        return session.execute(statement).scalars().all()
+
+    @staticmethod
+    def fetch_records(statement, record_type, batch_size: int = None):
+        """Filas de una consulta de columnas como record_type.
+
+        Sin batch_size retorna una lista; con batch_size retorna un generador
+        que lee del cursor en lotes, para recorrer resultados grandes sin
+        tenerlos todos en memoria. Se leen con read_session (réplica de
+        lectura si hay); los get_* siguen en el primario para ver las
+        escrituras recién confirmadas.
+        """
+        if batch_size:
+            return (record_type._make(row) for row in stream_on_replica(statement, batch_size))
+        return run_on_replica(lambda: list(map(record_type._make, read_session.execute(statement).tuples())))
+
 # Agregar clase para mapear vistas
 class FacultyDetailView(Base):
     __tablename__ = 'vista_facultades_detalladas'
@@ -51,21 +115,21 @@ class FacultyCRUD(BaseCRUD):
     @staticmethod
     def list_faculties():
         try:
-            return session.query(Faculty).order_by(Faculty.nombre).all()
+            return BaseCRUD.fetch_all(lambda_stmt(lambda: select(Faculty).order_by(Faculty.nombre)))
         except Exception as e:
             BaseCRUD.handle_error(e, "Error listing faculties")
 
     @staticmethod
     def get_faculty(faculty_id: int):
         try:
-            return session.query(Faculty).filter(Faculty.id == faculty_id).first()
+            return BaseCRUD.get_by_id(Faculty, faculty_id)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error getting faculty")
 
     @staticmethod
     def update_faculty(faculty_id: int, **kwargs):
         try:
-            faculty = session.query(Faculty).filter(Faculty.id == faculty_id).first()
+            faculty = BaseCRUD.get_by_id(Faculty, faculty_id)
             if not faculty:
                 raise ValueError("Faculty not found")
             
@@ -81,7 +145,7 @@ class FacultyCRUD(BaseCRUD):
     @staticmethod
     def delete_faculty(faculty_id: int):
         try:
-            faculty = session.query(Faculty).filter(Faculty.id == faculty_id).first()
+            faculty = BaseCRUD.get_by_id(Faculty, faculty_id)
             if not faculty:
                 raise ValueError("Faculty not found")
             
@@ -95,7 +159,9 @@ class FacultyCRUD(BaseCRUD):
     def list_faculties_detailed():
         """Usar vista para mostrar listado con estadísticas"""
         try:
-            return session.query(FacultyDetailView).order_by(FacultyDetailView.nombre).all()
+            return BaseCRUD.fetch_all(lambda_stmt(
+                lambda: select(FacultyDetailView).order_by(FacultyDetailView.nombre)
+            ))
         except Exception as e:
             BaseCRUD.handle_error(e, "Error listing detailed faculties")
 
@@ -126,21 +192,45 @@ class StudentCRUD(BaseCRUD):
     @staticmethod
     def list_students():
         try:
-            return session.query(Student).join(Major, Student.carrera_id == Major.id, isouter=True).order_by(Student.apellido, Student.nombre).all()
+            return BaseCRUD.fetch_all(lambda_stmt(
+                lambda: select(Student).join(Major, Student.carrera_id == Major.id, isouter=True)
+                .order_by(Student.apellido, Student.nombre)
+            ))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing students")
+
+    @staticmethod
+    def list_student_records(batch_size: int = None):
+        """Listado de estudiantes como StudentRecord (ver BaseCRUD.fetch_records)"""
+        try:
+            return BaseCRUD.fetch_records(lambda_stmt(
+                lambda: select(Student.id, Student.nombre, Student.apellido, Student.email,
+                               Student.carrera_id, Major.nombre, Student.estado)
+                .join(Major, Student.carrera_id == Major.id, isouter=True)
+                .order_by(Student.apellido, Student.nombre)
+            ), StudentRecord, batch_size)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error listing students")
 
     @staticmethod
     def get_student(student_id: int):
         try:
-            return session.query(Student).filter(Student.id == student_id).first()
+            return BaseCRUD.get_by_id(Student, student_id)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error getting student")
 
+    @staticmethod
+    def get_degree_audit(student_id: int):
+        """Avance de carrera del estudiante (DegreeAuditRecord, ver degree_audit.py)"""
+        try:
+            return DegreeAudit().audit_student(student_id)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error auditing student")
+
     @staticmethod
     def update_student(student_id: int, **kwargs):
         try:
-            student = session.query(Student).filter(Student.id == student_id).first()
+            student = BaseCRUD.get_by_id(Student, student_id)
             if not student:
                 raise ValueError("Student not found")
             
@@ -156,7 +246,7 @@ class StudentCRUD(BaseCRUD):
     @staticmethod
     def delete_student(student_id: int):
         try:
-            student = session.query(Student).filter(Student.id == student_id).first()
+            student = BaseCRUD.get_by_id(Student, student_id)
             if not student:
                 raise ValueError("Student not found")
             
@@ -183,6 +273,7 @@ class ProfessorCRUD(BaseCRUD):
             session.add(professor)
             session.commit()
             session.refresh(professor)
+            professor_workload.invalidate()
             return professor
         except IntegrityError as e:
             session.rollback()
@@ -193,14 +284,29 @@ class ProfessorCRUD(BaseCRUD):
     @staticmethod
     def list_professors():
         try:
-            return session.query(Professor).join(Department).order_by(Professor.apellido, Professor.nombre).all()
+            return BaseCRUD.fetch_all(lambda_stmt(
+                lambda: select(Professor).join(Department).order_by(Professor.apellido, Professor.nombre)
+            ))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing professors")
+
+    @staticmethod
+    def list_professor_records(batch_size: int = None):
+        """Listado de profesores como ProfessorRecord (ver BaseCRUD.fetch_records)"""
+        try:
+            return BaseCRUD.fetch_records(lambda_stmt(
+                lambda: select(Professor.id, Professor.nombre, Professor.apellido, Professor.email,
+                               Professor.departamento_id, Department.nombre, Professor.activo)
+                .join(Department, Professor.departamento_id == Department.id)
+                .order_by(Professor.apellido, Professor.nombre)
+            ), ProfessorRecord, batch_size)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error listing professors")
 
     @staticmethod
     def get_professor(professor_id: int):
         try:
-            return session.query(Professor).filter(Professor.id == professor_id).first()
+            return BaseCRUD.get_by_id(Professor, professor_id)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error getting professor")
 
@@ -209,6 +315,7 @@ class CourseCRUD(BaseCRUD):
     def create_course(codigo: str, nombre: str, creditos: int, carrera_id: int, 
                      descripcion: str = None, prerequisito_id: int = None, departamento_id: int = None):
         try:
+            prerequisite_graph.validate_prerequisite(None, prerequisito_id)
             course = Course(
                 codigo=codigo,
                 nombre=nombre,
@@ -221,6 +328,7 @@ class CourseCRUD(BaseCRUD):
             session.add(course)
             session.commit()
             session.refresh(course)
+            prerequisite_graph.add_course(course.id, course.codigo, prerequisito_id)
             return course
         except IntegrityError as e:
             session.rollback()
@@ -228,42 +336,1541 @@ class CourseCRUD(BaseCRUD):
         except Exception as e:
             BaseCRUD.handle_error(e, "Error creating course")
 
+    @staticmethod
+    def set_prerequisite(course_id: int, prerequisito_id: int = None):
+        """Cambiar (o quitar, con None) el prerrequisito directo de un curso.
+
+        Se valida contra el grafo en memoria (ciclos) antes de escribir.
+        """
+        try:
+            prerequisite_graph.validate_prerequisite(course_id, prerequisito_id)
+            course = BaseCRUD.get_by_id(Course, course_id)
+            if not course:
+                raise ValueError("Course not found")
+            course.prerequisito_id = prerequisito_id
+            session.commit()
+            prerequisite_graph.set_prerequisite(course_id, prerequisito_id)
+            return course
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error setting prerequisite")
+
+    @staticmethod
+    def assign_professor(course_id: int, professor_id: int, semester: str, is_coordinator: bool = False):
+        """Asignar un profesor a un curso en un semestre (invalida la caché de carga docente)"""
+        try:
+            assignment = CourseAssignment(profesor_id=professor_id, curso_id=course_id, semestre=semester,
+                                          es_coordinador=is_coordinator)
+            session.add(assignment)
+            session.commit()
+            professor_workload.invalidate()
+            return assignment
+        except IntegrityError as e:
+            session.rollback()
+            raise ValueError("Professor already assigned to this course in this semester")
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error assigning professor")
+
+    @staticmethod
+    def check_prerequisites(requests):
+        """Prerrequisitos faltantes (códigos) por cada (estudiante_id, curso_id).
+
+        Para validar lotes de solicitudes de matrícula; ver prerequisites.py.
+        """
+        try:
+            return [prerequisite_graph.codes_of(missing) for missing in prerequisite_graph.check_many(requests)]
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error checking prerequisites")
+
     @staticmethod
     def list_courses():
         try:
-            return session.query(Course).join(Major).order_by(Course.codigo).all()
+            return BaseCRUD.fetch_all(lambda_stmt(
+                lambda: select(Course).join(Major).order_by(Course.codigo)
+            ))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing courses")
+
+    @staticmethod
+    def list_course_records(batch_size: int = None):
+        """Listado de cursos como CourseRecord (ver BaseCRUD.fetch_records)"""
+        try:
+            return BaseCRUD.fetch_records(lambda_stmt(
+                lambda: select(Course.id, Course.codigo, Course.nombre, Course.creditos,
+                               Course.carrera_id, Major.nombre)
+                .join(Major, Course.carrera_id == Major.id)
+                .order_by(Course.codigo)
+            ), CourseRecord, batch_size)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error listing courses")
 
     @staticmethod
     def get_course(course_id: int):
         try:
-            return session.query(Course).filter(Course.id == course_id).first()
+            return BaseCRUD.get_by_id(Course, course_id)
         except Exception as e:
             BaseCRUD.handle_error(e, "Error getting course")
 
-class EnrollmentCRUD(BaseCRUD):
+class SeatCRUD(BaseCRUD):
+    """Cupos por (curso, año, semestre) en cupo_curso.
+
+    Reservar es un UPDATE condicional de una franja con cupo: O(1), sin contar
+    matrícula, y atómico porque la fila queda bloqueada hasta el commit. En
+    PostgreSQL la franja se elige con FOR UPDATE SKIP LOCKED, así que las
+    reservas simultáneas del mismo curso no esperan entre sí mientras haya
+    franjas libres. Un curso sin filas en cupo_curso para el periodo no tiene
+    límite.
+    """
+
+    @staticmethod
+    def _period(model, curso_id, anio_academico, semestre):
+        return (model.curso_id == curso_id, model.anio_academico == anio_academico, model.semestre == semestre)
+
+    @staticmethod
+    def _move_seat(db, curso_id: int, anio_academico: int, semestre: str, delta: int) -> bool:
+        """Sumar `delta` a ocupados en una franja donde quepa. True si se pudo"""
+        table = CourseSeat.__table__
+        condition = table.c.ocupados < table.c.capacidad if delta > 0 else table.c.ocupados > 0
+        for skip_locked in (True, False):
+            # Primero una franja que nadie tenga bloqueada; si todas lo están,
+            # esperar por una (el WHERE se reevalúa al obtener el lock)
+            free = select(table.c.franja).where(
+                *SeatCRUD._period(table.c, curso_id, anio_academico, semestre), condition
+            ).order_by(table.c.franja if delta > 0 else table.c.franja.desc()).limit(1)\
+             .with_for_update(skip_locked=skip_locked).scalar_subquery()
+            result = db.execute(
+                update(table)
+                .where(*SeatCRUD._period(table.c, curso_id, anio_academico, semestre), table.c.franja == free, condition)
+                .values(ocupados=table.c.ocupados + delta)
+            )
+            if result.rowcount:
+                return True
+            if db.get_bind().dialect.name != 'postgresql':
+                break  # sin SKIP LOCKED el primer intento ya vio todas las franjas
+        return False
+
     @staticmethod
-    def enroll_student(estudiante_id: int, curso_id: int, semestre: str):
+    def reserve(db, curso_id: int, anio_academico: int, semestre: str) -> bool:
+        """Tomar un cupo dentro de la transacción de `db`. False si el curso está lleno"""
+        if SeatCRUD._move_seat(db, curso_id, anio_academico, semestre, 1):
+            return True
+        limited = db.execute(
+            select(literal(1)).where(*SeatCRUD._period(CourseSeat, curso_id, anio_academico, semestre)).limit(1)
+        ).first()
+        return limited is None
+
+    @staticmethod
+    def release(db, curso_id: int, anio_academico: int, semestre: str) -> bool:
+        """Devolver un cupo dentro de la transacción de `db`"""
+        return SeatCRUD._move_seat(db, curso_id, anio_academico, semestre, -1)
+
+    @staticmethod
+    def set_capacity(curso_id: int, anio_academico: int, semestre: str, capacidad: int, franjas: int = 1):
+        """Definir la capacidad del curso en el periodo, repartida en `franjas`.
+
+        Usar varias franjas en cursos muy demandados. Los ocupados actuales se
+        recalculan desde matricula y se reparten entre las franjas.
+        """
         try:
-            enrollment = Enrollment(
-                estudiante_id=estudiante_id,
-                curso_id=curso_id,
-                semestre=semestre
+            if franjas < 1 or capacidad < 0:
+                raise ValueError("Capacity must be >= 0 and stripes >= 1")
+            taken = session.execute(select(func.count()).where(
+                *SeatCRUD._period(Enrollment, curso_id, anio_academico, semestre), Enrollment.estado == 'Activa'
+            )).scalar()
+            if taken > capacidad:
+                raise ValueError(f"Course already has {taken} active enrollments")
+            session.query(CourseSeat).filter(
+                *SeatCRUD._period(CourseSeat, curso_id, anio_academico, semestre)
+            ).delete(synchronize_session=False)
+            for stripe in range(franjas):
+                stripe_capacity = capacidad // franjas + (1 if stripe < capacidad % franjas else 0)
+                stripe_taken = min(stripe_capacity, taken)
+                taken -= stripe_taken
+                session.add(CourseSeat(curso_id=curso_id, anio_academico=anio_academico, semestre=semestre,
+                                       franja=stripe, capacidad=stripe_capacity, ocupados=stripe_taken))
+            session.flush()
+            WaitlistCRUD.promote(session, curso_id, anio_academico, semestre)
+            session.commit()
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error setting course capacity")
+
+    @staticmethod
+    def open_period(anio_academico: int, semestre: str, capacidad: int):
+        """Crear cupos de una franja para todos los cursos que aún no tienen en el periodo.
+
+        Un INSERT ... SELECT que toma los ocupados de las matrículas activas.
+        """
+        try:
+            active = select(Enrollment.curso_id, func.count().label('ocupados')).where(
+                Enrollment.anio_academico == anio_academico, Enrollment.semestre == semestre,
+                Enrollment.estado == 'Activa'
+            ).group_by(Enrollment.curso_id).subquery()
+            existing = select(CourseSeat.curso_id).where(
+                CourseSeat.anio_academico == anio_academico, CourseSeat.semestre == semestre
             )
-            session.add(enrollment)
+            rows = select(
+                Course.id, literal(anio_academico), literal(semestre), literal(0),
+                func.max(literal(capacidad), func.coalesce(active.c.ocupados, 0))
+                if session.get_bind().dialect.name == 'sqlite'
+                else func.greatest(literal(capacidad), func.coalesce(active.c.ocupados, 0)),
+                func.coalesce(active.c.ocupados, 0)
+            ).outerjoin(active, active.c.curso_id == Course.id).where(Course.id.not_in(existing))
+            result = session.execute(insert(CourseSeat.__table__).from_select(
+                ['curso_id', 'anio_academico', 'semestre', 'franja', 'capacidad', 'ocupados'], rows
+            ))
             session.commit()
-            return enrollment
+            return result.rowcount
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error opening period seats")
+
+    @staticmethod
+    def available(curso_id: int, anio_academico: int, semestre: str):
+        """Cupos libres (None si el curso no tiene límite en el periodo)"""
+        row = session.execute(select(
+            func.count(), func.sum(CourseSeat.capacidad - CourseSeat.ocupados)
+        ).where(*SeatCRUD._period(CourseSeat, curso_id, anio_academico, semestre))).first()
+        session.commit()
+        return row[1] if row[0] else None
+
+class EnrollmentCRUD(BaseCRUD):
+    @staticmethod
+    def _enroll(db, estudiante_id: int, curso_id: int, anio_academico: int, semestre: str) -> bool:
+        """Reservar cupo e insertar la matrícula en la transacción de `db`. False si no hay cupo"""
+        if not SeatCRUD.reserve(db, curso_id, anio_academico, semestre):
+            return False
+        # Quien se había retirado del curso en el periodo recupera su matrícula (como en promote)
+        reactivated = db.execute(update(Enrollment.__table__).where(
+            Enrollment.estudiante_id == estudiante_id, Enrollment.estado == 'Retirada',
+            *SeatCRUD._period(Enrollment, curso_id, anio_academico, semestre)
+        ).values(estado='Activa', calificacion=None, fecha_matricula=datetime.now())).rowcount
+        if not reactivated:
+            db.execute(insert(Enrollment.__table__).values(
+                estudiante_id=estudiante_id, curso_id=curso_id, anio_academico=anio_academico, semestre=semestre
+            ))
+        WaitlistCRUD._close(db, 'Cancelado', WaitlistEntry.estudiante_id == estudiante_id,
+                            *SeatCRUD._period(WaitlistEntry, curso_id, anio_academico, semestre))
+        return True
+
+    @staticmethod
+    def enroll_student(estudiante_id: int, curso_id: int, semestre: str, anio_academico: int = None):
+        """Matricular si aprobó los prerrequisitos y hay cupo (ver SeatCRUD).
+
+        En SQLite la escritura pasa por el escritor único (single_writer), que
+        agrupa las matrículas concurrentes en un solo commit.
+        """
+        anio_academico = anio_academico or current_academic_period()[0]
+        try:
+            EnrollmentCRUD.require_prerequisites(estudiante_id, curso_id)
+            if not BaseCRUD.write(EnrollmentCRUD._enroll, estudiante_id, curso_id, anio_academico, semestre):
+                raise ValueError("No seats available for this course and semester")
+            return session.get(Enrollment, (estudiante_id, curso_id, anio_academico, semestre))
         except IntegrityError as e:
             session.rollback()
             raise ValueError("Student already enrolled in this course for this semester")
+        except ValueError:
+            session.rollback()
+            raise
         except Exception as e:
             BaseCRUD.handle_error(e, "Error enrolling student")
 
+    @staticmethod
+    def require_prerequisites(estudiante_id: int, curso_id: int):
+        """ValueError si el estudiante no ha aprobado los prerrequisitos del curso"""
+        missing = prerequisite_graph.missing(estudiante_id, curso_id)
+        if missing:
+            raise ValueError(f"Missing prerequisites: {', '.join(prerequisite_graph.codes_of(missing))}")
+
+    @staticmethod
+    def _withdraw(db, estudiante_id: int, curso_id: int, anio_academico: int, semestre: str):
+        key = (Enrollment.estudiante_id == estudiante_id,
+               *SeatCRUD._period(Enrollment, curso_id, anio_academico, semestre))
+        result = db.execute(update(Enrollment.__table__).where(*key, Enrollment.estado == 'Activa')
+                            .values(estado='Retirada'))
+        if not result.rowcount:
+            if db.execute(select(literal(1)).where(*key)).first() is None:
+                raise ValueError("Enrollment not found")
+            return []
+        SeatCRUD.release(db, curso_id, anio_academico, semestre)
+        return WaitlistCRUD.promote(db, curso_id, anio_academico, semestre)
+
+    @staticmethod
+    def withdraw(estudiante_id: int, curso_id: int, anio_academico: int, semestre: str):
+        """Marcar la matrícula como Retirada, liberar su cupo y promover la lista de espera.
+
+        Todo en la misma transacción. Retorna los id de los estudiantes promovidos.
+        """
+        try:
+            return BaseCRUD.write(EnrollmentCRUD._withdraw, estudiante_id, curso_id, anio_academico, semestre)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error withdrawing enrollment")
+
+    @staticmethod
+    def period_filters(query, anio_academico: int = None, semestre: str = None):
+        """Filtrar por periodo académico (poda de particiones en PostgreSQL)"""
+        if anio_academico:
+            query = query.filter(Enrollment.anio_academico == anio_academico)
+        if semestre:
+            query = query.filter(Enrollment.semestre == semestre)
+        return query
+
+    @staticmethod
+    def get_enrollment(estudiante_id: int, curso_id: int, anio_academico: int, semestre: str):
+        try:
+            return session.get(Enrollment, (estudiante_id, curso_id, anio_academico, semestre))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting enrollment")
+
+    @staticmethod
+    def list_enrollments(anio_academico: int = None, semestre: str = None, estudiante_id: int = None,
+                         curso_id: int = None, estado: str = None):
+        """Matrículas filtradas; sin periodo recorre todos los años"""
+        try:
+            query = EnrollmentCRUD.period_filters(session.query(Enrollment), anio_academico, semestre)
+            if estudiante_id:
+                query = query.filter(Enrollment.estudiante_id == estudiante_id)
+            if curso_id:
+                query = query.filter(Enrollment.curso_id == curso_id)
+            if estado:
+                query = query.filter(Enrollment.estado == estado)
+            return query.order_by(Enrollment.anio_academico, Enrollment.semestre, Enrollment.curso_id).all()
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing enrollments")
+
+    @staticmethod
+    def list_current_enrollments(**filters):
+        """Matrículas del periodo vigente"""
+        anio_academico, semestre = current_academic_period()
+        return EnrollmentCRUD.list_enrollments(anio_academico=anio_academico, semestre=semestre, **filters)
+
+class WaitlistCRUD(BaseCRUD):
+    """Lista de espera por (curso, año, semestre).
+
+    La prioridad se calcula una vez al entrar a la cola con una de
+    PRIORITY_RULES:
+        'llegada'     solo el orden de llegada
+        'antiguedad'  fecha_ingreso (más antiguo primero)
+        'promedio'    promedio de notas × 100 (mayor primero)
+    Al retirarse una matrícula (EnrollmentCRUD.withdraw) o ampliarse la
+    capacidad, promote() toma tantas solicitudes de la cabeza de la cola
+    como cupos libres haya y las matricula en la misma transacción: su costo
+    depende de los cupos liberados, no del largo de la cola.
+    """
+    PRIORITY_RULES = ('llegada', 'antiguedad', 'promedio')
+    DEFAULT_RULE = 'antiguedad'
+    GRADE_POINTS = {'A': 4, 'B': 3, 'C': 2, 'D': 1, 'F': 0}
+
+    @staticmethod
+    def _queue(curso_id: int, anio_academico: int, semestre: str):
+        return (*SeatCRUD._period(WaitlistEntry, curso_id, anio_academico, semestre),
+                WaitlistEntry.estado == 'Esperando')
+
+    @staticmethod
+    def _close(db, estado: str, *conditions):
+        return db.execute(update(WaitlistEntry.__table__)
+                          .where(*conditions, WaitlistEntry.estado == 'Esperando')
+                          .values(estado=estado, fecha_promocion=datetime.now() if estado == 'Promovido' else None))
+
+    @staticmethod
+    def priority(db, estudiante_id: int, regla: str) -> int:
+        if regla not in WaitlistCRUD.PRIORITY_RULES:
+            raise ValueError(f"Unknown priority rule {regla}. Options: {', '.join(WaitlistCRUD.PRIORITY_RULES)}")
+        if regla == 'antiguedad':
+            fecha_ingreso = db.execute(select(Student.fecha_ingreso).where(Student.id == estudiante_id)).scalar()
+            if fecha_ingreso is None:
+                raise ValueError("Student not found")
+            # Fija por estudiante: no depende del día en que entra a la cola
+            return -fecha_ingreso.toordinal()
+        if regla == 'promedio':
+            points = case(WaitlistCRUD.GRADE_POINTS, value=Enrollment.calificacion)
+            average = db.execute(select(func.avg(points)).where(Enrollment.estudiante_id == estudiante_id)).scalar()
+            return int(round((average or 0) * 100))
+        return 0
+
+    @staticmethod
+    def _position(db, estudiante_id: int, curso_id: int, anio_academico: int, semestre: str):
+        queue = WaitlistCRUD._queue(curso_id, anio_academico, semestre)
+        entry = db.execute(select(WaitlistEntry.id, WaitlistEntry.prioridad)
+                           .where(*queue, WaitlistEntry.estudiante_id == estudiante_id)).first()
+        if entry is None:
+            return None
+        # Solo se cuentan las entradas por delante, sobre el índice de la cola
+        ahead = db.execute(select(func.count()).where(*queue, or_(
+            WaitlistEntry.prioridad > entry.prioridad,
+            and_(WaitlistEntry.prioridad == entry.prioridad, WaitlistEntry.id < entry.id)
+        ))).scalar()
+        return ahead + 1
+
+    @staticmethod
+    def promote(db, curso_id: int, anio_academico: int, semestre: str, limit: int = None):
+        """Matricular la cabeza de la cola según los cupos libres, en la transacción de `db`.
+
+        Retorna los id de los estudiantes promovidos.
+        """
+        stripes, free = db.execute(select(func.count(), func.sum(CourseSeat.capacidad - CourseSeat.ocupados))
+                                   .where(*SeatCRUD._period(CourseSeat, curso_id, anio_academico, semestre))).first()
+        seats = free if stripes else limit  # sin cupos definidos el curso no tiene límite
+        if limit is not None and seats is not None:
+            seats = min(seats, limit)
+        if seats is not None and seats <= 0:
+            return []
+        head = db.execute(
+            select(WaitlistEntry.id, WaitlistEntry.estudiante_id)
+            .where(*WaitlistCRUD._queue(curso_id, anio_academico, semestre))
+            .order_by(WaitlistEntry.prioridad.desc(), WaitlistEntry.id)
+            .limit(seats).with_for_update(skip_locked=True)
+        ).all()
+        promoted = []
+        for entry in head:
+            if not SeatCRUD.reserve(db, curso_id, anio_academico, semestre):
+                break
+            promoted.append(entry)
+        if not promoted:
+            return []
+
+        student_ids = [entry.estudiante_id for entry in promoted]
+        period = SeatCRUD._period(Enrollment, curso_id, anio_academico, semestre)
+        # Quien se había retirado del curso en el periodo recupera su matrícula
+        withdrawn = set(db.execute(select(Enrollment.estudiante_id)
+                                   .where(*period, Enrollment.estado == 'Retirada',
+                                          Enrollment.estudiante_id.in_(student_ids))).scalars())
+        if withdrawn:
+            db.execute(update(Enrollment.__table__)
+                       .where(*period, Enrollment.estado == 'Retirada', Enrollment.estudiante_id.in_(withdrawn))
+                       .values(estado='Activa', calificacion=None, fecha_matricula=datetime.now()))
+        new = [student_id for student_id in student_ids if student_id not in withdrawn]
+        if new:
+            db.execute(insert(Enrollment.__table__), [
+                {'estudiante_id': student_id, 'curso_id': curso_id, 'anio_academico': anio_academico,
+                 'semestre': semestre} for student_id in new
+            ])
+        WaitlistCRUD._close(db, 'Promovido', WaitlistEntry.id.in_([entry.id for entry in promoted]))
+        return student_ids
+
+    @staticmethod
+    def _request(db, estudiante_id: int, curso_id: int, anio_academico: int, semestre: str, regla: str):
+        if EnrollmentCRUD._enroll(db, estudiante_id, curso_id, anio_academico, semestre):
+            return 'Matriculado', None
+        enrolled = db.execute(select(literal(1)).where(
+            Enrollment.estudiante_id == estudiante_id, Enrollment.estado == 'Activa',
+            *SeatCRUD._period(Enrollment, curso_id, anio_academico, semestre)
+        )).first()
+        if enrolled:
+            raise ValueError("Student already enrolled in this course for this semester")
+        # Todas las solicitudes de una cola usan la misma regla para que sus prioridades sean comparables
+        queue_rule = db.execute(select(WaitlistEntry.regla)
+                                .where(*WaitlistCRUD._queue(curso_id, anio_academico, semestre)).limit(1)).scalar()
+        if regla and queue_rule and regla != queue_rule:
+            raise ValueError(f"Waitlist for this course uses priority rule {queue_rule}")
+        regla = regla or queue_rule or WaitlistCRUD.DEFAULT_RULE
+        db.execute(insert(WaitlistEntry.__table__).values(
+            estudiante_id=estudiante_id, curso_id=curso_id, anio_academico=anio_academico, semestre=semestre,
+            prioridad=WaitlistCRUD.priority(db, estudiante_id, regla), regla=regla,
+            estado='Esperando', fecha_solicitud=datetime.now()
+        ))
+        return 'En espera', WaitlistCRUD._position(db, estudiante_id, curso_id, anio_academico, semestre)
+
+    @staticmethod
+    def request_seat(estudiante_id: int, curso_id: int, semestre: str, anio_academico: int = None,
+                     regla: str = None):
+        """Matricular si hay cupo; si no, entrar a la lista de espera.
+
+        `regla` solo aplica a la primera solicitud de la cola (por defecto
+        DEFAULT_RULE); las siguientes usan la misma.
+
+        Retorna (estado, posicion): ('Matriculado', None) o ('En espera', posición en la cola).
+        """
+        anio_academico = anio_academico or current_academic_period()[0]
+        try:
+            EnrollmentCRUD.require_prerequisites(estudiante_id, curso_id)
+            return BaseCRUD.write(WaitlistCRUD._request, estudiante_id, curso_id, anio_academico, semestre, regla)
+        except IntegrityError as e:
+            session.rollback()
+            raise ValueError("Student already enrolled or waiting for this course and semester")
+        except ValueError:
+            session.rollback()
+            raise
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error requesting seat")
+
+    @staticmethod
+    def position(estudiante_id: int, curso_id: int, anio_academico: int, semestre: str):
+        """Posición en la cola (1 = siguiente), o None si no está esperando"""
+        try:
+            result = WaitlistCRUD._position(session, estudiante_id, curso_id, anio_academico, semestre)
+            session.commit()
+            return result
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting waitlist position")
+
+    @staticmethod
+    def cancel(estudiante_id: int, curso_id: int, anio_academico: int, semestre: str) -> bool:
+        """Salir de la lista de espera"""
+        try:
+            result = BaseCRUD.write(
+                WaitlistCRUD._close, 'Cancelado', WaitlistEntry.estudiante_id == estudiante_id,
+                *SeatCRUD._period(WaitlistEntry, curso_id, anio_academico, semestre)
+            )
+            return result.rowcount > 0
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error leaving waitlist")
+
+    @staticmethod
+    def promote_period(anio_academico: int, semestre: str):
+        """Promover en todos los cursos del periodo con cupos libres y solicitudes en espera.
+
+        Útil después de SeatCRUD.open_period. Retorna {curso_id: [estudiantes promovidos]}.
+        """
+        try:
+            waiting = select(WaitlistEntry.curso_id).where(
+                WaitlistEntry.anio_academico == anio_academico, WaitlistEntry.semestre == semestre,
+                WaitlistEntry.estado == 'Esperando'
+            ).distinct()
+            course_ids = session.execute(waiting).scalars().all()
+            session.commit()
+            promoted = {}
+            for curso_id in course_ids:
+                students = BaseCRUD.write(WaitlistCRUD.promote, curso_id, anio_academico, semestre)
+                if students:
+                    promoted[curso_id] = students
+            return promoted
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error promoting waitlists")
+
+class AttendanceCRUD(BaseCRUD):
+    """Asistencia por sesión, con tasas y alertas leídas de resumen_asistencia.
+
+    mark_session escribe la lista completa de una sesión con un solo
+    INSERT ... SELECT sobre la matrícula activa del curso, y suma la sesión a
+    los contadores de resumen_asistencia con un upsert del mismo estilo. Las
+    consultas de tasa y las alertas nunca recorren asistencia. Corregir una
+    sesión ya marcada, o marcar una fecha anterior a la última, recalcula el
+    resumen del curso desde asistencia (rebuild).
+    """
+    AT_RISK_RATE = 0.75
+    AT_RISK_STREAK = 3
+    AT_RISK_MIN_SESSIONS = 4
+    _cached_statements = {}
+
+    @staticmethod
+    def _summary_key(curso_id, anio_academico: int, semestre: str):
+        conditions = [AttendanceSummary.anio_academico == anio_academico, AttendanceSummary.semestre == semestre]
+        if curso_id is not None:
+            conditions.append(AttendanceSummary.curso_id == curso_id)
+        return conditions
+
+    @staticmethod
+    def _statements():
+        """Sentencias de mark_session, construidas una sola vez.
+
+        Todo lo que cambia entre sesiones va en parámetros (las listas de
+        presentes y justificados como IN expandible), así que cada llamada
+        reutiliza el SQL compilado. Son sentencias Core simples en lugar de
+        ON CONFLICT porque los INSERT por dialecto no usan el caché de
+        compilación de SQLAlchemy.
+        """
+        if AttendanceCRUD._cached_statements:
+            return AttendanceCRUD._cached_statements
+        student = Enrollment.estudiante_id
+        present = student.in_(bindparam('p_presentes', expanding=True))
+        justified = ~present & student.in_(bindparam('p_justificados', expanding=True))
+        roster = select(student).where(
+            Enrollment.curso_id == bindparam('p_curso_id'), Enrollment.anio_academico == bindparam('p_anio'),
+            Enrollment.semestre == bindparam('p_semestre'), Enrollment.estado == 'Activa'
+        )
+        statements = {}
+        statements['clear_session'] = delete(Attendance.__table__).where(
+            Attendance.curso_id == bindparam('p_curso_id'), Attendance.fecha == bindparam('p_fecha', type_=Date))
+        statements['insert_session'] = insert(Attendance.__table__).from_select(
+            ['estudiante_id', 'curso_id', 'fecha', 'presente'],
+            roster.add_columns(bindparam('p_curso_id'), bindparam('p_fecha', type_=Date), present)
+        )
+        statements['justify'] = update(Attendance.__table__).where(
+            Attendance.estudiante_id == bindparam('estudiante'), Attendance.curso_id == bindparam('curso'),
+            Attendance.fecha == bindparam('dia'), ~Attendance.presente
+        ).values(justificacion=bindparam('motivo'))
+
+        # Resumen: sumar la sesión a las filas existentes y crear las que faltan
+        summary = AttendanceSummary.__table__
+        summary_student = summary.c.estudiante_id
+        summary_present = summary_student.in_(bindparam('p_presentes', expanding=True))
+        summary_justified = ~summary_present & summary_student.in_(bindparam('p_justificados', expanding=True))
+        summary_key = (summary.c.anio_academico == bindparam('p_anio'), summary.c.semestre == bindparam('p_semestre'),
+                       summary.c.curso_id == bindparam('p_curso_id'))
+        statements['update_summary'] = update(summary).where(*summary_key, summary_student.in_(roster)).values(
+            sesiones=summary.c.sesiones + 1,
+            presentes=summary.c.presentes + case((summary_present, 1), else_=0),
+            justificadas=summary.c.justificadas + case((summary_justified, 1), else_=0),
+            racha_ausencias=case((summary_present, 0), (summary_justified, summary.c.racha_ausencias),
+                                 else_=summary.c.racha_ausencias + 1),
+            ultima_fecha=bindparam('p_fecha', type_=Date),
+        )
+        flag = lambda condition: case((condition, 1), else_=0)
+        statements['insert_summary'] = insert(summary).from_select(
+            ['anio_academico', 'semestre', 'curso_id', 'estudiante_id', 'sesiones', 'presentes', 'justificadas',
+             'racha_ausencias', 'ultima_fecha'],
+            roster.with_only_columns(
+                bindparam('p_anio'), bindparam('p_semestre'), bindparam('p_curso_id'), student, literal(1),
+                flag(present), flag(justified), flag(~present & ~justified), bindparam('p_fecha', type_=Date)
+            ).where(~select(literal(1)).where(*summary_key, summary_student == student).exists())
+        )
+        AttendanceCRUD._cached_statements.update(statements)
+        return statements
+
+    @staticmethod
+    def _mark(db, curso_id: int, fecha: date, present_ids, justifications):
+        anio_academico, semestre = current_academic_period(fecha)
+        already_marked = db.execute(select(literal(1)).where(
+            Attendance.curso_id == curso_id, Attendance.fecha == fecha).limit(1)).first()
+        last_session = db.execute(select(func.max(AttendanceSummary.ultima_fecha)).where(
+            *AttendanceCRUD._summary_key(curso_id, anio_academico, semestre))).scalar()
+
+        statements = AttendanceCRUD._statements()
+        params = {'p_curso_id': curso_id, 'p_anio': anio_academico, 'p_semestre': semestre, 'p_fecha': fecha,
+                  'p_presentes': present_ids, 'p_justificados': list(justifications)}
+        if already_marked:
+            db.execute(statements['clear_session'], params)
+        written = db.execute(statements['insert_session'], params).rowcount
+        if justifications:
+            db.execute(statements['justify'], [
+                {'estudiante': estudiante_id, 'curso': curso_id, 'dia': fecha, 'motivo': motivo}
+                for estudiante_id, motivo in justifications.items()
+            ])
+
+        if already_marked or (last_session and fecha < last_session):
+            AttendanceCRUD._rebuild(db, anio_academico, semestre, curso_id)
+        else:
+            db.execute(statements['update_summary'], params)
+            db.execute(statements['insert_summary'], params)
+        return written
+
+    @staticmethod
+    def _rebuild(db, anio_academico: int, semestre: str, curso_id: int = None):
+        """Recalcular resumen_asistencia del periodo (o de un curso) desde asistencia, por conjuntos"""
+        start, end = academic_period_range(anio_academico, semestre)
+        in_period = [Attendance.fecha >= start, Attendance.fecha < end]
+        if curso_id is not None:
+            in_period.append(Attendance.curso_id == curso_id)
+        last_present = select(
+            Attendance.estudiante_id, Attendance.curso_id,
+            func.max(case((Attendance.presente, Attendance.fecha))).label('fecha')
+        ).where(*in_period).group_by(Attendance.estudiante_id, Attendance.curso_id).subquery()
+        absent = ~Attendance.presente & Attendance.justificacion.is_(None)
+        flag = lambda condition: func.sum(case((condition, 1), else_=0))
+        rows = select(
+            literal(anio_academico), literal(semestre), Attendance.curso_id, Attendance.estudiante_id,
+            func.count(), flag(Attendance.presente),
+            flag(~Attendance.presente & Attendance.justificacion.is_not(None)),
+            flag(absent & (last_present.c.fecha.is_(None) | (Attendance.fecha > last_present.c.fecha))),
+            func.max(Attendance.fecha)
+        ).join(last_present, and_(last_present.c.estudiante_id == Attendance.estudiante_id,
+                                  last_present.c.curso_id == Attendance.curso_id)) \
+         .where(*in_period).group_by(Attendance.curso_id, Attendance.estudiante_id)
+        db.execute(delete(AttendanceSummary.__table__).where(
+            *AttendanceCRUD._summary_key(curso_id, anio_academico, semestre)))
+        result = db.execute(insert(AttendanceSummary.__table__).from_select(
+            ['anio_academico', 'semestre', 'curso_id', 'estudiante_id', 'sesiones', 'presentes', 'justificadas',
+             'racha_ausencias', 'ultima_fecha'], rows
+        ))
+        return result.rowcount
+
+    @staticmethod
+    def mark_session(curso_id: int, fecha: date, presentes, justificaciones: dict = None):
+        """Marcar la asistencia de una sesión para toda la matrícula activa del curso.
+
+        `presentes` son los id de los estudiantes presentes; el resto queda
+        ausente. `justificaciones` es {estudiante_id: motivo} para ausencias
+        justificadas. Remarcar la misma fecha la corrige. Retorna cuántas
+        filas se escribieron.
+        """
+        try:
+            return BaseCRUD.write(AttendanceCRUD._mark, curso_id, fecha, list(presentes),
+                                  dict(justificaciones or {}))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error marking attendance")
+
+    @staticmethod
+    def rebuild_summary(anio_academico: int, semestre: str, curso_id: int = None):
+        """Recalcular el resumen (ej. después de cargar asistencia por fuera de mark_session)"""
+        try:
+            return BaseCRUD.write(AttendanceCRUD._rebuild, anio_academico, semestre, curso_id)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error rebuilding attendance summary")
+
+    @staticmethod
+    def _rate(summary):
+        return (summary.presentes / (summary.sesiones - summary.justificadas)
+                if summary.sesiones > summary.justificadas else 1.0)
+
+    @staticmethod
+    def get_summary(estudiante_id: int, curso_id: int, anio_academico: int, semestre: str):
+        """Contadores y tasa de asistencia de una matrícula (una lectura por llave primaria)"""
+        try:
+            summary = session.get(AttendanceSummary, (anio_academico, semestre, curso_id, estudiante_id))
+            if not summary:
+                return None
+            return {'sesiones': summary.sesiones, 'presentes': summary.presentes,
+                    'justificadas': summary.justificadas, 'racha_ausencias': summary.racha_ausencias,
+                    'tasa': round(AttendanceCRUD._rate(summary), 4)}
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting attendance")
+
+    @staticmethod
+    def at_risk(anio_academico: int, semestre: str, min_rate: float = AT_RISK_RATE,
+                max_streak: int = AT_RISK_STREAK, min_sessions: int = AT_RISK_MIN_SESSIONS, curso_id: int = None):
+        """Estudiantes con tasa menor a min_rate o max_streak ausencias seguidas sin justificar.
+
+        Solo lee resumen_asistencia; retorna AttendanceRecord ordenados por tasa.
+        """
+        try:
+            counted = AttendanceSummary.sesiones - AttendanceSummary.justificadas
+            rate = AttendanceSummary.presentes * 1.0 / func.nullif(counted, 0)
+            return BaseCRUD.fetch_records(
+                select(AttendanceSummary.estudiante_id, Student.nombre, Student.apellido, AttendanceSummary.curso_id,
+                       Course.codigo, AttendanceSummary.sesiones, AttendanceSummary.presentes,
+                       AttendanceSummary.justificadas, AttendanceSummary.racha_ausencias,
+                       func.round(func.coalesce(rate, 1.0), 4))
+                .join(Student, Student.id == AttendanceSummary.estudiante_id)
+                .join(Course, Course.id == AttendanceSummary.curso_id)
+                .where(*AttendanceCRUD._summary_key(curso_id, anio_academico, semestre),
+                       AttendanceSummary.sesiones >= min_sessions,
+                       or_(AttendanceSummary.presentes < min_rate * counted,
+                           AttendanceSummary.racha_ausencias >= max_streak))
+                .order_by(func.coalesce(rate, 1.0), AttendanceSummary.racha_ausencias.desc()),
+                AttendanceRecord
+            )
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing students at risk")
+
+class GradeCRUD(BaseCRUD):
+    """Notas por evaluación y cierre de calificaciones de un curso.
+
+    La nota final de cada matrícula es el promedio de sus notas ponderado por
+    evaluacion.porcentaje (normalizado por la suma de los porcentajes del
+    curso en el periodo; una evaluación sin nota cuenta 0). Se calcula para
+    toda la sección en una consulta agregada y se escribe en matricula con un
+    solo UPDATE, en una transacción: cerrar un curso no depende de cuántos
+    estudiantes tenga. Sin ninguna nota la calificación es 'NP'.
+    """
+    GRADE_SCALE = (('A', 90), ('B', 80), ('C', 70), ('D', 60))  # nota mínima de cada letra; menos es 'F'
+    GRADES = ('A', 'B', 'C', 'D', 'F', 'NP')  # tipo_calificacion
+
+    @staticmethod
+    def _section(model, curso_id, anio_academico: int, semestre: str):
+        """Evaluaciones del curso (o de todos) cuya fecha cae en el periodo"""
+        start, end = academic_period_range(anio_academico, semestre)
+        conditions = [model.fecha >= start, model.fecha < end]
+        if curso_id is not None:
+            conditions.append(model.curso_id == curso_id)
+        return conditions
+
+    @staticmethod
+    def _final_scores(anio_academico: int, semestre: str, curso_id: int = None):
+        """Subconsulta (curso_id, estudiante_id, nota_final, con_nota, calificacion) de la matrícula no retirada"""
+        evaluations = select(Evaluation.id, Evaluation.curso_id, Evaluation.porcentaje).where(
+            *GradeCRUD._section(Evaluation, curso_id, anio_academico, semestre)).subquery()
+        conditions = [Enrollment.anio_academico == anio_academico, Enrollment.semestre == semestre,
+                      Enrollment.estado != 'Retirada']
+        if curso_id is not None:
+            conditions.append(Enrollment.curso_id == curso_id)
+        scores = select(
+            Enrollment.curso_id, Enrollment.estudiante_id,
+            func.round(func.sum(func.coalesce(EvaluationScore.nota, 0) * evaluations.c.porcentaje)
+                       / func.sum(evaluations.c.porcentaje), 2).label('nota_final'),
+            func.count(EvaluationScore.nota).label('con_nota'),
+        ).join(evaluations, evaluations.c.curso_id == Enrollment.curso_id).outerjoin(
+            EvaluationScore, and_(EvaluationScore.evaluacion_id == evaluations.c.id,
+                                  EvaluationScore.estudiante_id == Enrollment.estudiante_id)
+        ).where(*conditions).group_by(Enrollment.curso_id, Enrollment.estudiante_id).subquery()
+        letter = case((scores.c.con_nota == 0, 'NP'),
+                      *[(scores.c.nota_final >= minimum, grade) for grade, minimum in GradeCRUD.GRADE_SCALE],
+                      else_='F')
+        return select(scores, GradeCRUD._as_grade(letter).label('calificacion')).subquery()
+
+    @staticmethod
+    def _as_grade(expression):
+        if session.get_bind().dialect.name == 'postgresql':
+            # Un CASE de literales es text: convertir al enum de la columna
+            return expression.cast(postgresql.ENUM(name='tipo_calificacion', create_type=False))
+        return expression
+
+    @staticmethod
+    def create_evaluation(curso_id: int, nombre: str, tipo: str, fecha: date, porcentaje):
+        """Crear una evaluación; los porcentajes del curso en el periodo no pueden pasar de 100"""
+        try:
+            porcentaje = Decimal(str(porcentaje))
+            anio_academico, semestre = current_academic_period(fecha)
+            assigned = session.execute(select(func.coalesce(func.sum(Evaluation.porcentaje), 0)).where(
+                *GradeCRUD._section(Evaluation, curso_id, anio_academico, semestre))).scalar()
+            if Decimal(str(assigned)) + porcentaje > 100:
+                raise ValueError(f"Evaluation weights would exceed 100% ({assigned}% already assigned)")
+            evaluation = Evaluation(curso_id=curso_id, nombre=nombre, tipo=tipo, fecha=fecha, porcentaje=porcentaje)
+            session.add(evaluation)
+            session.commit()
+            return evaluation
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error creating evaluation")
+
+    @staticmethod
+    def _record(db, evaluacion_id: int, scores: dict):
+        table = EvaluationScore.__table__
+        db.execute(delete(table).where(table.c.evaluacion_id == evaluacion_id,
+                                       table.c.estudiante_id.in_(list(scores))))
+        now = datetime.now()
+        db.execute(insert(table), [
+            {'evaluacion_id': evaluacion_id, 'estudiante_id': estudiante_id, 'nota': nota, 'fecha_registro': now}
+            for estudiante_id, nota in scores.items()
+        ])
+        return len(scores)
+
+    @staticmethod
+    def record_scores(evaluacion_id: int, scores: dict):
+        """Guardar {estudiante_id: nota} de una evaluación (reemplaza las notas ya registradas)"""
+        try:
+            if any(nota is None or not 0 <= nota <= 100 for nota in scores.values()):
+                raise ValueError("Scores must be between 0 and 100")
+            if not scores:
+                return 0
+            return BaseCRUD.write(GradeCRUD._record, evaluacion_id, dict(scores))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error recording scores")
+
+    @staticmethod
+    def compute_grades(curso_id: int, anio_academico: int, semestre: str):
+        """Vista previa de la nota final y la letra de cada estudiante, sin escribir (GradeRecord)"""
+        try:
+            scores = GradeCRUD._final_scores(anio_academico, semestre, curso_id)
+            return BaseCRUD.fetch_records(
+                select(scores.c.estudiante_id, Student.nombre, Student.apellido, scores.c.nota_final,
+                       scores.c.con_nota, scores.c.calificacion)
+                .join(Student, Student.id == scores.c.estudiante_id)
+                .order_by(Student.apellido, Student.nombre),
+                GradeRecord
+            )
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error computing grades")
+
+    @staticmethod
+    def _close(db, anio_academico: int, semestre: str, curso_id: int = None):
+        """Escribir la calificación de toda la sección (o del periodo) con un UPDATE. Retorna las filas cambiadas"""
+        scores = GradeCRUD._final_scores(anio_academico, semestre, curso_id)
+        matricula = Enrollment.__table__
+        return db.execute(update(matricula).where(
+            matricula.c.anio_academico == anio_academico, matricula.c.semestre == semestre,
+            matricula.c.curso_id == scores.c.curso_id, matricula.c.estudiante_id == scores.c.estudiante_id,
+            matricula.c.calificacion.is_distinct_from(scores.c.calificacion)
+        ).values(calificacion=scores.c.calificacion)).rowcount
+
+    @staticmethod
+    def _apply(db, curso_id: int, anio_academico: int, semestre: str, grades: dict):
+        """Escribir {estudiante_id: letra} de un curso con un solo UPDATE (CASE por estudiante)"""
+        matricula = Enrollment.__table__
+        return db.execute(update(matricula).where(
+            matricula.c.curso_id == curso_id, matricula.c.anio_academico == anio_academico,
+            matricula.c.semestre == semestre, matricula.c.estado != 'Retirada',
+            matricula.c.estudiante_id.in_(list(grades))
+        ).values(calificacion=GradeCRUD._as_grade(case(grades, value=matricula.c.estudiante_id)))).rowcount
+
+    @staticmethod
+    def apply_grades(curso_id: int, anio_academico: int, semestre: str, grades: dict):
+        """Cargar calificaciones {estudiante_id: letra} de un curso (ej. cursos sin evaluaciones).
+
+        Un solo UPDATE para todo el lote. Retorna cuántas matrículas se actualizaron.
+        """
+        try:
+            invalid = set(grades.values()) - set(GradeCRUD.GRADES)
+            if invalid:
+                raise ValueError(f"Invalid grades: {', '.join(map(str, invalid))}")
+            if not grades:
+                return 0
+            return BaseCRUD.write(GradeCRUD._apply, curso_id, anio_academico, semestre, dict(grades))
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error applying grades")
+
+    @staticmethod
+    def close_grades(curso_id: int, anio_academico: int, semestre: str):
+        """Cerrar las calificaciones del curso en el periodo. Retorna {letra: estudiantes}"""
+        try:
+            has_evaluations = session.execute(select(literal(1)).where(
+                *GradeCRUD._section(Evaluation, curso_id, anio_academico, semestre)).limit(1)).first()
+            session.commit()
+            if not has_evaluations:
+                raise ValueError("Course has no evaluations in this period")
+            BaseCRUD.write(GradeCRUD._close, anio_academico, semestre, curso_id)
+            rows = session.execute(select(Enrollment.calificacion, func.count()).where(
+                Enrollment.curso_id == curso_id, Enrollment.anio_academico == anio_academico,
+                Enrollment.semestre == semestre, Enrollment.estado != 'Retirada'
+            ).group_by(Enrollment.calificacion)).all()
+            session.commit()
+            return {calificacion: total for calificacion, total in rows}
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error closing grades")
+
+class LedgerCRUD(BaseCRUD):
+    """Cuenta corriente de los estudiantes: movimiento_cuenta y saldo_estudiante.
+
+    Cada cargo (fila de pago), pago recibido o descuento de beca es un
+    movimiento, y el saldo de la cuenta se actualiza en la misma transacción:
+    consultar quién debe no agrupa pagos, lee saldo_estudiante por sus
+    índices parciales. Los abonos cubren primero los cargos más antiguos, y
+    pendiente_desde guarda el vencimiento del cargo impago más antiguo (el día
+    del cargo), que es lo que mide los días de atraso.
+    """
+    LATE_DAYS = 30
+
+    @staticmethod
+    def _date(column):
+        if session.get_bind().dialect.name == 'postgresql':
+            return column.cast(Date)
+        return func.date(column)
+
+    @staticmethod
+    def _open_accounts(db, student_ids):
+        """Crear las cuentas que falten y bloquear las de student_ids (lista o select de ids)"""
+        balance = AccountBalance.__table__
+        db.execute(insert(balance).from_select(
+            ['estudiante_id', 'saldo', 'total_cargos', 'total_abonos', 'actualizado'],
+            select(Student.id, literal(0), literal(0), literal(0), literal(datetime.now())).where(
+                Student.id.in_(student_ids),
+                ~select(literal(1)).where(balance.c.estudiante_id == Student.id).exists())
+        ))
+        # En PostgreSQL, en orden de id para que dos procesos no se bloqueen en cruz
+        db.execute(select(balance.c.estudiante_id).where(balance.c.estudiante_id.in_(student_ids))
+                   .order_by(balance.c.estudiante_id).with_for_update())
+
+    @staticmethod
+    def _refresh_pending(db, student_ids):
+        """Recalcular pendiente_desde: el cargo impago más antiguo de cada cuenta"""
+        balance = AccountBalance.__table__
+        oldest_unpaid = select(func.min(LedgerEntry.vencimiento)).where(
+            LedgerEntry.estudiante_id == balance.c.estudiante_id, LedgerEntry.tipo == 'Cargo',
+            LedgerEntry.cargos_acumulados > balance.c.total_abonos
+        ).scalar_subquery()
+        db.execute(update(balance).where(balance.c.estudiante_id.in_(student_ids))
+                   .values(pendiente_desde=oldest_unpaid))
+
+    @staticmethod
+    def _post_charges(db, *conditions):
+        """Contabilizar como cargos las filas de pago que cumplan `conditions`, por conjuntos.
+
+        Primero se suma el total de cada estudiante a su cuenta y luego se
+        insertan los movimientos con el saldo acumulado de cada uno (ventana
+        por estudiante en orden de fecha). Los pagos ya contabilizados se
+        omiten, así que repetirlo no duplica cargos. Retorna cuántos se
+        contabilizaron.
+        """
+        balance = AccountBalance.__table__
+        unposted = [*conditions, ~select(literal(1)).where(LedgerEntry.pago_id == Payment.id).exists()]
+        students = select(Payment.estudiante_id).where(*unposted)
+        LedgerCRUD._open_accounts(db, students)
+
+        totals = select(Payment.estudiante_id, func.sum(Payment.monto).label('monto')) \
+            .where(*unposted).group_by(Payment.estudiante_id).subquery()
+        db.execute(update(balance).where(balance.c.estudiante_id == totals.c.estudiante_id).values(
+            saldo=func.round(balance.c.saldo + totals.c.monto, 2),
+            total_cargos=func.round(balance.c.total_cargos + totals.c.monto, 2),
+            actualizado=datetime.now()
+        ))
+        # La cuenta ya incluye todos los cargos nuevos: el saldo tras cada uno
+        # es el final menos lo que falta por contabilizar después de él
+        running = func.sum(Payment.monto).over(partition_by=Payment.estudiante_id,
+                                               order_by=(Payment.fecha, Payment.id))
+        remaining = func.sum(Payment.monto).over(partition_by=Payment.estudiante_id) - running
+        result = db.execute(insert(LedgerEntry.__table__).from_select(
+            ['estudiante_id', 'fecha', 'tipo', 'monto', 'saldo', 'cargos_acumulados', 'vencimiento', 'pago_id',
+             'descripcion'],
+            select(Payment.estudiante_id, Payment.fecha, literal('Cargo'), Payment.monto,
+                   func.round(balance.c.saldo - remaining, 2), func.round(balance.c.total_cargos - remaining, 2),
+                   LedgerCRUD._date(Payment.fecha), Payment.id, Payment.descripcion)
+            .join(balance, balance.c.estudiante_id == Payment.estudiante_id).where(*unposted)
+        ))
+        LedgerCRUD._refresh_pending(db, select(LedgerEntry.estudiante_id).join(
+            Payment, Payment.id == LedgerEntry.pago_id).where(*conditions))
+        return result.rowcount
+
+    @staticmethod
+    def _credit(db, estudiante_id: int, tipo: str, monto, referencia: str = None, beca_id: int = None,
+                descripcion: str = None, fecha: datetime = None):
+        """Registrar un abono (Pago o Beca) y descontarlo del saldo. Retorna el saldo nuevo"""
+        monto = Decimal(str(monto))
+        if monto <= 0:
+            raise ValueError("Amount must be positive")
+        balance = AccountBalance.__table__
+        LedgerCRUD._open_accounts(db, [estudiante_id])
+        saldo = db.execute(update(balance).where(balance.c.estudiante_id == estudiante_id).values(
+            saldo=func.round(balance.c.saldo - monto, 2),
+            total_abonos=func.round(balance.c.total_abonos + monto, 2),
+            actualizado=datetime.now()
+        ).returning(balance.c.saldo)).scalar()
+        if saldo is None:
+            raise ValueError("Student not found")
+        db.execute(insert(LedgerEntry.__table__).values(
+            estudiante_id=estudiante_id, fecha=fecha or datetime.now(), tipo=tipo, monto=-monto, saldo=saldo,
+            referencia=referencia, beca_id=beca_id, descripcion=descripcion
+        ))
+        LedgerCRUD._refresh_pending(db, [estudiante_id])
+        return saldo
+
+    @staticmethod
+    def _charge(db, estudiante_id: int, monto, tipo: str, descripcion: str, referencia: str, fecha: datetime):
+        pago_id = db.execute(insert(Payment.__table__).values(
+            estudiante_id=estudiante_id, monto=Decimal(str(monto)), fecha=fecha or datetime.now(), tipo=tipo,
+            descripcion=descripcion, referencia=referencia
+        ).returning(Payment.__table__.c.id)).scalar()
+        LedgerCRUD._post_charges(db, Payment.id == pago_id)
+        return pago_id
+
+    @staticmethod
+    def record_charge(estudiante_id: int, monto, tipo: str = 'Matrícula', descripcion: str = None,
+                      referencia: str = None, fecha: datetime = None):
+        """Crear un cargo (fila de pago: 'Matrícula', 'Multa'...) y sumarlo al saldo. Retorna el id del pago"""
+        try:
+            if Decimal(str(monto)) <= 0:
+                raise ValueError("Amount must be positive")
+            return BaseCRUD.write(LedgerCRUD._charge, estudiante_id, monto, tipo, descripcion, referencia, fecha)
+        except IntegrityError:
+            session.rollback()
+            raise ValueError("Charge reference already exists or student not found")
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error recording charge")
+
+    @staticmethod
+    def record_payment(estudiante_id: int, monto, referencia: str = None, descripcion: str = None,
+                       fecha: datetime = None):
+        """Registrar un pago recibido. La referencia (recibo) no puede repetirse. Retorna el saldo nuevo"""
+        try:
+            return BaseCRUD.write(LedgerCRUD._credit, estudiante_id, 'Pago', monto, referencia, None,
+                                  descripcion, fecha)
+        except IntegrityError:
+            session.rollback()
+            raise ValueError("Payment reference already recorded")
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error recording payment")
+
+    @staticmethod
+    def apply_scholarship(beca_id: int, monto, descripcion: str = None, fecha: datetime = None):
+        """Descontar `monto` de la cuenta del becado como movimiento de la beca. Retorna el saldo nuevo"""
+        try:
+            scholarship = session.get(Scholarship, beca_id)
+            if not scholarship:
+                raise ValueError("Scholarship not found")
+            estudiante_id = scholarship.estudiante_id
+            session.commit()
+            return BaseCRUD.write(LedgerCRUD._credit, estudiante_id, 'Beca', monto, None, beca_id,
+                                  descripcion or scholarship.nombre, fecha)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error applying scholarship")
+
+    @staticmethod
+    def post_charges():
+        """Contabilizar las filas de pago que aún no tienen movimiento (ej. cargadas por fuera)"""
+        try:
+            return BaseCRUD.write(LedgerCRUD._post_charges)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error posting charges")
+
+    @staticmethod
+    def get_balance(estudiante_id: int):
+        """Saldo, cargo impago más antiguo y días de atraso (una lectura por llave primaria)"""
+        try:
+            account = session.get(AccountBalance, estudiante_id)
+            if not account:
+                return {'saldo': Decimal('0'), 'pendiente_desde': None, 'dias_atraso': 0}
+            return {'saldo': account.saldo, 'pendiente_desde': account.pendiente_desde,
+                    'dias_atraso': LedgerCRUD._days_late(account.pendiente_desde)}
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting balance")
+
+    @staticmethod
+    def get_statement(estudiante_id: int, limit: int = 50):
+        """Últimos movimientos de la cuenta, del más reciente al más antiguo"""
+        try:
+            return BaseCRUD.fetch_all(
+                select(LedgerEntry).where(LedgerEntry.estudiante_id == estudiante_id)
+                .order_by(LedgerEntry.id.desc()).limit(limit)
+            )
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting account statement")
+
+    @staticmethod
+    def _days_late(pendiente_desde, today: date = None):
+        return max(((today or date.today()) - pendiente_desde).days, 0) if pendiente_desde else 0
+
+    @staticmethod
+    def debtors(min_balance=0, days_late: int = None, limit: int = None):
+        """Estudiantes con saldo mayor a min_balance y, si se indica, más de days_late días de atraso.
+
+        Retorna DebtorRecord ordenados por saldo; solo lee saldo_estudiante
+        (y estudiante para el nombre).
+        """
+        try:
+            statement = select(
+                AccountBalance.estudiante_id, Student.nombre, Student.apellido, Student.email,
+                AccountBalance.saldo, AccountBalance.pendiente_desde, literal(0)
+            ).join(Student, Student.id == AccountBalance.estudiante_id).where(
+                AccountBalance.saldo > 0, AccountBalance.saldo > min_balance
+            ).order_by(AccountBalance.saldo.desc())
+            if days_late is not None:
+                statement = statement.where(AccountBalance.pendiente_desde < date.today() - timedelta(days=days_late))
+            if limit:
+                statement = statement.limit(limit)
+            today = date.today()
+            return [record._replace(dias_atraso=LedgerCRUD._days_late(record.pendiente_desde, today))
+                    for record in BaseCRUD.fetch_records(statement, DebtorRecord)]
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing debtors")
+
+    @staticmethod
+    def _rebuild(db):
+        """Recalcular saldo_estudiante desde movimiento_cuenta, por conjuntos. Retorna las cuentas corregidas"""
+        balance = AccountBalance.__table__
+        totals = select(
+            LedgerEntry.estudiante_id,
+            func.round(func.sum(LedgerEntry.monto), 2).label('saldo'),
+            func.round(func.sum(case((LedgerEntry.tipo == 'Cargo', LedgerEntry.monto), else_=0)), 2).label('cargos'),
+            func.round(-func.sum(case((LedgerEntry.tipo != 'Cargo', LedgerEntry.monto), else_=0)), 2).label('abonos'),
+        ).group_by(LedgerEntry.estudiante_id).subquery()
+        LedgerCRUD._open_accounts(db, select(totals.c.estudiante_id))
+        result = db.execute(update(balance).where(
+            balance.c.estudiante_id == totals.c.estudiante_id,
+            or_(balance.c.saldo != totals.c.saldo, balance.c.total_cargos != totals.c.cargos,
+                balance.c.total_abonos != totals.c.abonos)
+        ).values(saldo=totals.c.saldo, total_cargos=totals.c.cargos, total_abonos=totals.c.abonos,
+                 actualizado=datetime.now()))
+        LedgerCRUD._refresh_pending(db, select(balance.c.estudiante_id))
+        return result.rowcount
+
+    @staticmethod
+    def rebuild_balances():
+        """Corregir los saldos que no coincidan con los movimientos (ej. después de una carga manual)"""
+        try:
+            return BaseCRUD.write(LedgerCRUD._rebuild)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error rebuilding balances")
+
+    # --- Facturación por periodo ---
+
+    @staticmethod
+    def _billing_lines(anio_academico: int, semestre: str, tarifa):
+        """Una fila por estudiante con matrícula activa: créditos, monto y descuento de su mejor beca vigente"""
+        start, end = academic_period_range(anio_academico, semestre)
+        credits = select(Enrollment.estudiante_id, func.sum(Course.creditos).label('creditos')) \
+            .join(Course, Course.id == Enrollment.curso_id).where(
+                Enrollment.anio_academico == anio_academico, Enrollment.semestre == semestre,
+                Enrollment.estado == 'Activa'
+            ).group_by(Enrollment.estudiante_id).subquery()
+        scholarships = select(
+            Scholarship.id, Scholarship.estudiante_id, Scholarship.porcentaje,
+            func.row_number().over(partition_by=Scholarship.estudiante_id,
+                                   order_by=(Scholarship.porcentaje.desc(), Scholarship.id)).label('orden')
+        ).where(Scholarship.fecha_inicio < end,
+                or_(Scholarship.fecha_fin.is_(None), Scholarship.fecha_fin >= start)).subquery()
+        monto = func.round(credits.c.creditos * literal(tarifa), 2)
+        return select(
+            credits.c.estudiante_id, credits.c.creditos, monto.label('monto'), scholarships.c.id.label('beca_id'),
+            func.round(monto * func.coalesce(scholarships.c.porcentaje, 0) / 100, 2).label('descuento')
+        ).outerjoin(scholarships, and_(scholarships.c.estudiante_id == credits.c.estudiante_id,
+                                       scholarships.c.orden == 1)).subquery()
+
+    @staticmethod
+    def _bill(db, run_id: str, anio_academico: int, semestre: str, tarifa, fecha: datetime):
+        run = db.get(BillingRun, run_id)
+        if run is None:
+            db.add(BillingRun(id=run_id, anio_academico=anio_academico, semestre=semestre,
+                              tarifa_credito=tarifa, fecha=fecha))
+            db.flush()
+        elif (run.anio_academico, run.semestre, Decimal(str(run.tarifa_credito))) != (anio_academico, semestre, tarifa):
+            raise ValueError(f"Billing run {run_id} already exists for {run.semestre} {run.anio_academico} "
+                             f"at {run.tarifa_credito} per credit")
+
+        prefix = f"{run_id}:"
+        lines = LedgerCRUD._billing_lines(anio_academico, semestre, tarifa)
+        reference = literal(prefix) + lines.c.estudiante_id.cast(String)
+        charged = db.execute(insert(Payment.__table__).from_select(
+            ['estudiante_id', 'monto', 'fecha', 'tipo', 'descripcion', 'referencia'],
+            select(lines.c.estudiante_id, lines.c.monto, literal(fecha), literal('Matrícula'),
+                   literal(f"Matrícula {semestre} {anio_academico}: ") + lines.c.creditos.cast(String)
+                   + literal(' créditos'), reference)
+            .where(lines.c.monto > 0, ~select(literal(1)).where(Payment.referencia == reference).exists())
+        )).rowcount
+        in_run = Payment.referencia.startswith(prefix, autoescape=True)
+        LedgerCRUD._post_charges(db, in_run)
+
+        # Descuentos de beca: un abono por estudiante y corrida, con referencia '<id>:B<estudiante_id>'
+        balance = AccountBalance.__table__
+        credit_reference = literal(f"{prefix}B") + lines.c.estudiante_id.cast(String)
+        discounts = select(lines.c.estudiante_id, lines.c.beca_id, lines.c.descuento,
+                           credit_reference.label('referencia')).where(
+            lines.c.descuento > 0,
+            ~select(literal(1)).where(LedgerEntry.referencia == credit_reference).exists()
+        ).subquery()
+        db.execute(update(balance).where(balance.c.estudiante_id == discounts.c.estudiante_id).values(
+            saldo=func.round(balance.c.saldo - discounts.c.descuento, 2),
+            total_abonos=func.round(balance.c.total_abonos + discounts.c.descuento, 2),
+            actualizado=datetime.now()
+        ))
+        # Cada cuenta recibe a lo sumo un descuento: su saldo ya es el posterior al abono
+        db.execute(insert(LedgerEntry.__table__).from_select(
+            ['estudiante_id', 'fecha', 'tipo', 'monto', 'saldo', 'beca_id', 'referencia', 'descripcion'],
+            select(discounts.c.estudiante_id, literal(fecha), literal('Beca'), -discounts.c.descuento,
+                   balance.c.saldo, discounts.c.beca_id, discounts.c.referencia,
+                   literal(f"Beca matrícula {semestre} {anio_academico}"))
+            .join(balance, balance.c.estudiante_id == discounts.c.estudiante_id)
+        ))
+        LedgerCRUD._refresh_pending(db, select(Payment.estudiante_id).where(in_run))
+        return LedgerCRUD._billing_summary(db, run_id, charged)
+
+    @staticmethod
+    def _billing_summary(db, run_id: str, charged: int = 0):
+        prefix = f"{run_id}:"
+        students, gross = db.execute(select(func.count(), func.coalesce(func.sum(Payment.monto), 0)).where(
+            Payment.referencia.startswith(prefix, autoescape=True))).one()
+        awarded, discount = db.execute(select(func.count(), func.coalesce(-func.sum(LedgerEntry.monto), 0)).where(
+            LedgerEntry.referencia.startswith(f"{prefix}B", autoescape=True))).one()
+        gross, discount = Decimal(str(gross)).quantize(Decimal('0.01')), Decimal(str(discount)).quantize(Decimal('0.01'))
+        return {'corrida': run_id, 'estudiantes': students, 'nuevos': charged, 'bruto': gross,
+                'becados': awarded, 'descuentos': discount, 'neto': gross - discount}
+
+    @staticmethod
+    def bill_period(anio_academico: int, semestre: str, tarifa_credito, run_id: str = None, fecha: datetime = None):
+        """Facturar la matrícula del periodo: créditos activos x tarifa, menos la mejor beca vigente.
+
+        Todo por conjuntos en una transacción: un INSERT ... SELECT en pago
+        con un cargo por estudiante (referencia '<run_id>:<estudiante_id>'),
+        su contabilización y un abono 'Beca' por cada descuento. Repetir la
+        misma corrida solo agrega a los estudiantes que falten; con otra
+        tarifa o periodo es un error. Retorna el resumen de la corrida.
+        """
+        try:
+            tarifa = Decimal(str(tarifa_credito)).quantize(Decimal('0.01'))
+            if tarifa <= 0:
+                raise ValueError("Rate per credit must be positive")
+            run_id = run_id or f"MAT-{anio_academico}-{''.join(word[0] for word in semestre.split())}"
+            if ':' in run_id or len(run_id) > 30:
+                raise ValueError("Run id must have at most 30 characters and no ':'")
+            return BaseCRUD.write(LedgerCRUD._bill, run_id, anio_academico, semestre, tarifa,
+                                  fecha or datetime.now())
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error billing period")
+
+    @staticmethod
+    def billing_summary(run_id: str):
+        """Resumen de una corrida ya ejecutada (None si no existe)"""
+        try:
+            summary = LedgerCRUD._billing_summary(session, run_id) if session.get(BillingRun, run_id) else None
+            session.commit()
+            return summary
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting billing summary")
+
+class LibraryCRUD(BaseCRUD):
+    """Préstamos de libros, con multas y estados al día por un proceso nocturno.
+
+    run_nightly acumula la multa de todos los préstamos abiertos atrasados
+    con un solo UPDATE (por el índice parcial de préstamos abiertos) y
+    corrige libro.estado con dos UPDATE por conjuntos. Prestar reserva el
+    libro con un UPDATE condicional, así que dos préstamos simultáneos del
+    mismo ejemplar no pueden tener éxito ambos.
+    """
+    FINE_PER_DAY = Decimal('5.00')
+    LOAN_DAYS = 14
+
+    @staticmethod
+    def _days_between(start, end):
+        """Días de start a end (fechas) como entero, en SQL"""
+        if session.get_bind().dialect.name == 'postgresql':
+            return end - start
+        return (func.julianday(end) - func.julianday(start)).cast(Integer)
+
+    @staticmethod
+    def _lent_out(book_id):
+        """book_id tiene un préstamo abierto (subconsulta no correlacionada sobre el índice parcial)"""
+        return book_id.in_(select(BookLoan.libro_id).where(BookLoan.fecha_devolucion_real.is_(None)))
+
+    @staticmethod
+    def _lend(db, libro_id: int, estudiante_id: int, fecha: date, dias: int):
+        books = Book.__table__
+        reserved = db.execute(update(books).where(books.c.id == libro_id, books.c.estado == 'Disponible')
+                              .values(estado='Prestado')).rowcount
+        if not reserved:
+            raise ValueError("Book not available")
+        return db.execute(insert(BookLoan.__table__).values(
+            libro_id=libro_id, estudiante_id=estudiante_id, fecha_prestamo=fecha,
+            fecha_devolucion=fecha + timedelta(days=dias), multa=0
+        ).returning(BookLoan.__table__.c.id)).scalar()
+
+    @staticmethod
+    def lend_book(libro_id: int, estudiante_id: int, dias: int = LOAN_DAYS, fecha: date = None):
+        """Prestar un libro disponible por `dias` días. Retorna el id del préstamo"""
+        try:
+            return BaseCRUD.write(LibraryCRUD._lend, libro_id, estudiante_id, fecha or date.today(), dias)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error lending book")
+
+    @staticmethod
+    def _return(db, prestamo_id: int, fecha: date):
+        loan = db.get(BookLoan, prestamo_id)
+        if not loan or loan.fecha_devolucion_real is not None:
+            raise ValueError("Open loan not found")
+        loan.fecha_devolucion_real = fecha
+        loan.multa = max((fecha - loan.fecha_devolucion).days, 0) * LibraryCRUD.FINE_PER_DAY
+        db.flush()
+        db.execute(update(Book.__table__).where(
+            Book.__table__.c.id == loan.libro_id, Book.__table__.c.estado == 'Prestado',
+            ~LibraryCRUD._lent_out(Book.__table__.c.id)
+        ).values(estado='Disponible'))
+        return loan.multa
+
+    @staticmethod
+    def return_book(prestamo_id: int, fecha: date = None):
+        """Registrar la devolución. Retorna la multa final"""
+        try:
+            return BaseCRUD.write(LibraryCRUD._return, prestamo_id, fecha or date.today())
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error returning book")
+
+    @staticmethod
+    def _nightly(db, today: date):
+        loans = BookLoan.__table__
+        books = Book.__table__
+        fine = LibraryCRUD._days_between(loans.c.fecha_devolucion, literal(today, Date)) * LibraryCRUD.FINE_PER_DAY
+        fines = db.execute(update(loans).where(
+            loans.c.fecha_devolucion_real.is_(None), loans.c.fecha_devolucion < today,
+            or_(loans.c.multa.is_(None), loans.c.multa != fine)
+        ).values(multa=fine)).rowcount
+        lent = db.execute(update(books).where(books.c.estado == 'Disponible', LibraryCRUD._lent_out(books.c.id))
+                          .values(estado='Prestado')).rowcount
+        available = db.execute(update(books).where(books.c.estado == 'Prestado', ~LibraryCRUD._lent_out(books.c.id))
+                               .values(estado='Disponible')).rowcount
+        return {'multas': fines, 'prestados': lent, 'disponibles': available}
+
+    @staticmethod
+    def run_nightly(today: date = None):
+        """Acumular multas de los préstamos atrasados y corregir estados de libros, por conjuntos.
+
+        Retorna cuántos préstamos cambiaron de multa y cuántos libros pasaron
+        a Prestado y a Disponible.
+        """
+        try:
+            return BaseCRUD.write(LibraryCRUD._nightly, today or date.today())
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error running library batch")
+
+    @staticmethod
+    def overdue(today: date = None, min_days: int = 1, estudiante_id: int = None):
+        """Préstamos abiertos con al menos min_days días de atraso, del más atrasado al menos.
+
+        Retorna OverdueLoanRecord; la multa es la acumulada por el último
+        proceso nocturno.
+        """
+        try:
+            today = today or date.today()
+            statement = select(
+                BookLoan.id, BookLoan.libro_id, Book.titulo, BookLoan.estudiante_id, Student.nombre,
+                Student.apellido, Student.email, BookLoan.fecha_prestamo, BookLoan.fecha_devolucion,
+                LibraryCRUD._days_between(BookLoan.fecha_devolucion, literal(today, Date)), BookLoan.multa
+            ).join(Book, Book.id == BookLoan.libro_id).join(Student, Student.id == BookLoan.estudiante_id).where(
+                BookLoan.fecha_devolucion_real.is_(None),
+                BookLoan.fecha_devolucion <= today - timedelta(days=min_days)
+            ).order_by(BookLoan.fecha_devolucion, BookLoan.id)
+            if estudiante_id:
+                statement = statement.where(BookLoan.estudiante_id == estudiante_id)
+            return BaseCRUD.fetch_records(statement, OverdueLoanRecord)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing overdue loans")
+
+class AuditCRUD(BaseCRUD):
+    """Consultas paginadas sobre auditoria_cambios.
+
+    La paginación es por cursor (fecha, id) en orden descendente: cada página
+    devuelve el cursor para pedir la siguiente. Los filtros por fecha se
+    aplican como rangos simples sobre la columna de partición para que
+    PostgreSQL descarte las particiones mensuales que no aplican.
+    """
+    DEFAULT_PAGE_SIZE = 50
+
+    @staticmethod
+    def _page(query, page_size: int, cursor):
+        if cursor:
+            cursor_fecha, cursor_id = cursor
+            # El rango simple permite la poda de particiones; la comparación
+            # de tuplas resuelve los empates dentro del mismo instante
+            query = query.filter(
+                AuditLog.fecha <= cursor_fecha,
+                tuple_(AuditLog.fecha, AuditLog.id) < tuple_(cursor_fecha, cursor_id)
+            )
+        rows = query.order_by(AuditLog.fecha.desc(), AuditLog.id.desc()).limit(page_size + 1).all()
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1].fecha, rows[-1].id)
+        return rows, next_cursor
+
+    @staticmethod
+    def get_record_history(tabla: str, id_registro: int, desde: datetime = None, hasta: datetime = None,
+                           page_size: int = DEFAULT_PAGE_SIZE, cursor=None):
+        """Historial de un registro (ej. estudiante X), más reciente primero.
+
+        Retorna (filas, siguiente_cursor); siguiente_cursor es None en la última página.
+        """
+        try:
+            query = session.query(AuditLog).filter(
+                AuditLog.tabla_afectada == tabla,
+                AuditLog.id_registro == id_registro
+            )
+            if desde:
+                query = query.filter(AuditLog.fecha >= desde)
+            if hasta:
+                query = query.filter(AuditLog.fecha < hasta)
+            return AuditCRUD._page(query, page_size, cursor)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error getting record history")
+
+    @staticmethod
+    def list_changes(desde: datetime, hasta: datetime = None, tabla: str = None, tipo_operacion: str = None,
+                     page_size: int = DEFAULT_PAGE_SIZE, cursor=None):
+        """Cambios en un rango de fechas (ej. la última semana).
+
+        `desde` es obligatorio para que la consulta solo toque las particiones
+        del rango. Retorna (filas, siguiente_cursor).
+        """
+        try:
+            query = session.query(AuditLog).filter(AuditLog.fecha >= desde)
+            if hasta:
+                query = query.filter(AuditLog.fecha < hasta)
+            if tabla:
+                query = query.filter(AuditLog.tabla_afectada == tabla)
+            if tipo_operacion:
+                query = query.filter(AuditLog.tipo_operacion == tipo_operacion)
+            return AuditCRUD._page(query, page_size, cursor)
+        except Exception as e:
+            BaseCRUD.handle_error(e, "Error listing changes")
+
+    @staticmethod
+    def list_recent_changes(days: int = 7, **filters):
+        """Atajo para list_changes sobre los últimos `days` días"""
+        return AuditCRUD.list_changes(datetime.now() - timedelta(days=days), **filters)
+
+class SyncCRUD:
+    """Sincronización masiva (upsert) desde padrones externos.
+
+    Cada fila se identifica por su llave natural (UPSERT_KEYS) y se escribe
+    con INSERT ... ON CONFLICT en un solo paso, sin SELECT previo por fila.
+    La política por columna decide qué pasa con un registro existente:
+        'overwrite'  reemplazar por el valor del padrón (por defecto)
+        'if_null'    completar solo si el valor actual es NULL
+        'keep'       no tocar
+    Una fila cuyo resultado sería igual al registro actual no se reescribe y
+    cuenta como sin cambios. Todas las filas deben traer las mismas columnas.
+    """
+    UPSERT_KEYS = {Student: 'email', Professor: 'email', Course: 'codigo'}
+    POLICIES = ('overwrite', 'if_null', 'keep')
+    DEFAULT_BATCH_SIZE = 500
+
+    @staticmethod
+    def _dialect_insert(table):
+        if session.get_bind().dialect.name == 'postgresql':
+            return postgresql.insert(table)
+        return sqlite.insert(table)
+
+    @staticmethod
+    def upsert(model, rows, policy: dict = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Insertar o actualizar `rows` (diccionarios por columna) de `model`.
+
+        Retorna {'insertadas': n, 'actualizadas': n, 'sin_cambios': n}. Todo
+        se confirma en una transacción; si algo falla no queda nada escrito.
+        """
+        key = SyncCRUD.UPSERT_KEYS.get(model)
+        if key is None:
+            raise ValueError(f"{model.__name__} no tiene llave natural para upsert")
+        policy = policy or {}
+        unknown = [column for column, rule in policy.items() if rule not in SyncCRUD.POLICIES]
+        if unknown:
+            raise ValueError(f"Política inválida para {', '.join(unknown)}. Opciones: {', '.join(SyncCRUD.POLICIES)}")
+
+        # Una fila por llave (la última gana): ON CONFLICT no puede tocar dos
+        # veces el mismo registro en una sentencia
+        by_key = {}
+        for row in rows:
+            if not row.get(key):
+                raise ValueError(f"Fila sin {key}: {row}")
+            by_key[row[key]] = row
+        rows = list(by_key.values())
+        counts = {'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0}
+        if not rows:
+            return counts
+
+        table = model.__table__
+        is_postgres = session.get_bind().dialect.name == 'postgresql'
+        try:
+            if not is_postgres:
+                # SQLite no tiene xmax: los ids nuevos son mayores que el máximo previo
+                max_id = session.execute(select(func.max(table.c.id))).scalar() or 0
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start:start + batch_size]
+                # Sin .values(): executemany con la sentencia cacheada, que
+                # SQLAlchemy agrupa en INSERT de varias filas (insertmanyvalues)
+                statement = SyncCRUD._dialect_insert(table)
+                excluded = statement.excluded
+                updates = {}
+                for column in batch[0]:
+                    rule = policy.get(column, 'overwrite')
+                    if column in (key, 'id') or rule == 'keep':
+                        continue
+                    if rule == 'if_null':
+                        updates[column] = func.coalesce(table.c[column], excluded[column])
+                    else:
+                        updates[column] = excluded[column]
+                if updates:
+                    statement = statement.on_conflict_do_update(
+                        index_elements=[table.c[key]],
+                        set_=updates,
+                        where=or_(*[table.c[column].is_distinct_from(value) for column, value in updates.items()])
+                    )
+                else:
+                    statement = statement.on_conflict_do_nothing(index_elements=[table.c[key]])
+                if is_postgres:
+                    statement = statement.returning(table.c.id, (sql_column('xmax') == 0).label('insertada'))
+                    returned = session.execute(statement, batch).all()
+                    inserted = sum(1 for row in returned if row.insertada)
+                else:
+                    returned = session.execute(statement.returning(table.c.id), batch).all()
+                    inserted = sum(1 for row in returned if row.id > max_id)
+                counts['insertadas'] += inserted
+                counts['actualizadas'] += len(returned) - inserted
+                counts['sin_cambios'] += len(batch) - len(returned)
+            session.commit()
+            return counts
+        except Exception as e:
+            BaseCRUD.handle_error(e, f"Error upserting {table.name}")
+
+    @staticmethod
+    def upsert_students(rows, policy: dict = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Upsert de estudiantes por email"""
+        return SyncCRUD.upsert(Student, rows, policy, batch_size)
+
+    @staticmethod
+    def upsert_professors(rows, policy: dict = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Upsert de profesores por email (invalida la caché de carga docente)"""
+        result = SyncCRUD.upsert(Professor, rows, policy, batch_size)
+        professor_workload.invalidate()
+        return result
+
+    @staticmethod
+    def upsert_courses(rows, policy: dict = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        """Upsert de cursos por código"""
+        return SyncCRUD.upsert(Course, rows, policy, batch_size)
+
 class UniversityCRUD:
     def __init__(self):
         self.faculty = FacultyCRUD()
         self.student = StudentCRUD()
         self.professor = ProfessorCRUD()
         self.course = CourseCRUD()
-        self.enrollment = EnrollmentCRUD()
\ No newline at end of file
+        self.enrollment = EnrollmentCRUD()
+        self.audit = AuditCRUD()
+        self.seats = SeatCRUD()
+        self.waitlist = WaitlistCRUD()
+        self.attendance = AttendanceCRUD()
+        self.grades = GradeCRUD()
+        self.ledger = LedgerCRUD()
+        self.library = LibraryCRUD()
+        self.sync = SyncCRUD()
\ No newline at end of file
@@ -1,21 +1,22 @@
 from models import session, Faculty, Department, Major, Student, Professor, Course, Enrollment
+from snapshots import DatabaseSnapshots
 from faker import Faker
+import argparse
 import random
 from datetime import date, datetime
 
 fake = Faker(['es_ES', 'en_US'])  # Usar datos en español e inglés
 
 def clear_existing_data():
-    """Limpiar datos existentes si los hay"""
+    """Limpiar datos existentes si los hay.
+
+    TRUNCATE en PostgreSQL: no dispara la auditoría por fila y reinicia los id.
+    """
     try:
-        session.query(Enrollment).delete()
-        session.query(Course).delete()
-        session.query(Student).delete()
-        session.query(Professor).delete()
-        session.query(Major).delete()
-        session.query(Department).delete()
-        session.query(Faculty).delete()
-        session.commit()
+        DatabaseSnapshots().truncate([
+            Enrollment.__tablename__, Course.__tablename__, Student.__tablename__, Professor.__tablename__,
+            Major.__tablename__, Department.__tablename__, Faculty.__tablename__
+        ])
         print("✅ Datos existentes limpiados")
     except Exception as e:
         session.rollback()
@@ -143,10 +144,10 @@ def generate_majors(faculties):
     print(f"✅ {len(majors)} carreras creadas")
     return majors
 
-def generate_professors(departments):
+def generate_professors(departments, count=200):
     """Generar profesores"""
     professors = []
-    for _ in range(200):  # 200 profesores
+    for _ in range(count):  # 200 profesores por defecto
         department = random.choice(departments)
         professor = Professor(
             nombre=fake.first_name(),
@@ -169,12 +170,12 @@ def generate_professors(departments):
     print(f"✅ {len(professors)} profesores creados")
     return professors
 
-def generate_students(majors):
+def generate_students(majors, count=1000):
     """Generar estudiantes"""
     students = []
     major_ids = [major.id for major in majors]
     
-    for i in range(1000):  # 1000 estudiantes
+    for i in range(count):  # 1000 estudiantes por defecto
         major_id = random.choice(major_ids) if random.random() > 0.1 else None  # 10% sin carrera
         
         student = Student(
@@ -204,12 +205,16 @@ def generate_courses(majors):
     """Generar cursos"""
     courses = []
     course_prefixes = ['MAT', 'FIS', 'QUI', 'BIO', 'ING', 'MED', 'DER', 'ECO', 'PSI', 'COM']
+    used_codes = set()  # curso.codigo es UNIQUE
     
     for major in majors:
         # 5-10 cursos por carrera
         for i in range(random.randint(5, 10)):
-            prefix = random.choice(course_prefixes)
-            code = f"{prefix}{random.randint(1000, 9999)}"
+            code = None
+            while code is None or code in used_codes:
+                prefix = random.choice(course_prefixes)
+                code = f"{prefix}{random.randint(1000, 9999)}"
+            used_codes.add(code)
             
             course = Course(
                 codigo=code,
@@ -225,17 +230,19 @@ def generate_courses(majors):
     print(f"✅ {len(courses)} cursos creados")
     return courses
 
-def generate_enrollments(students, courses):
+def generate_enrollments(students, courses, max_students=500):
     """Generar matrículas"""
     enrollments = []
     # Usar los valores EXACTOS del ENUM tipo_semestre
     semesters = ['Primer Semestre', 'Segundo Semestre', 'Verano']  # ← VALORES CORRECTOS
     grades = ['A', 'B', 'C', 'D', 'F', None]  # None para cursos en progreso
     estados = ['Activa', 'Finalizada', 'Retirada']  # Usar valores del ENUM estado_matricula
+    current_year = datetime.now().year
+    academic_years = [current_year - 2, current_year - 1, current_year]
     
     active_students = [s for s in students if s.estado == 'Activo']
     
-    for student in active_students[:500]:  # Solo 500 estudiantes activos
+    for student in active_students[:max_students]:  # Solo 500 estudiantes activos por defecto
         # Cada estudiante se matricula en 3-6 cursos
         student_courses = random.sample(courses, min(random.randint(3, 6), len(courses)))
         
@@ -243,6 +250,7 @@ def generate_enrollments(students, courses):
             enrollment = Enrollment(
                 estudiante_id=student.id,
                 curso_id=course.id,
+                anio_academico=random.choice(academic_years),
                 semestre=random.choice(semesters),  # Usar valores válidos del ENUM
                 calificacion=random.choice(grades),
                 estado=random.choice(estados),      # Usar valores válidos del ENUM
@@ -260,8 +268,12 @@ def generate_enrollments(students, courses):
     
     return enrollments
 
-def main():
-    """Función principal para generar todos los datos"""
+def main(scale=1):
+    """Función principal para generar todos los datos.
+
+    `scale` multiplica profesores, estudiantes y estudiantes matriculados
+    (escala 10 = 2000 profesores, 10000 estudiantes) para pruebas de rendimiento.
+    """
     print("🚀 Iniciando generación de datos de prueba...")
     
     # 1. Limpiar datos existentes
@@ -271,10 +283,10 @@ def main():
     faculties = generate_faculties()
     departments = generate_departments(faculties)
     majors = generate_majors(faculties)
-    professors = generate_professors(departments)
-    students = generate_students(majors)
+    professors = generate_professors(departments, count=200 * scale)
+    students = generate_students(majors, count=1000 * scale)
     courses = generate_courses(majors)
-    enrollments = generate_enrollments(students, courses)
+    enrollments = generate_enrollments(students, courses, max_students=500 * scale)
     
     # 3. Resumen final
     print("\n📊 RESUMEN DE DATOS GENERADOS:")
@@ -291,4 +303,6 @@ def main():
     print("🎯 Ahora tienes más de 1000 registros de prueba coherentes y variados.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generar datos de prueba")
+    parser.add_argument('--escala', type=int, default=1, help="Multiplicador del volumen de datos")
+    main(scale=parser.parse_args().escala)
\ No newline at end of file
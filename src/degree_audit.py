@@ -0,0 +1,220 @@
+'''
+Auditoría de avance de carrera para todos los estudiantes.
+
+    python degree_audit.py                         # estudiantes activos, resumen por carrera
+    python degree_audit.py --carrera 3 --csv       # reporte en reports/
+    python degree_audit.py --estudiante 125        # detalle de un estudiante
+    python degree_audit.py --atrasados --csv       # solo quienes no terminan a tiempo
+
+Para cada estudiante: créditos aprobados frente a carrera.creditos_totales,
+créditos en curso, cursos de su carrera que le faltan y año de graduación
+nominal (fecha_ingreso + duracion_anos) y proyectado según su ritmo de
+créditos por año.
+
+En lugar de navegar student.enrollments -> course por estudiante, se hacen
+cuatro consultas para todo el conjunto: carreras, plan de cursos,
+estudiantes y un agregado por estudiante (GROUP BY en la base) con sus
+créditos y la lista de cursos aprobados de su carrera, leído en lotes. Esos
+cursos se acumulan como máscara de bits y los faltantes salen de
+plan[carrera] & ~aprobados. Las lecturas van a la réplica si hay (replicas.py).
+'''
+
+from models import Student, Major, Course, Enrollment
+from replicas import read_session, run_on_replica
+from prerequisites import PASSING_GRADES
+from sqlalchemy import select, func, case, cast, String
+from collections import namedtuple
+from datetime import date, datetime
+import argparse
+import time
+
+DegreeAuditRecord = namedtuple('DegreeAuditRecord', [
+    'estudiante_id', 'nombre', 'apellido', 'carrera_id', 'carrera', 'estado', 'fecha_ingreso',
+    'creditos_aprobados', 'creditos_en_curso', 'creditos_carrera', 'avance_pct',
+    'cursos_faltantes', 'faltantes', 'graduacion_nominal', 'graduacion_proyectada', 'atrasado'
+])
+
+ROW_BATCH_SIZE = 10000
+
+
+class DegreeAudit:
+    def __init__(self, reference_date: date = None):
+        self.reference_date = reference_date or date.today()
+
+    def _student_filter(self, statement, carrera_id=None, estado=None, student_ids=None):
+        if carrera_id:
+            statement = statement.where(Student.carrera_id == carrera_id)
+        if estado:
+            statement = statement.where(Student.estado == estado)
+        if student_ids:
+            statement = statement.where(Student.id.in_(student_ids))
+        return statement
+
+    def _load(self, carrera_id=None, estado=None, student_ids=None):
+        majors = {row.id: row for row in read_session.execute(
+            select(Major.id, Major.nombre, Major.duracion_anos, Major.creditos_totales)
+        )}
+
+        # Plan de cada carrera como máscara de bits sobre los cursos
+        courses = read_session.execute(
+            select(Course.id, Course.codigo, Course.carrera_id).order_by(Course.id)
+        ).all()
+        self.course_bit = {}
+        self.course_codes = []
+        self.plan = dict.fromkeys(majors, 0)
+        for position, course in enumerate(courses):
+            self.course_bit[course.id] = 1 << position
+            self.course_codes.append(course.codigo)
+            self.plan[course.carrera_id] = self.plan.get(course.carrera_id, 0) | (1 << position)
+
+        students = read_session.execute(self._student_filter(
+            select(Student.id, Student.nombre, Student.apellido, Student.carrera_id,
+                   Student.fecha_ingreso, Student.estado),
+            carrera_id, estado, student_ids
+        ).order_by(Student.id)).all()
+
+        # Una fila por estudiante: créditos aprobados y en curso (cada curso
+        # cuenta una vez aunque se haya repetido) y la lista de cursos
+        # aprobados de su carrera, agregados en la base
+        selected = self._student_filter(select(Student.id), carrera_id, estado, student_ids)
+        per_course = select(
+            Enrollment.estudiante_id, Enrollment.curso_id,
+            func.max(case((Enrollment.calificacion.in_(PASSING_GRADES), 1), else_=0)).label('aprobado'),
+            func.max(case(((Enrollment.estado == 'Activa') & Enrollment.calificacion.is_(None), 1),
+                          else_=0)).label('en_curso'),
+        ).where(Enrollment.estudiante_id.in_(selected)).group_by(Enrollment.estudiante_id, Enrollment.curso_id).subquery()
+        approved = per_course.c.aprobado == 1
+        in_major = approved & (Course.carrera_id == Student.carrera_id)
+        rows = read_session.execute(
+            select(
+                per_course.c.estudiante_id,
+                func.sum(case((approved, Course.creditos), else_=0)).label('aprobados'),
+                func.sum(case((~approved & (per_course.c.en_curso == 1), Course.creditos), else_=0)).label('en_curso'),
+                self._id_list(case((in_major, per_course.c.curso_id))).label('cursos_carrera'),
+            )
+            .join(Course, Course.id == per_course.c.curso_id)
+            .join(Student, Student.id == per_course.c.estudiante_id)
+            .group_by(per_course.c.estudiante_id),
+            execution_options={'yield_per': ROW_BATCH_SIZE}
+        )
+        credits = {}
+        passed_masks = {}
+        course_bit = self.course_bit
+        for estudiante_id, aprobados, en_curso, cursos_carrera in rows:
+            credits[estudiante_id] = (int(aprobados or 0), int(en_curso or 0))
+            mask = 0
+            if cursos_carrera:
+                for curso_id in cursos_carrera.split(','):
+                    mask |= course_bit[int(curso_id)]
+            passed_masks[estudiante_id] = mask
+        return majors, students, credits, passed_masks
+
+    @staticmethod
+    def _id_list(column):
+        """Ids agregados como texto separado por comas (los NULL se omiten)"""
+        if read_session.get_bind().dialect.name == 'postgresql':
+            return func.string_agg(cast(column, String), ',')
+        return func.group_concat(column)
+
+    def _decode(self, mask: int):
+        codes = []
+        while mask:
+            low = mask & -mask
+            codes.append(self.course_codes[low.bit_length() - 1])
+            mask ^= low
+        return codes
+
+    def _projection(self, fecha_ingreso, approved: int, total: int):
+        """Año proyectado de graduación al ritmo actual de créditos por año"""
+        reference = self.reference_date
+        if approved >= total:
+            return reference.year
+        if not fecha_ingreso or approved <= 0:
+            return None
+        years = max((reference - fecha_ingreso).days / 365.25, 0.5)
+        remaining_years = (total - approved) / (approved / years)
+        return int(reference.year + (reference.timetuple().tm_yday - 1) / 365.25 + remaining_years)
+
+    def run(self, carrera_id: int = None, estado: str = 'Activo', student_ids=None, only_late: bool = False):
+        """Auditoría de los estudiantes filtrados. Retorna una lista de DegreeAuditRecord"""
+        def read():
+            return self._load(carrera_id, estado, student_ids)
+        majors, students, credits, passed_masks = run_on_replica(read)
+
+        records = []
+        for student in students:
+            major = majors.get(student.carrera_id)
+            approved, in_progress = credits.get(student.id, (0, 0))
+            total = major.creditos_totales if major else 0
+            missing = self._decode(self.plan.get(student.carrera_id, 0) & ~passed_masks.get(student.id, 0))
+            nominal = student.fecha_ingreso.year + major.duracion_anos if major and student.fecha_ingreso else None
+            projected = self._projection(student.fecha_ingreso, approved, total) if major else None
+            late = projected is None or (nominal is not None and projected > nominal)
+            if only_late and not late:
+                continue
+            records.append(DegreeAuditRecord(
+                student.id, student.nombre, student.apellido, student.carrera_id,
+                major.nombre if major else None, student.estado, student.fecha_ingreso,
+                approved, in_progress, total,
+                round(100 * min(approved, total) / total, 1) if total else 0.0,
+                len(missing), ';'.join(missing), nominal, projected, late
+            ))
+        return records
+
+    def audit_student(self, estudiante_id: int):
+        """Auditoría de un estudiante (cualquier estado), o None si no existe"""
+        records = self.run(estado=None, student_ids=[estudiante_id])
+        return records[0] if records else None
+
+    @staticmethod
+    def summarize(records):
+        """Resumen por carrera: estudiantes, avance promedio y atrasados"""
+        by_major = {}
+        for record in records:
+            row = by_major.setdefault(record.carrera, {'carrera': record.carrera, 'estudiantes': 0,
+                                                       'avance_promedio': 0.0, 'atrasados': 0})
+            row['estudiantes'] += 1
+            row['avance_promedio'] += record.avance_pct
+            row['atrasados'] += record.atrasado
+        for row in by_major.values():
+            row['avance_promedio'] = round(row['avance_promedio'] / row['estudiantes'], 1)
+        return sorted(by_major.values(), key=lambda row: row['carrera'] or '')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auditoría de avance de carrera")
+    parser.add_argument('--carrera', type=int, help="ID de carrera")
+    parser.add_argument('--estado', default='Activo', help="Estado de los estudiantes ('' = todos)")
+    parser.add_argument('--estudiante', type=int, help="Detalle de un estudiante")
+    parser.add_argument('--atrasados', action='store_true', help="Solo quienes no terminan en el plazo nominal")
+    parser.add_argument('--csv', action='store_true', help="Exportar a reports/")
+    args = parser.parse_args()
+
+    audit = DegreeAudit()
+    if args.estudiante:
+        record = audit.audit_student(args.estudiante)
+        if not record:
+            print("❌ Estudiante no encontrado")
+            return
+        for field, value in record._asdict().items():
+            print(f"  {field:<22} {value}")
+        return
+
+    start = time.perf_counter()
+    records = audit.run(args.carrera, args.estado or None, only_late=args.atrasados)
+    elapsed = time.perf_counter() - start
+    print(f"🎓 {len(records)} estudiantes auditados en {elapsed:.2f} s")
+    print("{:<40} {:>12} {:>10} {:>10}".format("Carrera", "Estudiantes", "Avance %", "Atrasados"))
+    print("-" * 76)
+    for row in DegreeAudit.summarize(records):
+        print("{:<40} {:>12} {:>10} {:>10}".format(str(row['carrera'])[:40], row['estudiantes'],
+                                                   row['avance_promedio'], row['atrasados']))
+
+    if args.csv and records:
+        from reports import ReportGenerator
+        filename = f"auditoria_carrera_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(records, filename)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+'''
+Administración de las particiones de matricula por periodo académico.
+
+En PostgreSQL matricula está particionada por anio_academico y cada año por
+semestre (ver crear_particion_matricula en schema.sql). Este módulo crea las
+particiones de años nuevos y archiva los periodos cerrados:
+
+    python enrollment_partitions.py --crear 2026
+    python enrollment_partitions.py --listar
+    python enrollment_partitions.py --cerrar 2022 "Primer Semestre" --tablespace archivo
+    python enrollment_partitions.py --cerrar 2021 --separar
+
+Mover un periodo a otro tablespace (ej. disco más barato) lo mantiene visible
+para los reportes; separarlo (DETACH) lo saca de matricula por completo.
+'''
+
+from models import session, engine, Enrollment
+from sqlalchemy import func, text
+import argparse
+
+SEMESTER_SUFFIXES = {
+    'Primer Semestre': 'primer',
+    'Verano': 'verano',
+    'Segundo Semestre': 'segundo',
+}
+
+
+def _require_postgres():
+    if engine.dialect.name != 'postgresql':
+        raise ValueError("El particionamiento de matrículas solo aplica a PostgreSQL")
+
+
+def partition_name(anio_academico: int, semestre: str = None) -> str:
+    name = f"matricula_{anio_academico}"
+    if semestre:
+        if semestre not in SEMESTER_SUFFIXES:
+            raise ValueError(f"Semestre no válido: {semestre}")
+        name = f"{name}_{SEMESTER_SUFFIXES[semestre]}"
+    return name
+
+
+class EnrollmentPartitions:
+    @staticmethod
+    def ensure_year(anio_academico: int) -> str:
+        """Crear la partición del año (y sus semestres) si no existe"""
+        _require_postgres()
+        try:
+            name = session.execute(
+                text("SELECT crear_particion_matricula(:anio)"), {'anio': anio_academico}
+            ).scalar()
+            session.commit()
+            return name
+        except Exception as e:
+            session.rollback()
+            raise ValueError(f"Error creando partición de matrícula: {str(e)}")
+
+    @staticmethod
+    def list_partitions():
+        """Particiones hoja: [(nombre, límites, tablespace, filas estimadas)]"""
+        _require_postgres()
+        return session.execute(text("""
+            SELECT c.relname,
+                   pg_get_expr(c.relpartbound, c.oid) AS limites,
+                   COALESCE(t.spcname, 'pg_default') AS tablespace,
+                   c.reltuples::BIGINT AS filas
+            FROM pg_partition_tree('matricula') pt
+            JOIN pg_class c ON c.oid = pt.relid
+            LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace
+            WHERE pt.isleaf
+            ORDER BY c.relname
+        """)).all()
+
+    @staticmethod
+    def close_period(anio_academico: int, semestre: str = None, tablespace: str = None,
+                     detach: bool = False, force: bool = False):
+        """Archivar un periodo cerrado (un semestre o el año completo).
+
+        Falla si el periodo aún tiene matrículas 'Activa', salvo con force=True.
+        """
+        _require_postgres()
+        if not tablespace and not detach:
+            raise ValueError("Indique un tablespace de destino o detach=True")
+
+        query = session.query(func.count()).select_from(Enrollment).filter(
+            Enrollment.anio_academico == anio_academico,
+            Enrollment.estado == 'Activa'
+        )
+        if semestre:
+            query = query.filter(Enrollment.semestre == semestre)
+        active = query.scalar()
+        if active and not force:
+            raise ValueError(f"El periodo tiene {active} matrículas activas; cerrar el semestre primero")
+
+        name = partition_name(anio_academico, semestre)
+        semesters = [semestre] if semestre else list(SEMESTER_SUFFIXES)
+        try:
+            if tablespace:
+                # SET TABLESPACE solo aplica a particiones hoja (las que tienen datos)
+                for leaf in semesters:
+                    session.execute(text(
+                        f'ALTER TABLE "{partition_name(anio_academico, leaf)}" SET TABLESPACE "{tablespace}"'
+                    ))
+            if detach:
+                parent = partition_name(anio_academico) if semestre else 'matricula'
+                session.execute(text(f'ALTER TABLE "{parent}" DETACH PARTITION "{name}"'))
+            session.commit()
+            return name
+        except Exception as e:
+            session.rollback()
+            raise ValueError(f"Error archivando periodo {name}: {str(e)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones de matrícula por periodo académico")
+    parser.add_argument('--crear', type=int, metavar='ANIO', help="Crear la partición de un año académico")
+    parser.add_argument('--listar', action='store_true', help="Listar particiones hoja")
+    parser.add_argument('--cerrar', nargs='+', metavar=('ANIO', 'SEMESTRE'), help="Archivar un periodo cerrado")
+    parser.add_argument('--tablespace', help="Tablespace de destino para --cerrar")
+    parser.add_argument('--separar', action='store_true', help="Separar (DETACH) el periodo con --cerrar")
+    parser.add_argument('--forzar', action='store_true', help="Archivar aunque haya matrículas activas")
+    args = parser.parse_args()
+
+    try:
+        if args.crear:
+            print(f"✅ Partición lista: {EnrollmentPartitions.ensure_year(args.crear)}")
+        if args.cerrar:
+            anio = int(args.cerrar[0])
+            semestre = ' '.join(args.cerrar[1:]) or None
+            name = EnrollmentPartitions.close_period(anio, semestre, args.tablespace, args.separar, args.forzar)
+            print(f"✅ Periodo archivado: {name}")
+        if args.listar:
+            print("{:<28} {:<40} {:<15} {:>10}".format("Partición", "Límites", "Tablespace", "Filas"))
+            print("-" * 96)
+            for row in EnrollmentPartitions.list_partitions():
+                print("{:<28} {:<40} {:<15} {:>10}".format(row.relname, row.limites, row.tablespace, row.filas))
+    except ValueError as e:
+        print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
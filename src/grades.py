@@ -0,0 +1,138 @@
+'''
+Calificaciones: nota final ponderada por evaluaciones y cierre por curso.
+
+    python grades.py calcular --curso 12 --csv         # vista previa, no escribe
+    python grades.py cerrar --curso 12                 # escribir matricula.calificacion
+    python grades.py simular --curso 12                # evaluaciones y notas al azar, cierre y verificación
+
+La API está en cruds.GradeCRUD (crud.grades): record_scores guarda las notas
+de una evaluación para todos los estudiantes en una transacción y
+close_grades escribe la letra de toda la sección con un solo UPDATE. Sin
+--anio/--semestre se usa el periodo vigente. simular compara al final cada
+calificación con la calculada en Python desde nota_evaluacion.
+'''
+
+from models import session, Enrollment, Evaluation, EvaluationScore, current_academic_period, academic_period_range
+from cruds import UniversityCRUD, GradeCRUD
+from reports import ReportGenerator
+from sqlalchemy import select, func
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+SIMULATED_EVALUATIONS = (('Parcial 1', 'Parcial', 25), ('Parcial 2', 'Parcial', 25),
+                         ('Proyecto', 'Proyecto', 20), ('Examen Final', 'Examen Final', 30))
+
+
+def busiest_course(anio_academico: int, semestre: str):
+    """Curso con más matrícula activa en el periodo"""
+    course_id = session.execute(select(Enrollment.curso_id).where(
+        Enrollment.anio_academico == anio_academico, Enrollment.semestre == semestre, Enrollment.estado == 'Activa'
+    ).group_by(Enrollment.curso_id).order_by(func.count().desc()).limit(1)).scalar()
+    session.commit()
+    return course_id
+
+
+def simulate(crud, curso_id: int, anio_academico: int, semestre: str, seed: int = 42):
+    """Crear las evaluaciones que falten y registrar notas al azar para toda la matrícula"""
+    rng = random.Random(seed)
+    start, end = academic_period_range(anio_academico, semestre)
+    evaluations = session.execute(select(Evaluation).where(
+        Evaluation.curso_id == curso_id, Evaluation.fecha >= start, Evaluation.fecha < end)).scalars().all()
+    if not evaluations:
+        evaluations = [crud.grades.create_evaluation(curso_id, nombre, tipo, start + timedelta(days=30 * (index + 1)),
+                                                     porcentaje)
+                       for index, (nombre, tipo, porcentaje) in enumerate(SIMULATED_EVALUATIONS)]
+    roster = session.execute(select(Enrollment.estudiante_id).where(
+        Enrollment.curso_id == curso_id, Enrollment.anio_academico == anio_academico,
+        Enrollment.semestre == semestre, Enrollment.estado != 'Retirada')).scalars().all()
+    evaluation_ids = [evaluation.id for evaluation in evaluations]
+    session.commit()
+    ability = {estudiante_id: rng.uniform(40, 100) for estudiante_id in roster}
+    for evaluacion_id in evaluation_ids:
+        # Algunos estudiantes no presentan cada evaluación
+        crud.grades.record_scores(evaluacion_id, {
+            estudiante_id: round(min(100, max(0, rng.gauss(ability[estudiante_id], 10))), 2)
+            for estudiante_id in roster if rng.random() < 0.95
+        })
+    return len(roster)
+
+
+def expected_grades(curso_id: int, anio_academico: int, semestre: str):
+    """Calificaciones calculadas en Python, una evaluación a la vez (para verificar)"""
+    start, end = academic_period_range(anio_academico, semestre)
+    weights = dict(session.execute(select(Evaluation.id, Evaluation.porcentaje).where(
+        Evaluation.curso_id == curso_id, Evaluation.fecha >= start, Evaluation.fecha < end)).all())
+    roster = session.execute(select(Enrollment.estudiante_id).where(
+        Enrollment.curso_id == curso_id, Enrollment.anio_academico == anio_academico,
+        Enrollment.semestre == semestre, Enrollment.estado != 'Retirada')).scalars().all()
+    scores = {}
+    for evaluacion_id, estudiante_id, nota in session.execute(select(
+            EvaluationScore.evaluacion_id, EvaluationScore.estudiante_id, EvaluationScore.nota
+    ).where(EvaluationScore.evaluacion_id.in_(list(weights)))):
+        scores.setdefault(estudiante_id, {})[evaluacion_id] = float(nota)
+    session.commit()
+    total = sum(float(weight) for weight in weights.values())
+    expected = {}
+    for estudiante_id in roster:
+        own = scores.get(estudiante_id, {})
+        if not own:
+            expected[estudiante_id] = 'NP'
+            continue
+        final = round(sum(own.get(evaluacion_id, 0) * float(weight) for evaluacion_id, weight in weights.items())
+                      / total, 2)
+        expected[estudiante_id] = next((grade for grade, minimum in GradeCRUD.GRADE_SCALE if final >= minimum), 'F')
+    return expected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calificaciones ponderadas por evaluación")
+    parser.add_argument('accion', choices=['calcular', 'cerrar', 'simular'])
+    parser.add_argument('--curso', type=int, help="ID del curso (simular: por defecto el de más matrícula)")
+    parser.add_argument('--anio', type=int)
+    parser.add_argument('--semestre')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--csv', action='store_true', help="Exportar la vista previa a reports/")
+    args = parser.parse_args()
+
+    year, semester = current_academic_period()
+    year, semester = args.anio or year, args.semestre or semester
+    crud = UniversityCRUD()
+    course_id = args.curso or (busiest_course(year, semester) if args.accion == 'simular' else None)
+    if not course_id:
+        parser.error("Indique --curso")
+
+    if args.accion == 'calcular':
+        records = crud.grades.compute_grades(course_id, year, semester)
+        print(f"📝 {len(records)} estudiantes del curso {course_id} en {year} {semester}")
+        for record in records[:20]:
+            print(f"  {record.estudiante_id:<8} {record.nombre} {record.apellido}: {record.nota_final} "
+                  f"({record.calificacion})")
+        if args.csv and records:
+            filename = f"calificaciones_{course_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+            print(f"\n📄 {ReportGenerator.export_to_csv(records, filename)}")
+        return
+
+    if args.accion == 'simular':
+        start = time.perf_counter()
+        students = simulate(crud, course_id, year, semester, args.semilla)
+        print(f"🎲 Notas de {students} estudiantes registradas en {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    distribution = crud.grades.close_grades(course_id, year, semester)
+    print(f"✅ Curso {course_id} cerrado en {(time.perf_counter() - start) * 1000:.1f} ms: "
+          + ', '.join(f"{grade}: {total}" for grade, total in sorted(distribution.items(), key=lambda i: str(i[0]))))
+
+    if args.accion == 'simular':
+        actual = dict(session.execute(select(Enrollment.estudiante_id, Enrollment.calificacion).where(
+            Enrollment.curso_id == course_id, Enrollment.anio_academico == year, Enrollment.semestre == semester,
+            Enrollment.estado != 'Retirada')).all())
+        session.commit()
+        print("✅ Calificaciones iguales a las calculadas en Python"
+              if actual == expected_grades(course_id, year, semester)
+              else "❌ Las calificaciones difieren de las calculadas en Python")
+
+
+if __name__ == "__main__":
+    main()
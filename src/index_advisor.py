@@ -0,0 +1,353 @@
+'''
+Asesor de índices para las consultas de reportes y CRUD.
+
+Pasa cada forma de consulta (los reportes de ReportGenerator y las consultas
+de cruds.py) por EXPLAIN, detecta recorridos secuenciales y ordenamientos
+sobre tablas grandes y propone índices compuestos, parciales o de expresión
+del catálogo CANDIDATES. Luego crea cada índice propuesto, vuelve a medir
+las consultas afectadas y lo elimina. Con --aplicar lo conserva si alguna
+consulta mejora al menos --mejora-minima % (10 por defecto) y su plan deja
+de recorrer una tabla completa o de ordenar.
+
+    python index_advisor.py                        # analizar la base configurada
+    python index_advisor.py --generar --escala 10  # regenerar datos escalados (¡borra los datos!)
+    python index_advisor.py --aplicar --csv        # conservar los índices que mejoran y exportar
+
+Funciona con PostgreSQL (EXPLAIN FORMAT JSON) y SQLite (EXPLAIN QUERY PLAN).
+'''
+
+from models import session, engine, Student, Professor, Course, Enrollment, Major, Department, AuditLog, init_sqlite_schema, current_academic_period, academic_period_range
+from reports import ReportGenerator
+from sqlalchemy import func
+from collections import namedtuple
+from datetime import datetime
+import argparse
+import re
+import statistics
+import time
+
+LARGE_TABLES = ('estudiante', 'profesor', 'curso', 'matricula', 'auditoria_cambios')
+
+PlanSummary = namedtuple('PlanSummary', ['full_scans', 'sorts', 'text'])
+Measurement = namedtuple('Measurement', ['shape', 'sql', 'plan', 'ms'])
+IndexCandidate = namedtuple('IndexCandidate', ['name', 'table', 'trigger', 'ddl', 'ddl_sqlite', 'reason'])
+AdvisorResult = namedtuple('AdvisorResult', [
+    'indice', 'tabla', 'consulta', 'ms_antes', 'ms_despues', 'mejora_pct', 'plan_mejorado',
+    'plan_antes', 'plan_despues', 'razon'
+])
+# Mejora mínima (%) para conservar un índice con --aplicar: por debajo, la
+# diferencia de medianas suele ser ruido de medición
+MIN_IMPROVEMENT_PCT = 10.0
+
+
+def _first_id(column):
+    """Un id existente para parametrizar las consultas (1 si la tabla está vacía)"""
+    return session.query(func.min(column)).scalar() or 1
+
+
+def _sample_period():
+    """Último periodo con matrículas, el vigente de los datos (el del calendario si no hay)"""
+    year = session.query(func.max(Enrollment.anio_academico)).scalar()
+    if year is None:
+        return current_academic_period()
+    semesters = [semester for (semester,) in session.query(Enrollment.semestre)
+                 .filter(Enrollment.anio_academico == year).distinct()]
+    return year, max(semesters, key=lambda semester: academic_period_range(year, semester)[0])
+
+
+def _sample_year():
+    return _sample_period()[0]
+
+
+def _sample_semester():
+    return _sample_period()[1]
+
+
+# Formas de consulta: nombre -> función que construye la consulta sin ejecutarla.
+# Los parámetros son representativos del uso desde main.py y se toman de los
+# datos (no de la fecha de hoy), para que los datos generados con semilla fija
+# den siempre las mismas consultas.
+QUERY_SHAPES = {
+    'reporte_estudiantes_estado_ingreso': lambda: ReportGenerator.build_students_by_faculty_query(
+        status='Activo', year_from=_sample_year() - 2, year_to=_sample_year() - 1),
+    'reporte_estudiantes_facultad': lambda: ReportGenerator.build_students_by_faculty_query(
+        faculty_id=_first_id(Major.facultad_id), status='Activo'),
+    'reporte_cursos_semestre': lambda: ReportGenerator.build_courses_by_semester_query(
+        semester=_sample_semester(), min_credits=3, academic_year=_sample_year()),
+    'reporte_matriculas_activas_periodo': lambda: ReportGenerator.build_active_enrollments_query(
+        academic_year=_sample_year(), semester=_sample_semester()),
+    'reporte_profesores_departamento': lambda: ReportGenerator.build_professors_by_department_query(
+        department_id=_first_id(Professor.departamento_id), active_only=True, min_salary=20000),
+    'reporte_profesores_anio_contratacion': lambda: ReportGenerator.build_professors_by_department_query(
+        hire_year=_sample_year() - 5),
+    'crud_list_students': lambda: session.query(Student)
+        .join(Major, Student.carrera_id == Major.id, isouter=True)
+        .order_by(Student.apellido, Student.nombre),
+    'crud_list_professors': lambda: session.query(Professor).join(Department)
+        .order_by(Professor.apellido, Professor.nombre),
+    'crud_list_courses': lambda: session.query(Course).join(Major).order_by(Course.codigo),
+    'crud_get_student': lambda: session.query(Student).filter(Student.id == _first_id(Student.id)),
+    'matricula_activa_por_curso': lambda: session.query(Enrollment).filter(
+        Enrollment.curso_id == _first_id(Enrollment.curso_id),
+        Enrollment.anio_academico == _sample_year(),
+        Enrollment.semestre == _sample_semester(),
+        Enrollment.estado == 'Activa'),
+    'auditoria_historial_estudiante': lambda: session.query(AuditLog).filter(
+        AuditLog.tabla_afectada == 'estudiante',
+        AuditLog.id_registro == _first_id(Student.id)
+    ).order_by(AuditLog.fecha.desc(), AuditLog.id.desc()).limit(50),
+}
+
+# Catálogo de índices candidatos. `trigger` es una expresión regular sobre el
+# SQL compilado: el candidato solo se propone para consultas que la cumplen.
+CANDIDATES = [
+    IndexCandidate(
+        'idx_estudiante_estado_ingreso', 'estudiante', r'estudiante\.estado =',
+        'CREATE INDEX idx_estudiante_estado_ingreso ON estudiante(estado, fecha_ingreso)', None,
+        "Filtros de estado y rango de ingreso del reporte de estudiantes"),
+    IndexCandidate(
+        'idx_estudiante_apellido_nombre', 'estudiante', r'ORDER BY estudiante\.apellido',
+        'CREATE INDEX idx_estudiante_apellido_nombre ON estudiante(apellido, nombre)', None,
+        "Evita ordenar todos los estudiantes en list_students"),
+    IndexCandidate(
+        'idx_profesor_depto_activo_salario', 'profesor', r'departamento\.id =|profesor\.departamento_id =',
+        'CREATE INDEX idx_profesor_depto_activo_salario ON profesor(departamento_id, activo, salario)', None,
+        "Filtros de departamento, activo y salario del reporte de profesores"),
+    IndexCandidate(
+        'idx_profesor_activos_depto_salario', 'profesor', r'profesor\.activo = (true|1)',
+        'CREATE INDEX idx_profesor_activos_depto_salario ON profesor(departamento_id, salario) WHERE activo',
+        'CREATE INDEX idx_profesor_activos_depto_salario ON profesor(departamento_id, salario) WHERE activo = 1',
+        "Índice parcial: solo profesores activos"),
+    IndexCandidate(
+        'idx_profesor_anio_contratacion', 'profesor', r'EXTRACT\(year FROM profesor\.fecha_contratacion\)|STRFTIME',
+        'CREATE INDEX idx_profesor_anio_contratacion ON profesor((EXTRACT(year FROM fecha_contratacion)))',
+        "CREATE INDEX idx_profesor_anio_contratacion ON profesor(CAST(STRFTIME('%Y', fecha_contratacion) AS INTEGER))",
+        "Índice de expresión para el filtro por año de contratación"),
+    IndexCandidate(
+        'idx_profesor_apellido_nombre', 'profesor', r'ORDER BY profesor\.apellido',
+        'CREATE INDEX idx_profesor_apellido_nombre ON profesor(apellido, nombre)', None,
+        "Evita ordenar todos los profesores en list_professors"),
+    IndexCandidate(
+        'idx_matricula_curso_semestre_estado', 'matricula', r'matricula\.curso_id|matricula\.semestre =',
+        'CREATE INDEX idx_matricula_curso_semestre_estado ON matricula(curso_id, semestre, estado)', None,
+        "Matrículas de un curso por semestre y estado (reportes y cupos)"),
+]
+
+
+def compile_sql(query) -> str:
+    """SQL de la consulta con los parámetros en línea, en el dialecto del engine"""
+    statement = query.statement if hasattr(query, 'statement') else query
+    return str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _walk_pg_plan(node, scans, sorts):
+    if node.get('Node Type') == 'Seq Scan':
+        scans.add(node.get('Relation Name'))
+    if node.get('Node Type') in ('Sort', 'Incremental Sort'):
+        sorts.append(', '.join(node.get('Sort Key', [])))
+    for child in node.get('Plans', []):
+        _walk_pg_plan(child, scans, sorts)
+
+
+def explain(sql: str) -> PlanSummary:
+    """Plan resumido: tablas recorridas completas, ordenamientos y texto del plan"""
+    connection = session.connection()
+    if engine.dialect.name == 'postgresql':
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+        root = plan[0]['Plan']
+        scans, sorts = set(), []
+        _walk_pg_plan(root, scans, sorts)
+        plan_text = '\n'.join(
+            row[0] for row in connection.exec_driver_sql(f"EXPLAIN {sql}").fetchall()
+        )
+        # Las particiones (ej. auditoria_cambios_202501, matricula_2025_primer)
+        # cuentan como la tabla padre
+        scans = {re.sub(r'_(\d{4,6}(_[a-z]+)?|default)$', '', name) for name in scans if name}
+        return PlanSummary(scans, sorts, plan_text)
+
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    scans, sorts, lines = set(), [], []
+    for row in rows:
+        detail = row[-1]
+        lines.append(detail)
+        match = re.match(r'SCAN (?:TABLE )?(\w+)', detail)
+        if match and 'USING' not in detail:
+            scans.add(match.group(1))
+        if 'TEMP B-TREE' in detail:
+            sorts.append(detail)
+    return PlanSummary(scans, sorts, '\n'.join(lines))
+
+
+def time_query(sql: str, repeat: int = 5) -> float:
+    """Mediana en milisegundos de ejecutar la consulta y leer todas las filas"""
+    connection = session.connection()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        connection.exec_driver_sql(sql).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def table_counts():
+    connection = session.connection()
+    return {
+        table: connection.exec_driver_sql(f"SELECT COUNT(*) FROM {table}").scalar()
+        for table in LARGE_TABLES
+    }
+
+
+def measure(shapes=None, repeat: int = 5):
+    """Medir cada forma de consulta: {nombre: Measurement}"""
+    results = {}
+    for name, build in (shapes or QUERY_SHAPES).items():
+        sql = compile_sql(build())
+        results[name] = Measurement(name, sql, explain(sql), time_query(sql, repeat))
+    session.commit()
+    return results
+
+
+def find_issues(measurement: Measurement, counts, min_rows: int):
+    """Tablas grandes que la consulta recorre completas u ordena"""
+    large = {table for table, count in counts.items() if count >= min_rows}
+    issues = measurement.plan.full_scans & large
+    if measurement.plan.sorts:
+        issues |= {table for table in large if re.search(rf'\b{table}\.', measurement.sql)}
+    return issues
+
+
+def propose(measurements, counts, min_rows: int):
+    """{candidato: [consultas afectadas]} para las consultas con problemas"""
+    proposals = {}
+    for measurement in measurements.values():
+        for table in find_issues(measurement, counts, min_rows):
+            for candidate in CANDIDATES:
+                if candidate.table == table and re.search(candidate.trigger, measurement.sql):
+                    proposals.setdefault(candidate, []).append(measurement.shape)
+    return proposals
+
+
+def _index_exists(name: str) -> bool:
+    connection = session.connection()
+    if engine.dialect.name == 'postgresql':
+        sql = f"SELECT 1 FROM pg_indexes WHERE indexname = '{name}'"
+    else:
+        sql = f"SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = '{name}'"
+    return connection.exec_driver_sql(sql).scalar() is not None
+
+
+def _run_ddl(sql: str):
+    session.connection().exec_driver_sql(sql)
+    session.commit()
+
+
+def plan_improved(before: PlanSummary, after: PlanSummary) -> bool:
+    """El plan dejó de recorrer alguna tabla completa o tiene menos ordenamientos"""
+    return bool(before.full_scans - after.full_scans) or len(after.sorts) < len(before.sorts)
+
+
+def evaluate(candidate: IndexCandidate, shapes, baseline, repeat: int, apply: bool = False,
+             min_improvement: float = MIN_IMPROVEMENT_PCT):
+    """Crear el índice, volver a medir las consultas afectadas y eliminarlo si no se aplica.
+
+    Con apply se conserva solo si alguna consulta mejora al menos
+    min_improvement % y además su plan mejora (ver plan_improved).
+    """
+    if _index_exists(candidate.name):
+        return []
+
+    ddl = candidate.ddl_sqlite if engine.dialect.name == 'sqlite' and candidate.ddl_sqlite else candidate.ddl
+    _run_ddl(ddl)
+    _run_ddl(f"ANALYZE {candidate.table}")
+
+    after = measure({name: QUERY_SHAPES[name] for name in shapes}, repeat)
+    results = []
+    for name in shapes:
+        before_ms, after_ms = baseline[name].ms, after[name].ms
+        results.append(AdvisorResult(
+            candidate.name, candidate.table, name,
+            round(before_ms, 3), round(after_ms, 3),
+            round((before_ms - after_ms) / before_ms * 100, 1) if before_ms else 0.0,
+            plan_improved(baseline[name].plan, after[name].plan),
+            baseline[name].plan.text, after[name].plan.text, candidate.reason
+        ))
+
+    improved = any(result.mejora_pct >= min_improvement and result.plan_mejorado for result in results)
+    if not (apply and improved):
+        _run_ddl(f"DROP INDEX {candidate.name}")
+    return results
+
+
+def run_advisor(min_rows: int = 1000, repeat: int = 5, apply: bool = False,
+                min_improvement: float = MIN_IMPROVEMENT_PCT):
+    counts = table_counts()
+    baseline = measure(repeat=repeat)
+    proposals = propose(baseline, counts, min_rows)
+
+    results = []
+    for candidate, shapes in proposals.items():
+        results.extend(evaluate(candidate, shapes, baseline, repeat, apply, min_improvement))
+    return counts, baseline, proposals, results
+
+
+def print_summary(counts, baseline, proposals, results, min_rows):
+    print("\n📊 Filas por tabla:")
+    for table, count in counts.items():
+        print(f"  • {table}: {count}")
+
+    print("\n🔍 Consultas analizadas:")
+    print("{:<40} {:>10} {:<30}".format("Consulta", "ms", "Problemas"))
+    print("-" * 82)
+    for name, measurement in baseline.items():
+        issues = find_issues(measurement, counts, min_rows)
+        problems = ', '.join(sorted(f"scan:{table}" for table in measurement.plan.full_scans & issues))
+        if measurement.plan.sorts and issues:
+            problems = (problems + ' sort').strip()
+        print("{:<40} {:>10.3f} {:<30}".format(name, measurement.ms, problems or '-'))
+
+    if not proposals:
+        print("\n✅ No se detectaron recorridos completos ni ordenamientos costosos.")
+        return
+
+    print("\n💡 Índices propuestos y efecto medido:")
+    print("{:<38} {:<38} {:>9} {:>9} {:>8} {:>5}".format("Índice", "Consulta", "Antes", "Después", "Mejora", "Plan"))
+    print("-" * 112)
+    for result in results:
+        print("{:<38} {:<38} {:>9.3f} {:>9.3f} {:>7.1f}% {:>5}".format(
+            result.indice, result.consulta, result.ms_antes, result.ms_despues, result.mejora_pct,
+            'mejor' if result.plan_mejorado else '='
+        ))
+    for candidate in proposals:
+        ddl = candidate.ddl_sqlite if engine.dialect.name == 'sqlite' and candidate.ddl_sqlite else candidate.ddl
+        print(f"  {ddl};  -- {candidate.reason}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asesor de índices para reportes y CRUD")
+    parser.add_argument('--generar', action='store_true', help="Regenerar datos de prueba antes de analizar (borra los datos)")
+    parser.add_argument('--escala', type=int, default=10, help="Escala de datos para --generar")
+    parser.add_argument('--semilla', type=int, default=42, help="Semilla de datos para --generar")
+    parser.add_argument('--min-filas', type=int, default=1000, help="Filas a partir de las cuales una tabla es grande")
+    parser.add_argument('--repeticiones', type=int, default=5, help="Ejecuciones por consulta para medir")
+    parser.add_argument('--aplicar', action='store_true', help="Conservar los índices que mejoran alguna consulta")
+    parser.add_argument('--mejora-minima', type=float, default=MIN_IMPROVEMENT_PCT,
+                        help="Mejora mínima (%%) de una consulta con plan mejor para conservar el índice")
+    parser.add_argument('--csv', action='store_true', help="Exportar resultados a reports/")
+    args = parser.parse_args()
+
+    if args.generar:
+        from workload import WorkloadGenerator
+        init_sqlite_schema()
+        WorkloadGenerator(args.semilla, args.escala).run()
+
+    counts, baseline, proposals, results = run_advisor(args.min_filas, args.repeticiones, args.aplicar,
+                                                         args.mejora_minima)
+    print_summary(counts, baseline, proposals, results, args.min_filas)
+
+    if args.csv and results:
+        filename = f"asesor_indices_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(results, filename)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+'''
+Cuenta corriente de los estudiantes: saldos pendientes y mantenimiento.
+
+    python ledger.py pendientes --minimo 500 --dias 30 --csv
+    python ledger.py facturar --anio 2025 --semestre "Segundo Semestre" --tarifa 150
+    python ledger.py contabilizar        # cargos de pago cargados por fuera de la aplicación
+    python ledger.py recalcular          # corregir saldos desde movimiento_cuenta
+
+La API está en cruds.LedgerCRUD (crud.ledger): record_charge, record_payment
+y apply_scholarship escriben el movimiento y actualizan saldo_estudiante en
+la misma transacción; debtors y get_balance solo leen saldo_estudiante.
+facturar genera los cargos de matrícula de todo el periodo por conjuntos
+(bill_period); con el mismo --corrida se puede repetir sin duplicar cargos.
+'''
+
+from models import current_academic_period
+from cruds import UniversityCRUD
+from reports import ReportGenerator
+from datetime import datetime
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cuenta corriente: pagos pendientes y mantenimiento de saldos")
+    parser.add_argument('accion', choices=['pendientes', 'facturar', 'contabilizar', 'recalcular'])
+    parser.add_argument('--minimo', type=float, default=0, help="Solo saldos mayores a este monto")
+    parser.add_argument('--dias', type=int, help="Solo con un cargo impago de hace más de estos días")
+    parser.add_argument('--csv', action='store_true', help="Exportar a reports/")
+    parser.add_argument('--anio', type=int)
+    parser.add_argument('--semestre')
+    parser.add_argument('--tarifa', type=float, help="Monto por crédito (facturar)")
+    parser.add_argument('--corrida', help="ID de la corrida (por defecto MAT-<año>-<semestre>)")
+    args = parser.parse_args()
+
+    crud = UniversityCRUD()
+
+    if args.accion == 'facturar':
+        if not args.tarifa:
+            parser.error("facturar requiere --tarifa")
+        year, semester = current_academic_period()
+        start = time.perf_counter()
+        summary = crud.ledger.bill_period(args.anio or year, args.semestre or semester, args.tarifa, args.corrida)
+        print(f"🧾 Corrida {summary['corrida']} en {time.perf_counter() - start:.2f} s: "
+              f"{summary['estudiantes']} estudiantes ({summary['nuevos']} nuevos)")
+        print(f"  Bruto:      {summary['bruto']:>14,.2f}")
+        print(f"  Becas:      {summary['descuentos']:>14,.2f} ({summary['becados']} becados)")
+        print(f"  Neto:       {summary['neto']:>14,.2f}")
+        return
+
+    if args.accion == 'contabilizar':
+        start = time.perf_counter()
+        rows = crud.ledger.post_charges()
+        print(f"🧾 {rows} cargos contabilizados en {time.perf_counter() - start:.2f} s")
+        return
+
+    if args.accion == 'recalcular':
+        start = time.perf_counter()
+        rows = crud.ledger.rebuild_balances()
+        print(f"🔄 {rows} saldos corregidos en {time.perf_counter() - start:.2f} s")
+        return
+
+    start = time.perf_counter()
+    records = crud.ledger.debtors(args.minimo, args.dias)
+    print(f"💰 {len(records)} estudiantes con saldo pendiente "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms), total {sum(r.saldo for r in records):,.2f}")
+    for record in records[:20]:
+        print(f"  {record.estudiante_id:<8} {record.nombre} {record.apellido}: {record.saldo:,.2f} "
+              f"({record.dias_atraso} días)")
+    if args.csv and records:
+        filename = f"pagos_pendientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(records, filename)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+'''
+Biblioteca: proceso nocturno de multas y reporte de préstamos atrasados.
+
+    python library.py nocturno                   # programar una vez al día (cron)
+    python library.py atrasados --dias 30 --csv
+
+El proceso nocturno (LibraryCRUD.run_nightly) acumula la multa de todos los
+préstamos abiertos atrasados con un solo UPDATE, a FINE_PER_DAY por día, y
+corrige libro.estado por conjuntos. Ambas acciones solo recorren los
+préstamos abiertos (índice parcial idx_prestamo_libro_abiertos).
+'''
+
+from cruds import UniversityCRUD
+from reports import ReportGenerator
+from datetime import date, datetime
+import argparse
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Biblioteca: multas y préstamos atrasados")
+    parser.add_argument('accion', choices=['nocturno', 'atrasados'])
+    parser.add_argument('--fecha', type=date.fromisoformat, help="Fecha de corte (AAAA-MM-DD, por defecto hoy)")
+    parser.add_argument('--dias', type=int, default=1, help="Días mínimos de atraso")
+    parser.add_argument('--estudiante', type=int, help="Solo este estudiante")
+    parser.add_argument('--csv', action='store_true', help="Exportar a reports/")
+    args = parser.parse_args()
+
+    crud = UniversityCRUD()
+
+    if args.accion == 'nocturno':
+        start = time.perf_counter()
+        result = crud.library.run_nightly(args.fecha)
+        print(f"🌙 {result['multas']} multas actualizadas, {result['prestados']} libros a Prestado y "
+              f"{result['disponibles']} a Disponible en {time.perf_counter() - start:.2f} s")
+        return
+
+    start = time.perf_counter()
+    records = crud.library.overdue(args.fecha, args.dias, args.estudiante)
+    print(f"📚 {len(records)} préstamos con {args.dias}+ días de atraso "
+          f"({(time.perf_counter() - start) * 1000:.1f} ms), multas {sum(r.multa or 0 for r in records):,.2f}")
+    for record in records[:20]:
+        print(f"  {record.prestamo_id:<8} {record.titulo[:30]:<30} {record.nombre} {record.apellido}: "
+              f"{record.dias_atraso} días, multa {record.multa or 0:,.2f}")
+    if args.csv and records:
+        filename = f"prestamos_atrasados_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(records, filename)}")
+
+
+if __name__ == "__main__":
+    main()
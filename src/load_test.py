@@ -0,0 +1,207 @@
+'''
+Prueba de carga concurrente sobre la capa CRUD.
+
+    python load_test.py --clientes 50 --operaciones 200
+    python load_test.py --clientes 500 --mezcla matricular=70,obtener=20,listar=5,reporte=5 --curso-caliente 0.5
+    DATABASE_URL=postgresql://... DB_POOL_SIZE=100 python load_test.py --clientes 500 --preparar 5
+    python load_test.py --mezcla matricular=100 --curso-caliente 0.9 --cupo 40
+
+Cada cliente es un hilo con su propia sesión (models.session es una
+scoped_session) que ejecuta operaciones elegidas al azar según la mezcla:
+    matricular  EnrollmentCRUD.enroll_student en el periodo vigente
+    obtener     StudentCRUD.get_student
+    actualizar  StudentCRUD.update_student (teléfono)
+    listar      CourseCRUD.list_course_records
+    reporte     ReportGenerator.courses_by_semester_report del periodo vigente
+Todos los clientes arrancan a la vez (barrera). Al final se muestran el
+rendimiento total y, por operación, latencias p50/p95/p99 y las tasas de
+error, conflicto (llave duplicada o curso sin cupo) y bloqueo
+(deadlock, serialización, timeout de lock o del pool de conexiones; con
+muchos clientes subir DB_POOL_SIZE).
+
+--preparar N carga antes datos con workload.WorkloadGenerator a escala N.
+--cupo N crea cupos de N plazas en el periodo vigente para los cursos que no
+tengan (SeatCRUD.open_period).
+'''
+
+from models import session, engine, current_academic_period, Student, Course
+from cruds import UniversityCRUD
+from reports import ReportGenerator
+from datetime import datetime
+import argparse
+import random
+import threading
+import time
+
+OPERATIONS = ('matricular', 'obtener', 'actualizar', 'listar', 'reporte')
+DEFAULT_MIX = 'matricular=40,obtener=30,actualizar=10,listar=10,reporte=10'
+# Esperas que no son errores de lógica: locks de la base y pool de conexiones agotado
+LOCK_MARKERS = ('deadlock', 'could not serialize', 'database is locked', 'lock timeout', 'lock_timeout',
+                'queuepool limit')
+CONFLICT_MARKERS = ('already enrolled', 'unique', 'duplicate', 'already exists', 'no seats')
+
+
+def parse_mix(mix: str):
+    """'matricular=40,obtener=60' -> {'matricular': 40.0, 'obtener': 60.0}"""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación desconocida: {name}. Opciones: {', '.join(OPERATIONS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def classify(error: Exception) -> str:
+    message = str(error).lower()
+    if any(marker in message for marker in LOCK_MARKERS):
+        return 'bloqueo'
+    if any(marker in message for marker in CONFLICT_MARKERS):
+        return 'conflicto'
+    return 'error'
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class LoadTest:
+    def __init__(self, clients: int, operations: int, mix: dict, hot_course_share: float = 0.0, seed: int = 42):
+        self.clients = clients
+        self.operations = operations
+        self.mix = mix
+        self.hot_course_share = hot_course_share
+        self.seed = seed
+        self.crud = UniversityCRUD()
+        self.year, self.semester = current_academic_period()
+        self.results = []  # (operación, segundos, resultado)
+        self._lock = threading.Lock()
+
+    def load_ids(self):
+        self.student_ids = [row.id for row in session.query(Student.id).filter(Student.estado == 'Activo')]
+        self.course_ids = [row.id for row in session.query(Course.id)]
+        session.commit()
+        if not self.student_ids or not self.course_ids:
+            raise ValueError("No hay estudiantes activos o cursos: ejecutar con --preparar")
+        self.hot_course = self.course_ids[0]
+
+    def run_operation(self, name: str, rng: random.Random):
+        if name == 'matricular':
+            course_id = self.hot_course if rng.random() < self.hot_course_share else rng.choice(self.course_ids)
+            self.crud.enrollment.enroll_student(rng.choice(self.student_ids), course_id, self.semester, self.year)
+        elif name == 'obtener':
+            self.crud.student.get_student(rng.choice(self.student_ids))
+        elif name == 'actualizar':
+            self.crud.student.update_student(rng.choice(self.student_ids), telefono=f"5{rng.randrange(10 ** 7):07d}")
+        elif name == 'listar':
+            self.crud.course.list_course_records()
+        elif name == 'reporte':
+            ReportGenerator.courses_by_semester_report(semester=self.semester, academic_year=self.year)
+
+    def client(self, client_id: int, barrier: threading.Barrier):
+        rng = random.Random(self.seed * 1000 + client_id)
+        names, weights = zip(*self.mix.items())
+        results = []
+        barrier.wait()
+        for _ in range(self.operations):
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                self.run_operation(name, rng)
+                outcome = 'ok'
+            except Exception as e:
+                session.rollback()
+                outcome = classify(e)
+            results.append((name, time.perf_counter() - start, outcome))
+            # Fin de la "petición": devolver la conexión al pool y vaciar el
+            # identity map, para que cada get vaya a la base
+            session.close()
+        session.remove()
+        with self._lock:
+            self.results.extend(results)
+
+    def run(self):
+        """Ejecutar la prueba. Retorna (segundos, resumen por operación)"""
+        self.load_ids()
+        barrier = threading.Barrier(self.clients + 1)
+        threads = [threading.Thread(target=self.client, args=(client_id, barrier), daemon=True)
+                   for client_id in range(self.clients)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        return elapsed, self.summarize(elapsed)
+
+    def summarize(self, elapsed: float):
+        by_operation = {}
+        for name, seconds, outcome in self.results:
+            by_operation.setdefault(name, []).append((seconds, outcome))
+        by_operation['total'] = [(seconds, outcome) for _, seconds, outcome in self.results]
+
+        summary = []
+        for name, samples in by_operation.items():
+            latencies = [seconds * 1000 for seconds, _ in samples]
+            outcomes = [outcome for _, outcome in samples]
+            summary.append({
+                'operacion': name,
+                'cantidad': len(samples),
+                'ops_por_s': round(len(samples) / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'max_ms': round(max(latencies), 2),
+                'error_pct': round(100 * outcomes.count('error') / len(samples), 2),
+                'conflicto_pct': round(100 * outcomes.count('conflicto') / len(samples), 2),
+                'bloqueo_pct': round(100 * outcomes.count('bloqueo') / len(samples), 2),
+            })
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga concurrente de la capa CRUD")
+    parser.add_argument('--clientes', type=int, default=50)
+    parser.add_argument('--operaciones', type=int, default=100, help="Operaciones por cliente")
+    parser.add_argument('--mezcla', default=DEFAULT_MIX, help=f"Pesos por operación (por defecto {DEFAULT_MIX})")
+    parser.add_argument('--curso-caliente', type=float, default=0.0,
+                        help="Fracción de matrículas que van al mismo curso")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--preparar', type=int, metavar='ESCALA', help="Cargar datos con workload.py antes de la prueba")
+    parser.add_argument('--cupo', type=int, help="Capacidad de los cursos en el periodo vigente")
+    parser.add_argument('--csv', action='store_true', help="Exportar resultados a reports/")
+    args = parser.parse_args()
+
+    if args.preparar:
+        from models import init_sqlite_schema
+        from workload import WorkloadGenerator
+        init_sqlite_schema()
+        WorkloadGenerator(args.semilla, args.preparar).run()
+
+    if args.cupo is not None:
+        year, semester = current_academic_period()
+        print(f"🎟️  Cupos creados para {UniversityCRUD().seats.open_period(year, semester, args.cupo)} cursos")
+
+    test = LoadTest(args.clientes, args.operaciones, parse_mix(args.mezcla), args.curso_caliente, args.semilla)
+    elapsed, summary = test.run()
+
+    print(f"🚀 {args.clientes} clientes × {args.operaciones} operaciones en {engine.dialect.name}: {elapsed:.2f} s")
+    print("{:<12} {:>8} {:>9} {:>9} {:>9} {:>9} {:>9} {:>8} {:>8} {:>8}".format(
+        "Operación", "Cant.", "ops/s", "p50 ms", "p95 ms", "p99 ms", "máx ms", "error%", "confl.%", "bloq.%"))
+    print("-" * 100)
+    for row in summary:
+        print("{operacion:<12} {cantidad:>8} {ops_por_s:>9} {p50_ms:>9} {p95_ms:>9} {p99_ms:>9} {max_ms:>9} "
+              "{error_pct:>8} {conflicto_pct:>8} {bloqueo_pct:>8}".format(**row))
+
+    if args.csv:
+        filename = f"prueba_carga_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(summary, filename)}")
+
+
+if __name__ == "__main__":
+    main()
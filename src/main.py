@@ -294,7 +294,8 @@ class UniversitySystem:
     def list_students(self):
         self.display_header("LISTADO DE ESTUDIANTES")
         try:
-            students = self.crud.student.list_students()
+            # Registros de solo lectura: la carrera viene en la misma consulta
+            students = self.crud.student.list_student_records()
             
             if not students:
                 print("No hay estudiantes registrados.")
@@ -302,13 +303,12 @@ class UniversitySystem:
                 print("{:<5} {:<20} {:<20} {:<30} {:<15}".format("ID", "Nombres", "Apellidos", "Email", "Carrera"))
                 print("-" * 90)
                 for student in students:
-                    carrera_nombre = student.major.nombre if student.major else "Sin carrera"
                     print("{:<5} {:<20} {:<20} {:<30} {:<15}".format(
                         student.id,
                         student.nombre,
                         student.apellido,
                         student.email,
-                        carrera_nombre
+                        student.carrera or "Sin carrera"
                     ))
         except Exception as e:
             print(f"\n❌ Error al listar estudiantes: {str(e)}")
@@ -374,13 +374,15 @@ class UniversitySystem:
                 '2': {'label': 'Cursos por Semestre', 'action': self.courses_by_semester_report},
                 '3': {'label': 'Matrículas Activas', 'action': self.active_enrollments_report},
                 '4': {'label': 'Pagos Pendientes', 'action': self.pending_payments_report},
-                '5': {'label': 'Volver', 'action': lambda: None}
+                '5': {'label': 'Avance de Carrera', 'action': self.degree_audit_report},
+                '6': {'label': 'Carga Docente', 'action': self.professor_workload_report},
+                '7': {'label': 'Volver', 'action': lambda: None}
             }
             self.display_menu(options)
             choice = input("Seleccione una opción: ")
             if choice in options:
                 options[choice]['action']()
-                if choice == '5':
+                if choice == '7':
                     break
             else:
                 print("Opción inválida. Intente nuevamente.")
@@ -523,7 +525,92 @@ class UniversitySystem:
         input("\nPresione Enter para continuar...")
 
     def pending_payments_report(self):
-        print("Reporte de pagos pendientes en desarrollo...")
+        self.display_header("PAGOS PENDIENTES")
+        try:
+            from reports import ReportGenerator
+
+            print("Filtros disponibles (deje en blanco para omitir):")
+            min_balance = self.get_input("Saldo mayor a: ", input_type=float, required=False)
+            days_late = self.get_input("Días de atraso mayor a (ej. 30): ", input_type=int, required=False)
+
+            data = self.crud.ledger.debtors(min_balance or 0, days_late)
+            if data:
+                total = sum(record.saldo for record in data)
+                print(f"\n✅ {len(data)} estudiantes deben en total {total:,.2f}.")
+                print("{:<8} {:<30} {:>12} {:>8}".format("ID", "Estudiante", "Saldo", "Días"))
+                print("-" * 62)
+                for record in data[:20]:
+                    print("{:<8} {:<30} {:>12,.2f} {:>8}".format(
+                        record.estudiante_id, f"{record.nombre} {record.apellido}"[:30], record.saldo,
+                        record.dias_atraso))
+                filename = f"pagos_pendientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                print(f"\n📄 {ReportGenerator.export_to_csv(data, filename)}")
+            else:
+                print("❌ No hay saldos pendientes con los filtros especificados.")
+        except Exception as e:
+            print(f"❌ Error generando reporte: {str(e)}")
+        input("\nPresione Enter para continuar...")
+    
+    def degree_audit_report(self):
+        self.display_header("AVANCE DE CARRERA")
+        try:
+            from degree_audit import DegreeAudit
+            from reports import ReportGenerator
+            
+            print("Filtros disponibles (deje en blanco para omitir):")
+            student_id = self.get_input("ID de estudiante: ", input_type=int, required=False)
+            if student_id:
+                record = self.crud.student.get_degree_audit(student_id)
+                if not record:
+                    print("❌ Estudiante no encontrado")
+                else:
+                    print(f"\n{record.nombre} {record.apellido} - {record.carrera}")
+                    print(f"Créditos: {record.creditos_aprobados}/{record.creditos_carrera} ({record.avance_pct}%), "
+                          f"{record.creditos_en_curso} en curso")
+                    print(f"Graduación nominal: {record.graduacion_nominal} - proyectada: {record.graduacion_proyectada}")
+                    print(f"Cursos de la carrera pendientes: {record.faltantes or 'ninguno'}")
+            else:
+                major_id = self.get_input("ID de carrera: ", input_type=int, required=False)
+                data = DegreeAudit().run(carrera_id=major_id)
+                if data:
+                    late = sum(1 for record in data if record.atrasado)
+                    print(f"\n✅ {len(data)} estudiantes auditados, {late} no terminan en el plazo nominal.")
+                    filename = f"auditoria_carrera_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                    print(f"\n📄 {ReportGenerator.export_to_csv(data, filename)}")
+                else:
+                    print("❌ No se encontraron estudiantes con los filtros especificados.")
+        except Exception as e:
+            print(f"❌ Error generando reporte: {str(e)}")
+        input("\nPresione Enter para continuar...")
+    
+    def professor_workload_report(self):
+        self.display_header("CARGA DOCENTE")
+        try:
+            from reports import ReportGenerator
+
+            print("Filtros disponibles (deje en blanco para omitir):")
+            department_id = self.get_input("ID de departamento: ", input_type=int, required=False)
+            active_only = self.get_input("Solo activos (s/n): ", required=False)
+            semester = self.get_input("Semestre (Primer Semestre/Segundo Semestre/Verano): ", required=False)
+
+            data = ReportGenerator.professor_workload_report(
+                department_id, (active_only or '').lower().startswith('s'), semester or None)
+            if data:
+                print(f"\n✅ {len(data)} profesores en {data[0].semestre}.")
+                print("{:<8} {:<30} {:>7} {:>7} {:>6} {:>8} {:>5}".format(
+                    "ID", "Profesor", "Cursos", "Coord.", "Tesis", "Eventos", "Labs"))
+                print("-" * 76)
+                for record in data[:20]:
+                    print("{:<8} {:<30} {:>7} {:>7} {:>6} {:>8} {:>5}".format(
+                        record.profesor_id, f"{record.nombre} {record.apellido}"[:30], record.cursos,
+                        record.coordinaciones, record.tesis_en_progreso, record.eventos_proximos,
+                        record.laboratorios))
+                filename = f"carga_docente_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+                print(f"\n📄 {ReportGenerator.export_to_csv(data, filename)}")
+            else:
+                print("❌ No se encontraron profesores con los filtros especificados.")
+        except Exception as e:
+            print(f"❌ Error generando reporte: {str(e)}")
         input("\nPresione Enter para continuar...")
     
     def students_faculty_report(self):
@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine, Column, Integer, String, Date, Numeric, ForeignKey, Enum, Boolean, Time, Text, CheckConstraint, DateTime, JSON
+from sqlalchemy import create_engine, event, Column, Integer, BigInteger, String, Date, Numeric, ForeignKey, Enum, Boolean, Time, Text, CheckConstraint, DateTime, JSON, Index, UniqueConstraint, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker, validates
+from sqlalchemy.orm import relationship, sessionmaker, scoped_session, validates
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
 from datetime import datetime, timedelta
@@ -16,16 +16,59 @@ Base = declarative_base()
 # Cambiar esta línea para usar SQLite por defecto si no hay PostgreSQL
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///university.db')
 
+# Perfil de SQLite: 'tuned' aplica SQLITE_PRAGMAS al conectar; 'default' deja
+# la configuración de fábrica (journal rollback, fsync en cada commit)
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'tuned')
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',       # lectores concurrentes con un escritor
+    'synchronous': 'NORMAL',     # en WAL solo hace fsync en los checkpoints
+    'foreign_keys': 'ON',        # SQLite no valida las FK si no se activa
+    'busy_timeout': 5000,        # ms de espera si otra conexión tiene el lock
+    'cache_size': -65536,        # negativo = KiB (64 MB por conexión)
+    'mmap_size': 268435456,      # 256 MB de lectura mapeada en memoria
+    'temp_store': 'MEMORY',
+}
+SQLITE_STATEMENT_CACHE = 256     # sentencias preparadas por conexión (sqlite3)
+QUERY_CACHE_SIZE = 1000          # SQL compilado en caché por engine (SQLAlchemy)
+
+# Pool de conexiones (subirlo para pruebas de carga con muchos clientes)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+def make_engine(url: str, **kwargs):
+    """Crear un engine con la configuración del proyecto para el dialecto de la URL.
+
+    `kwargs` se pasan a create_engine y reemplazan los valores por defecto.
+    """
+    pool = {'pool_size': DB_POOL_SIZE, 'max_overflow': DB_MAX_OVERFLOW}
+    if url.startswith('postgresql'):
+        return create_engine(url, **dict(pool, pool_pre_ping=True, query_cache_size=QUERY_CACHE_SIZE, **kwargs))
+    if url.startswith('sqlite') and SQLITE_PROFILE != 'default':
+        options = dict(pool if ':memory:' not in url else {}, echo=False, query_cache_size=QUERY_CACHE_SIZE,
+                       connect_args={'cached_statements': SQLITE_STATEMENT_CACHE,
+                                     'timeout': SQLITE_PRAGMAS['busy_timeout'] / 1000})
+        options.update(kwargs)
+        new_engine = create_engine(url, **options)
+        event.listen(new_engine, 'connect', _apply_sqlite_pragmas)
+        return new_engine
+    return create_engine(url, echo=False, **kwargs)
+
 # Cambiar la configuración para NO crear tablas automáticamente
 # Solo conectarse a la base de datos existente
 try:
-    if DATABASE_URL.startswith('postgresql'):
-        engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=10, max_overflow=20)
-    else:
-        engine = create_engine(DATABASE_URL, echo=False)
+    engine = make_engine(DATABASE_URL)
     
     Session = sessionmaker(bind=engine)
-    session = Session()
+    # Una sesión por hilo: en un solo hilo se comporta como antes, y cada
+    # cliente concurrente (ej. load_test.py) obtiene su propia sesión
+    session = scoped_session(Session)
     print(f"Conectado a la base de datos existente: {DATABASE_URL}")
     
 except Exception as e:
@@ -90,6 +133,10 @@ class Student(Base):
     # Relationships
     major = relationship("Major", back_populates="students")
     enrollments = relationship("Enrollment", back_populates="student")
+    
+    __table_args__ = (
+        Index('idx_estudiante_carrera', 'carrera_id'),
+    )
 
 class Professor(Base):
     __tablename__ = 'profesor'
@@ -116,16 +163,43 @@ class Course(Base):
     creditos = Column(Integer, nullable=False)
     descripcion = Column(Text)
     carrera_id = Column(Integer, ForeignKey('carrera.id'), nullable=False)
+    prerequisito_id = Column(Integer, ForeignKey('curso.id'))  # ver prerequisites.PrerequisiteGraph
+    departamento_id = Column(Integer, ForeignKey('departamento.id'))
     
     # Relationships
     major = relationship("Major", back_populates="courses")  # ← VERIFICAR ESTA LÍNEA
     enrollments = relationship("Enrollment", back_populates="course")
+    
+    __table_args__ = (
+        Index('idx_curso_carrera', 'carrera_id'),
+    )
+
+def current_academic_period(today=None):
+    """(anio_academico, semestre) vigente en una fecha.
+
+    Enero-mayo: Primer Semestre; junio-julio: Verano; agosto-diciembre: Segundo Semestre.
+    """
+    today = today or datetime.now().date()
+    if today.month <= 5:
+        return today.year, 'Primer Semestre'
+    if today.month <= 7:
+        return today.year, 'Verano'
+    return today.year, 'Segundo Semestre'
+
+def academic_period_range(anio_academico, semestre):
+    """(primer día, día siguiente al último) del periodo; inverso de current_academic_period"""
+    start_month, end_month = {'Primer Semestre': (1, 6), 'Verano': (6, 8), 'Segundo Semestre': (8, 13)}[semestre]
+    end = datetime(anio_academico + 1, 1, 1) if end_month == 13 else datetime(anio_academico, end_month, 1)
+    return datetime(anio_academico, start_month, 1).date(), end.date()
 
 class Enrollment(Base):
     __tablename__ = 'matricula'
     
+    # En PostgreSQL la tabla está particionada por anio_academico y semestre:
+    # filtrar por ambos hace que las consultas solo toquen ese periodo
     estudiante_id = Column(Integer, ForeignKey('estudiante.id'), primary_key=True)
     curso_id = Column(Integer, ForeignKey('curso.id'), primary_key=True)
+    anio_academico = Column(Integer, primary_key=True, default=lambda: current_academic_period()[0])
     semestre = Column(String(20), primary_key=True)  # tipo_semestre enum
     calificacion = Column(String(2))  # tipo_calificacion enum
     estado = Column(String(20), default='Activa')
@@ -134,9 +208,360 @@ class Enrollment(Base):
     # Relationships
     student = relationship("Student", back_populates="enrollments")
     course = relationship("Course", back_populates="enrollments")
+    
+    __table_args__ = (
+        Index('idx_matricula_estudiante', 'estudiante_id'),
+        Index('idx_matricula_curso', 'curso_id'),
+    )
+
+class AuditLog(Base):
+    __tablename__ = 'auditoria_cambios'
+    
+    # En PostgreSQL la PK es (id, fecha) por el particionamiento mensual;
+    # id es único por la secuencia, así que basta para la identidad del ORM
+    id = Column(Integer, primary_key=True)
+    tabla_afectada = Column(String(50), nullable=False)
+    id_registro = Column(Integer, nullable=False)
+    tipo_operacion = Column(String(10), nullable=False)
+    fecha = Column(DateTime, nullable=False, default=datetime.now)
+    usuario = Column(String(50), nullable=False)
+    valores_anteriores = Column(JSON)
+    valores_nuevos = Column(JSON)
+    transaccion = Column(BigInteger)  # PostgreSQL: txid_current() de quien escribió la fila (ver cdc.py)
+    
+    __table_args__ = (
+        Index('idx_auditoria_tabla_registro_fecha', 'tabla_afectada', 'id_registro', 'fecha'),
+        Index('idx_auditoria_transaccion', 'transaccion', 'id'),
+    )
+
+class CdcOffset(Base):
+    __tablename__ = 'cdc_offset'
+    
+    consumidor = Column(String(50), primary_key=True)
+    ultimo_id = Column(Integer, nullable=False, default=0)
+    ultima_transaccion = Column(BigInteger, nullable=False, default=0)  # solo PostgreSQL
+    actualizado = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+class CourseSeat(Base):
+    """Cupos de un curso en un periodo, repartidos en franjas.
+
+    Reservar un cupo es un UPDATE condicional de una franja (sin contar
+    matrícula). Con varias franjas, los clientes que compiten por el mismo
+    curso bloquean filas distintas (ver SeatCRUD.reserve).
+    """
+    __tablename__ = 'cupo_curso'
+    
+    curso_id = Column(Integer, ForeignKey('curso.id'), primary_key=True)
+    anio_academico = Column(Integer, primary_key=True)
+    semestre = Column(String(20), primary_key=True)  # tipo_semestre enum
+    franja = Column(Integer, primary_key=True, default=0)
+    capacidad = Column(Integer, nullable=False)
+    ocupados = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        CheckConstraint('ocupados >= 0 AND ocupados <= capacidad', name='ck_cupo_curso_ocupados'),
+    )
+
+class WaitlistEntry(Base):
+    """Solicitud en la lista de espera de un curso lleno.
+
+    La cola de (curso, periodo) se ordena por prioridad descendente y luego
+    por id (orden de llegada). El índice parcial sobre las solicitudes en
+    espera hace que tomar la cabeza de la cola no dependa de su largo.
+    """
+    __tablename__ = 'lista_espera'
+    
+    id = Column(Integer, primary_key=True)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    curso_id = Column(Integer, ForeignKey('curso.id'), nullable=False)
+    anio_academico = Column(Integer, nullable=False)
+    semestre = Column(String(20), nullable=False)  # tipo_semestre enum
+    prioridad = Column(Integer, nullable=False, default=0)
+    regla = Column(String(20), nullable=False)
+    estado = Column(String(20), nullable=False, default='Esperando')  # estado_espera enum
+    fecha_solicitud = Column(DateTime, nullable=False, default=datetime.now)
+    fecha_promocion = Column(DateTime)
+    
+    __table_args__ = (
+        Index('idx_lista_espera_cola', curso_id, anio_academico, semestre, prioridad.desc(), id,
+              postgresql_where=text("estado = 'Esperando'"), sqlite_where=text("estado = 'Esperando'")),
+        Index('uq_lista_espera_estudiante', estudiante_id, curso_id, anio_academico, semestre, unique=True,
+              postgresql_where=text("estado = 'Esperando'"), sqlite_where=text("estado = 'Esperando'")),
+    )
+
+class Attendance(Base):
+    """Asistencia de un estudiante a una sesión (fecha) de un curso.
+
+    Es la tabla más grande: se escribe una sesión completa por sentencia
+    (AttendanceCRUD.mark_session) y las tasas se leen de AttendanceSummary.
+    """
+    __tablename__ = 'asistencia'
+    
+    id = Column(Integer, primary_key=True)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    curso_id = Column(Integer, ForeignKey('curso.id'), nullable=False)
+    fecha = Column(Date, nullable=False)
+    presente = Column(Boolean, nullable=False, default=False)
+    justificacion = Column(Text)
+    
+    __table_args__ = (
+        UniqueConstraint('estudiante_id', 'curso_id', 'fecha'),
+        Index('idx_asistencia_curso_fecha', 'curso_id', 'fecha'),
+    )
+
+class AttendanceSummary(Base):
+    """Contadores de asistencia por (periodo, curso, estudiante), al día con cada sesión"""
+    __tablename__ = 'resumen_asistencia'
+    
+    anio_academico = Column(Integer, primary_key=True)
+    semestre = Column(String(20), primary_key=True)  # tipo_semestre enum
+    curso_id = Column(Integer, ForeignKey('curso.id'), primary_key=True)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), primary_key=True)
+    sesiones = Column(Integer, nullable=False, default=0)
+    presentes = Column(Integer, nullable=False, default=0)
+    justificadas = Column(Integer, nullable=False, default=0)
+    racha_ausencias = Column(Integer, nullable=False, default=0)  # ausencias sin justificar desde la última asistencia
+    ultima_fecha = Column(Date)
+    
+    __table_args__ = (
+        Index('idx_resumen_asistencia_estudiante', 'estudiante_id'),
+    )
+
+class Evaluation(Base):
+    """Evaluación de un curso; su periodo es el de su fecha (current_academic_period)"""
+    __tablename__ = 'evaluacion'
+    
+    id = Column(Integer, primary_key=True)
+    curso_id = Column(Integer, ForeignKey('curso.id'), nullable=False)
+    nombre = Column(String(100), nullable=False)
+    tipo = Column(String(20), nullable=False)  # Parcial, Examen Final, Proyecto, Tarea
+    fecha = Column(Date, nullable=False)
+    porcentaje = Column(Numeric(5, 2), nullable=False)
+    descripcion = Column(Text)
+    
+    __table_args__ = (
+        Index('idx_evaluacion_curso_fecha', 'curso_id', 'fecha'),
+    )
+
+class EvaluationScore(Base):
+    """Nota (0-100) de un estudiante en una evaluación"""
+    __tablename__ = 'nota_evaluacion'
+    
+    evaluacion_id = Column(Integer, ForeignKey('evaluacion.id'), primary_key=True)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), primary_key=True)
+    nota = Column(Numeric(5, 2), nullable=False)
+    fecha_registro = Column(DateTime, nullable=False, default=datetime.now)
+    
+    __table_args__ = (
+        CheckConstraint('nota >= 0 AND nota <= 100', name='ck_nota_evaluacion_nota'),
+    )
+
+class AcademicSummary(Base):
+    """Créditos y promedio (GPA 0-4, ponderado por créditos) de cada estudiante, al cierre de cada periodo"""
+    __tablename__ = 'resumen_academico'
+    
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), primary_key=True)
+    cursos_finalizados = Column(Integer, nullable=False, default=0)
+    creditos_cursados = Column(Integer, nullable=False, default=0)
+    creditos_aprobados = Column(Integer, nullable=False, default=0)  # cada curso aprobado cuenta una vez
+    promedio = Column(Numeric(3, 2))
+    actualizado = Column(DateTime, nullable=False, default=datetime.now)
+
+class PeriodCloseout(Base):
+    """Avance del cierre de un periodo (closeout.SemesterCloseout), para poder reanudarlo"""
+    __tablename__ = 'cierre_periodo'
+    
+    anio_academico = Column(Integer, primary_key=True)
+    semestre = Column(String(20), primary_key=True)  # tipo_semestre enum
+    paso = Column(String(20), nullable=False, default='calificaciones')
+    ultimo_curso_id = Column(Integer, nullable=False, default=0)
+    cursos_cerrados = Column(Integer, nullable=False, default=0)
+    iniciado = Column(DateTime, nullable=False, default=datetime.now)
+    actualizado = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    terminado = Column(DateTime)
+
+class Book(Base):
+    __tablename__ = 'libro'
+    
+    id = Column(Integer, primary_key=True)
+    titulo = Column(String(200), nullable=False)
+    autor = Column(String(100), nullable=False)
+    isbn = Column(String(20), unique=True, nullable=False)
+    editorial = Column(String(100))
+    anio_publicacion = Column(Integer)
+    estado = Column(String(20), default='Disponible')  # Disponible, Prestado, En reparación
+
+class BookLoan(Base):
+    """Préstamo de un libro. Abierto mientras fecha_devolucion_real es NULL.
+
+    El índice parcial sobre los préstamos abiertos por fecha_devolucion hace
+    que buscar los atrasados (LibraryCRUD) no recorra el historial.
+    """
+    __tablename__ = 'prestamo_libro'
+    
+    id = Column(Integer, primary_key=True)
+    libro_id = Column(Integer, ForeignKey('libro.id'), nullable=False)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    fecha_prestamo = Column(Date, nullable=False, default=lambda: datetime.now().date())
+    fecha_devolucion = Column(Date, nullable=False)
+    fecha_devolucion_real = Column(Date)
+    multa = Column(Numeric(8, 2), default=0)
+    
+    __table_args__ = (
+        Index('idx_prestamo_libro_abiertos', 'fecha_devolucion',
+              postgresql_where=text('fecha_devolucion_real IS NULL'),
+              sqlite_where=text('fecha_devolucion_real IS NULL')),
+    )
+
+class Payment(Base):
+    """Cobro a un estudiante (matrícula, multa); referencia identifica el documento"""
+    __tablename__ = 'pago'
+    
+    id = Column(Integer, primary_key=True)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    monto = Column(Numeric(10, 2), nullable=False)
+    fecha = Column(DateTime, nullable=False, default=datetime.now)
+    tipo = Column(String(20), nullable=False)  # tipo_pago enum
+    descripcion = Column(Text)
+    referencia = Column(String(50), unique=True)
+    
+    __table_args__ = (
+        CheckConstraint('monto > 0', name='ck_pago_monto'),
+    )
+
+class Scholarship(Base):
+    __tablename__ = 'beca'
+    
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    porcentaje = Column(Numeric(5, 2), nullable=False)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    fecha_inicio = Column(Date, nullable=False)
+    fecha_fin = Column(Date)
+
+class LedgerEntry(Base):
+    """Movimiento de la cuenta de un estudiante.
+    
+    Los cargos suman al saldo y los pagos y descuentos de beca restan (monto
+    con signo). saldo es el de la cuenta después del movimiento y, en los
+    cargos, cargos_acumulados el total cargado hasta ese cargo inclusive: un
+    cargo sigue impago mientras cargos_acumulados > total abonado (los abonos
+    cubren los cargos más antiguos primero).
+    """
+    __tablename__ = 'movimiento_cuenta'
+    
+    id = Column(Integer, primary_key=True)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    fecha = Column(DateTime, nullable=False, default=datetime.now)
+    tipo = Column(String(10), nullable=False)  # tipo_movimiento enum
+    monto = Column(Numeric(12, 2), nullable=False)
+    saldo = Column(Numeric(12, 2), nullable=False)
+    cargos_acumulados = Column(Numeric(14, 2))
+    vencimiento = Column(Date)
+    pago_id = Column(Integer, ForeignKey('pago.id'), unique=True)
+    beca_id = Column(Integer, ForeignKey('beca.id'))
+    referencia = Column(String(50), unique=True)
+    descripcion = Column(Text)
+    
+    __table_args__ = (
+        CheckConstraint("(tipo = 'Cargo') = (monto > 0)", name='ck_movimiento_cuenta_signo'),
+        Index('idx_movimiento_cuenta_estudiante', 'estudiante_id', 'id'),
+        Index('idx_movimiento_cuenta_cargos', 'estudiante_id', 'cargos_acumulados',
+              postgresql_where=text("tipo = 'Cargo'"), sqlite_where=text("tipo = 'Cargo'")),
+    )
+
+class AccountBalance(Base):
+    """Saldo de cada estudiante, al día con cada movimiento.
+    
+    pendiente_desde es el vencimiento del cargo impago más antiguo (NULL si
+    no debe nada): los índices parciales sobre las cuentas con saldo hacen que
+    "quién debe más de X" o "quién lleva más de 30 días" no recorran pagos.
+    """
+    __tablename__ = 'saldo_estudiante'
+    
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), primary_key=True)
+    saldo = Column(Numeric(12, 2), nullable=False, default=0)
+    total_cargos = Column(Numeric(14, 2), nullable=False, default=0)
+    total_abonos = Column(Numeric(14, 2), nullable=False, default=0)
+    pendiente_desde = Column(Date)
+    actualizado = Column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+    
+    __table_args__ = (
+        Index('idx_saldo_estudiante_saldo', 'saldo',
+              postgresql_where=text('saldo > 0'), sqlite_where=text('saldo > 0')),
+        Index('idx_saldo_estudiante_pendiente', 'pendiente_desde',
+              postgresql_where=text('saldo > 0'), sqlite_where=text('saldo > 0')),
+    )
+
+class BillingRun(Base):
+    """Corrida de facturación de un periodo: sus cargos en pago llevan referencia '<id>:<estudiante_id>'"""
+    __tablename__ = 'corrida_facturacion'
+    
+    id = Column(String(30), primary_key=True)
+    anio_academico = Column(Integer, nullable=False)
+    semestre = Column(String(20), nullable=False)  # tipo_semestre enum
+    tarifa_credito = Column(Numeric(10, 2), nullable=False)
+    fecha = Column(DateTime, nullable=False, default=datetime.now)
+
+class CourseAssignment(Base):
+    """Profesor asignado a un curso en un semestre; es_coordinador marca al coordinador del curso"""
+    __tablename__ = 'asignacion_profesor'
+    
+    profesor_id = Column(Integer, ForeignKey('profesor.id'), primary_key=True)
+    curso_id = Column(Integer, ForeignKey('curso.id'), primary_key=True)
+    semestre = Column(String(20), primary_key=True)  # tipo_semestre enum
+    es_coordinador = Column(Boolean, default=False)
+
+class Thesis(Base):
+    __tablename__ = 'tesis'
+    
+    id = Column(Integer, primary_key=True)
+    titulo = Column(String(200), nullable=False)
+    estudiante_id = Column(Integer, ForeignKey('estudiante.id'), nullable=False)
+    asesor_id = Column(Integer, ForeignKey('profesor.id'), nullable=False)
+    fecha_inicio = Column(Date, nullable=False, default=lambda: datetime.now().date())
+    fecha_entrega = Column(Date)
+    estado = Column(String(20), nullable=False)  # En progreso, Finalizada, Aprobada, Reprobada
+    calificacion = Column(Numeric(3, 1))
+    archivo_url = Column(Text)
+
+class AcademicEvent(Base):
+    __tablename__ = 'evento_academico'
+    
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(200), nullable=False)
+    descripcion = Column(Text)
+    fecha = Column(Date, nullable=False)
+    hora_inicio = Column(Time)
+    hora_fin = Column(Time)
+    responsable_id = Column(Integer, ForeignKey('profesor.id'), nullable=False)
+    ubicacion = Column(String(100), nullable=False)
+    costo = Column(Numeric(8, 2), default=0)
+
+class Laboratory(Base):
+    __tablename__ = 'laboratorio'
+    
+    id = Column(Integer, primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    ubicacion = Column(String(100), nullable=False)
+    responsable_id = Column(Integer, ForeignKey('profesor.id'), nullable=False)
+    capacidad = Column(Integer, nullable=False)
+    equipamiento = Column(Text)
+    horario_atencion = Column(Text)
 
 # NO CREAR TABLAS - Solo mapear las existentes
 # NO usar Base.metadata.create_all(engine)
 
+def init_sqlite_schema(bind=None):
+    """Crear las tablas mapeadas en una base SQLite (pruebas y benchmarks).
+
+    PostgreSQL usa siempre database/schema.sql; esta función no hace nada ahí.
+    """
+    bind = bind or engine
+    if bind.dialect.name != 'sqlite':
+        return False
+    Base.metadata.create_all(bind)
+    return True
+
 # Al final del archivo, asegurar que todas las clases estén disponibles para importar
-__all__ = ['Base', 'session', 'engine', 'Faculty', 'Department', 'Major', 'Student', 'Professor', 'Course', 'Enrollment']
\ No newline at end of file
+__all__ = ['Base', 'session', 'engine', 'Faculty', 'Department', 'Major', 'Student', 'Professor', 'Course', 'Enrollment', 'AuditLog', 'CdcOffset', 'CourseSeat', 'WaitlistEntry', 'Attendance', 'AttendanceSummary', 'Evaluation', 'EvaluationScore', 'AcademicSummary', 'PeriodCloseout', 'Book', 'BookLoan', 'Payment', 'Scholarship', 'LedgerEntry', 'AccountBalance', 'BillingRun', 'CourseAssignment', 'Thesis', 'AcademicEvent', 'Laboratory', 'init_sqlite_schema', 'current_academic_period', 'academic_period_range', 'make_engine']
\ No newline at end of file
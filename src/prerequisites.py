@@ -0,0 +1,263 @@
+'''
+Grafo de prerrequisitos de cursos en memoria.
+
+    python prerequisites.py --validar                 # ciclos y largo de las cadenas
+    python prerequisites.py --medir 100000            # verificaciones por segundo
+
+Cada curso tiene a lo sumo un prerrequisito directo (curso.prerequisito_id),
+así que el grafo se carga con una sola consulta y el cierre transitivo de
+cada curso (todos los cursos que hay que aprobar antes) se precalcula como
+una máscara de bits: el bit de cada curso es su posición en el grafo.
+Verificar si un estudiante puede llevar un curso es entonces una operación
+entre enteros contra la máscara de sus cursos aprobados:
+
+    faltantes = cierre[curso] & ~aprobados[estudiante]
+
+check_many() verifica miles de solicitudes con una consulta por lote de
+estudiantes. Los cambios hechos con CourseCRUD actualizan el grafo de forma
+incremental (solo el curso y sus dependientes); los hechos por otros
+procesos se ven al recargar, cada PREREQUISITE_CACHE_SECONDS segundos o
+cuando aparece un curso desconocido.
+
+Un ciclo (posible en datos cargados fuera de la aplicación en SQLite; en
+PostgreSQL lo impide trigger_validar_prerrequisito) se reporta y sus cursos
+quedan sin poder cumplirse.
+'''
+
+from models import session, Course, Enrollment
+from sqlalchemy import select
+import argparse
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PASSING_GRADES = ('A', 'B', 'C', 'D')
+PREREQUISITE_CACHE_SECONDS = float(os.getenv('PREREQUISITE_CACHE_SECONDS', '300'))
+STUDENT_BATCH_SIZE = 1000
+
+
+class PrerequisiteGraph:
+    def __init__(self, max_age: float = PREREQUISITE_CACHE_SECONDS):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._loaded_at = None
+
+    # --- Carga ---
+
+    def load(self):
+        """Leer todos los cursos y recalcular los cierres"""
+        rows = session.execute(select(Course.id, Course.codigo, Course.prerequisito_id)).all()
+        session.commit()
+        with self._lock:
+            self.codes = {}
+            self.ids = []      # posición del bit -> id del curso
+            self.bit = {}      # id del curso -> máscara de un bit
+            self.parent = {}
+            self.children = {}
+            for row in rows:
+                self._add_node(row.id, row.codigo)
+            for row in rows:
+                if row.prerequisito_id is not None:
+                    self._link(row.id, row.prerequisito_id)
+            self.closure = {}
+            self.cycles = []
+            for course_id in self.ids:
+                self._compute_chain(course_id)
+            self._loaded_at = time.monotonic()
+        if self.cycles:
+            logger.warning(f"Ciclos de prerrequisitos: {self.describe_cycles()}")
+        return self
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+            self.load()
+
+    def _add_node(self, course_id: int, codigo: str):
+        self.codes[course_id] = codigo
+        self.bit[course_id] = 1 << len(self.ids)
+        self.ids.append(course_id)
+
+    def _link(self, course_id: int, prerequisito_id: int):
+        self.parent[course_id] = prerequisito_id
+        self.children.setdefault(prerequisito_id, set()).add(course_id)
+
+    def _compute_chain(self, course_id: int):
+        """Cierre de course_id y de los cursos de su cadena que falten"""
+        chain = []
+        on_chain = set()
+        current = course_id
+        while current is not None and current not in self.closure:
+            if current in on_chain:
+                # Ciclo: exige sus propios cursos, así que nunca se cumple
+                cycle = chain[chain.index(current):]
+                self.cycles.append(cycle)
+                mask = 0
+                for member in cycle:
+                    mask |= self.bit[member]
+                for member in cycle:
+                    self.closure[member] = mask
+                chain = chain[:chain.index(current)]
+                break
+            on_chain.add(current)
+            chain.append(current)
+            current = self.parent.get(current)
+        for member in reversed(chain):
+            self._compute(member)
+
+    def _compute(self, course_id: int):
+        parent = self.parent.get(course_id)
+        self.closure[course_id] = 0 if parent is None else self.closure[parent] | self.bit[parent]
+
+    # --- Cambios incrementales ---
+
+    def add_course(self, course_id: int, codigo: str, prerequisito_id: int = None):
+        """Registrar un curso recién creado"""
+        with self._lock:
+            self._ensure_loaded()
+            if course_id not in self.bit:
+                self._add_node(course_id, codigo)
+                self.closure[course_id] = 0
+            self.set_prerequisite(course_id, prerequisito_id)
+
+    def validate_prerequisite(self, course_id: int, prerequisito_id: int = None):
+        """ValueError si prerequisito_id no existe o crearía un ciclo"""
+        with self._lock:
+            self._ensure_loaded()
+            if prerequisito_id is None:
+                return
+            if prerequisito_id not in self.bit:
+                raise ValueError("Prerequisite course not found")
+            if prerequisito_id == course_id or self.closure[prerequisito_id] & self.bit.get(course_id, 0):
+                raise ValueError("Prerequisite would create a cycle")
+
+    def set_prerequisite(self, course_id: int, prerequisito_id: int = None):
+        """Cambiar el prerrequisito y recalcular el curso y sus dependientes"""
+        with self._lock:
+            self.validate_prerequisite(course_id, prerequisito_id)
+            previous = self.parent.pop(course_id, None)
+            if previous is not None:
+                self.children[previous].discard(course_id)
+            if prerequisito_id is not None:
+                self._link(course_id, prerequisito_id)
+            pending = [course_id]
+            while pending:
+                current = pending.pop()
+                self._compute(current)
+                pending.extend(self.children.get(current, ()))
+
+    # --- Consultas ---
+
+    def _course_mask(self, course_id: int) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            if course_id not in self.closure:
+                self.load()  # creado por otro proceso
+                if course_id not in self.closure:
+                    raise ValueError("Course not found")
+            return self.closure[course_id]
+
+    def _decode(self, mask: int):
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(self.ids[low.bit_length() - 1])
+            mask ^= low
+        return ids
+
+    def prerequisites_of(self, course_id: int):
+        """Todos los cursos que hay que aprobar antes de course_id (ids)"""
+        return self._decode(self._course_mask(course_id))
+
+    def passed_masks(self, student_ids):
+        """{estudiante_id: máscara de cursos aprobados}, una consulta por lote"""
+        student_ids = list(set(student_ids))
+        masks = dict.fromkeys(student_ids, 0)
+        for start in range(0, len(student_ids), STUDENT_BATCH_SIZE):
+            rows = session.execute(
+                select(Enrollment.estudiante_id, Enrollment.curso_id).where(
+                    Enrollment.estudiante_id.in_(student_ids[start:start + STUDENT_BATCH_SIZE]),
+                    Enrollment.calificacion.in_(PASSING_GRADES)
+                )
+            )
+            for estudiante_id, curso_id in rows:
+                masks[estudiante_id] |= self.bit.get(curso_id, 0)
+        session.commit()
+        return masks
+
+    def check_many(self, requests):
+        """Prerrequisitos faltantes de cada (estudiante_id, curso_id).
+
+        Retorna una lista paralela a `requests` con los ids faltantes
+        (vacía = puede matricularse). Solo se consultan las notas de los
+        estudiantes que piden cursos con prerrequisitos.
+        """
+        requests = list(requests)
+        required = [self._course_mask(curso_id) for _, curso_id in requests]
+        masks = self.passed_masks(
+            estudiante_id for (estudiante_id, _), mask in zip(requests, required) if mask
+        )
+        return [self._decode(mask & ~masks[estudiante_id]) if mask else []
+                for (estudiante_id, _), mask in zip(requests, required)]
+
+    def missing(self, estudiante_id: int, curso_id: int):
+        """Prerrequisitos que le faltan al estudiante para curso_id (ids)"""
+        return self.check_many([(estudiante_id, curso_id)])[0]
+
+    def codes_of(self, course_ids):
+        return [self.codes[course_id] for course_id in course_ids]
+
+    def describe_cycles(self) -> str:
+        return '; '.join(' -> '.join(self.codes_of(cycle)) for cycle in self.cycles)
+
+    def stats(self):
+        self._ensure_loaded()
+        depths = [bin(mask).count('1') for mask in self.closure.values()]
+        return {
+            'cursos': len(self.ids),
+            'con_prerrequisito': len(self.parent),
+            'cadena_maxima': max(depths, default=0),
+            'ciclos': len(self.cycles),
+        }
+
+
+prerequisite_graph = PrerequisiteGraph()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grafo de prerrequisitos de cursos")
+    parser.add_argument('--validar', action='store_true', help="Reportar ciclos (sale con código 1 si hay)")
+    parser.add_argument('--medir', type=int, metavar='SOLICITUDES',
+                        help="Medir check_many con solicitudes al azar")
+    parser.add_argument('--semilla', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = prerequisite_graph.load()
+    print(f"🔗 Grafo cargado en {(time.perf_counter() - start) * 1000:.1f} ms: {graph.stats()}")
+
+    if args.medir:
+        from models import Student
+        rng = random.Random(args.semilla)
+        student_ids = session.execute(select(Student.id)).scalars().all()
+        session.commit()
+        requests = [(rng.choice(student_ids), rng.choice(graph.ids)) for _ in range(args.medir)]
+        start = time.perf_counter()
+        results = graph.check_many(requests)
+        elapsed = time.perf_counter() - start
+        blocked = sum(1 for missing in results if missing)
+        print(f"⏱️  {len(requests)} verificaciones en {elapsed:.3f} s ({len(requests) / elapsed:,.0f}/s), "
+              f"{blocked} sin prerrequisitos aprobados")
+
+    if args.validar:
+        if graph.cycles:
+            print(f"❌ Ciclos: {graph.describe_cycles()}")
+            raise SystemExit(1)
+        print("✅ Sin ciclos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+'''
+Carga docente por profesor, para jefes de departamento.
+
+    python professor_workload.py                               # semestre vigente, resumen por departamento
+    python professor_workload.py --departamento 4 --activos --csv
+    python professor_workload.py --semestre Verano --profesor 17
+
+Por profesor: cursos, créditos y coordinaciones del semestre
+(asignacion_profesor), tesis en progreso que asesora (tesis.asesor_id),
+eventos académicos próximos a su cargo (evento_academico.responsable_id) y
+laboratorios de los que es responsable (laboratorio.responsable_id).
+
+En lugar de consultar cada fuente por profesor, se hacen cinco consultas
+para todos: profesores y un GROUP BY por profesor en cada tabla. El
+resultado queda en memoria para todos los semestres y departamentos, así
+que los filtros no vuelven a la base. La caché se recarga cada
+WORKLOAD_CACHE_SECONDS segundos y se invalida al crear profesores o
+asignaciones con cruds (ProfessorCRUD, CourseCRUD.assign_professor,
+SyncCRUD.upsert_professors); los cambios de otros procesos se ven al
+recargar. Las lecturas van a la réplica si hay (replicas.py).
+'''
+
+from models import Professor, Department, Course, CourseAssignment, Thesis, AcademicEvent, Laboratory, current_academic_period
+from replicas import read_session, run_on_replica
+from sqlalchemy import select, func, case
+from collections import namedtuple
+from datetime import date, datetime
+import argparse
+import os
+import threading
+import time
+
+ProfessorWorkloadRecord = namedtuple('ProfessorWorkloadRecord', [
+    'profesor_id', 'nombre', 'apellido', 'departamento_id', 'departamento', 'activo', 'semestre',
+    'cursos', 'creditos', 'coordinaciones', 'tesis_en_progreso', 'eventos_proximos', 'laboratorios'
+])
+
+WORKLOAD_CACHE_SECONDS = float(os.getenv('WORKLOAD_CACHE_SECONDS', '300'))
+
+
+class ProfessorWorkload:
+    def __init__(self, max_age: float = WORKLOAD_CACHE_SECONDS):
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._loaded_at = None
+        self._version = 0
+        self._snapshot = None
+
+    # --- Carga ---
+
+    def _read(self, today: date):
+        professors = read_session.execute(
+            select(Professor.id, Professor.nombre, Professor.apellido, Professor.departamento_id,
+                   Department.nombre.label('departamento'), Professor.activo)
+            .join(Department, Professor.departamento_id == Department.id)
+            .order_by(Department.nombre, Professor.apellido, Professor.nombre)
+        ).all()
+        courses = {(row.profesor_id, row.semestre): (row.cursos, row.creditos or 0, row.coordinaciones or 0)
+                   for row in read_session.execute(
+            select(CourseAssignment.profesor_id, CourseAssignment.semestre,
+                   func.count().label('cursos'), func.sum(Course.creditos).label('creditos'),
+                   func.sum(case((CourseAssignment.es_coordinador, 1), else_=0)).label('coordinaciones'))
+            .join(Course, Course.id == CourseAssignment.curso_id)
+            .group_by(CourseAssignment.profesor_id, CourseAssignment.semestre)
+        )}
+        theses = dict(read_session.execute(
+            select(Thesis.asesor_id, func.count()).where(Thesis.estado == 'En progreso').group_by(Thesis.asesor_id)
+        ).all())
+        events = dict(read_session.execute(
+            select(AcademicEvent.responsable_id, func.count()).where(AcademicEvent.fecha >= today)
+            .group_by(AcademicEvent.responsable_id)
+        ).all())
+        labs = dict(read_session.execute(
+            select(Laboratory.responsable_id, func.count()).group_by(Laboratory.responsable_id)
+        ).all())
+        return professors, courses, theses, events, labs
+
+    def load(self):
+        """Leer los agregados de todos los profesores"""
+        with self._lock:
+            version = self._version
+        today = date.today()
+        snapshot = run_on_replica(lambda: self._read(today))
+        with self._lock:
+            # Si se invalidó durante la lectura, la próxima consulta vuelve a cargar
+            if version == self._version:
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+        return snapshot
+
+    def invalidate(self):
+        """Descartar la caché; la próxima consulta recarga"""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self._loaded_at = None
+
+    def _current(self):
+        with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.max_age:
+                return self._snapshot
+        return self.load()
+
+    # --- Consultas ---
+
+    def report(self, departamento_id: int = None, activo: bool = None, semestre: str = None,
+               profesor_id: int = None):
+        """Carga de los profesores filtrados en un semestre (por defecto el vigente).
+
+        Retorna una lista de ProfessorWorkloadRecord ordenada por departamento y apellido.
+        """
+        semestre = semestre or current_academic_period()[1]
+        professors, courses, theses, events, labs = self._current()
+        records = []
+        for professor in professors:
+            if departamento_id and professor.departamento_id != departamento_id:
+                continue
+            if activo is not None and bool(professor.activo) != activo:
+                continue
+            if profesor_id and professor.id != profesor_id:
+                continue
+            cursos, creditos, coordinaciones = courses.get((professor.id, semestre), (0, 0, 0))
+            records.append(ProfessorWorkloadRecord(
+                professor.id, professor.nombre, professor.apellido, professor.departamento_id,
+                professor.departamento, professor.activo, semestre, cursos, creditos, coordinaciones,
+                theses.get(professor.id, 0), events.get(professor.id, 0), labs.get(professor.id, 0)
+            ))
+        return records
+
+    @staticmethod
+    def summarize(records):
+        """Totales por departamento: profesores, cursos, coordinaciones, tesis, eventos y laboratorios"""
+        summary = {}
+        for record in records:
+            row = summary.setdefault(record.departamento_id, {
+                'departamento': record.departamento, 'profesores': 0, 'cursos': 0, 'coordinaciones': 0,
+                'tesis': 0, 'eventos': 0, 'laboratorios': 0, 'sin_cursos': 0})
+            row['profesores'] += 1
+            row['cursos'] += record.cursos
+            row['coordinaciones'] += record.coordinaciones
+            row['tesis'] += record.tesis_en_progreso
+            row['eventos'] += record.eventos_proximos
+            row['laboratorios'] += record.laboratorios
+            row['sin_cursos'] += record.cursos == 0
+        return list(summary.values())
+
+
+professor_workload = ProfessorWorkload()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga docente por profesor")
+    parser.add_argument('--departamento', type=int, help="ID del departamento")
+    parser.add_argument('--activos', action='store_true', help="Solo profesores activos")
+    parser.add_argument('--semestre', choices=['Primer Semestre', 'Segundo Semestre', 'Verano'],
+                        help="Semestre de las asignaciones (por defecto el vigente)")
+    parser.add_argument('--profesor', type=int, help="Detalle de un profesor")
+    parser.add_argument('--csv', action='store_true', help="Exportar a reports/")
+    args = parser.parse_args()
+
+    activo = True if args.activos else None
+    start = time.perf_counter()
+    records = professor_workload.report(args.departamento, activo, args.semestre, args.profesor)
+    elapsed = time.perf_counter() - start
+    if args.profesor:
+        if not records:
+            print("❌ Profesor no encontrado")
+            return
+        for field, value in records[0]._asdict().items():
+            print(f"  {field:<20} {value}")
+        return
+
+    start = time.perf_counter()
+    professor_workload.report(args.departamento, activo, args.semestre)
+    print(f"👩‍🏫 {len(records)} profesores en {elapsed * 1000:.1f} ms "
+          f"(desde la caché: {(time.perf_counter() - start) * 1000:.2f} ms)")
+    print("{:<30} {:>6} {:>7} {:>7} {:>6} {:>8} {:>5} {:>10}".format(
+        "Departamento", "Prof.", "Cursos", "Coord.", "Tesis", "Eventos", "Labs", "Sin cursos"))
+    print("-" * 86)
+    for row in ProfessorWorkload.summarize(records):
+        print("{:<30} {:>6} {:>7} {:>7} {:>6} {:>8} {:>5} {:>10}".format(
+            str(row['departamento'])[:30], row['profesores'], row['cursos'], row['coordinaciones'],
+            row['tesis'], row['eventos'], row['laboratorios'], row['sin_cursos']))
+
+    if args.csv and records:
+        from reports import ReportGenerator
+        filename = f"carga_docente_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        print(f"\n📄 {ReportGenerator.export_to_csv(records, filename)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+'''
+Enrutamiento de lecturas a réplicas.
+
+Las escrituras y las lecturas que deben ver las propias escrituras (los
+get_*/update_* de cruds.py) usan models.session, conectada al primario.
+Los reportes de ReportGenerator y los listados de solo lectura
+(list_*_records) usan read_session: cada transacción se conecta a una
+réplica sana de READ_REPLICA_URLS (rotando entre ellas) y, si no hay
+ninguna disponible, al primario.
+
+    READ_REPLICA_URLS=postgresql://.../sgu_replica1,postgresql://.../sgu_replica2
+    READ_REPLICA_CHECK_SECONDS=30        # cada cuánto se revisa una réplica
+    READ_REPLICA_MAX_LAG_SECONDS=10      # PostgreSQL: atraso máximo aceptado
+
+Prueba local con dos archivos SQLite (--copiar simula la replicación
+copiando el primario a cada réplica):
+
+    DATABASE_URL=sqlite:///primario.db READ_REPLICA_URLS=sqlite:///replica.db python replicas.py --copiar
+'''
+
+from models import engine, make_engine
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session, sessionmaker, scoped_session
+import argparse
+import itertools
+import os
+import threading
+import time
+
+READ_REPLICA_URLS = [url.strip() for url in os.getenv('READ_REPLICA_URLS', '').split(',') if url.strip()]
+READ_REPLICA_CHECK_SECONDS = float(os.getenv('READ_REPLICA_CHECK_SECONDS', '30'))
+READ_REPLICA_MAX_LAG_SECONDS = os.getenv('READ_REPLICA_MAX_LAG_SECONDS')
+
+
+class ReplicaRouter:
+    def __init__(self, primary, replica_urls, check_interval: float = 30.0, max_lag: float = None):
+        self.primary = primary
+        self.replicas = [make_engine(url) for url in replica_urls]
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._status = {}  # engine -> (sana, momento de la revisión)
+        self._cycle = itertools.cycle(range(len(self.replicas)))
+        self._lock = threading.Lock()
+
+    def check(self, replica) -> bool:
+        """Revisar la réplica ahora: conexión y, en PostgreSQL, atraso de replicación"""
+        try:
+            with replica.connect() as connection:
+                if replica.dialect.name == 'postgresql' and self.max_lag is not None:
+                    lag = connection.exec_driver_sql(
+                        "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+                    ).scalar()
+                    healthy = float(lag) <= self.max_lag
+                else:
+                    connection.exec_driver_sql("SELECT 1")
+                    healthy = True
+        except Exception:
+            healthy = False
+        self._status[replica] = (healthy, time.monotonic())
+        return healthy
+
+    def is_healthy(self, replica) -> bool:
+        healthy, checked_at = self._status.get(replica, (None, 0.0))
+        if healthy is None or time.monotonic() - checked_at >= self.check_interval:
+            return self.check(replica)
+        return healthy
+
+    def mark_down(self, replica):
+        """Sacar la réplica de la rotación hasta la próxima revisión"""
+        self._status[replica] = (False, time.monotonic())
+
+    def read_engine(self):
+        """Siguiente réplica sana en la rotación, o el primario si no hay"""
+        for _ in range(len(self.replicas)):
+            with self._lock:
+                replica = self.replicas[next(self._cycle)]
+            if self.is_healthy(replica):
+                return replica
+        return self.primary
+
+    def status(self):
+        return [(self.primary, True)] + [(replica, self.is_healthy(replica)) for replica in self.replicas]
+
+
+replica_router = ReplicaRouter(
+    engine, READ_REPLICA_URLS, READ_REPLICA_CHECK_SECONDS,
+    float(READ_REPLICA_MAX_LAG_SECONDS) if READ_REPLICA_MAX_LAG_SECONDS else None
+)
+
+
+class ReadOnlySession(Session):
+    """Sesión de lectura: cada transacción queda fijada al engine que elija el router"""
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        bind = self.info.get('bind')
+        if bind is None:
+            bind = self.info['bind'] = self.info['last_bind'] = replica_router.read_engine()
+        return bind
+
+
+# Una sesión de lectura por hilo, como models.session
+read_session = scoped_session(sessionmaker(class_=ReadOnlySession, autoflush=False))
+
+
+@event.listens_for(ReadOnlySession, 'after_transaction_end')
+def _release_bind(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('bind', None)
+
+
+@event.listens_for(ReadOnlySession, 'before_flush')
+def _reject_writes(session, flush_context, instances):
+    raise ValueError("read_session es de solo lectura: usar models.session para escribir")
+
+
+def run_on_replica(operation):
+    """Ejecutar operation() (que lee con read_session) y terminar la transacción.
+
+    Si la réplica falla se marca caída y se reintenta en la siguiente; el
+    último recurso es el primario. operation debe retornar filas o tuplas,
+    no instancias del ORM que luego carguen atributos.
+    """
+    while True:
+        try:
+            result = operation()
+            read_session.rollback()  # fin de la lectura: libera la instantánea en la réplica
+            return result
+        except DBAPIError:
+            bind = read_session.info.get('bind')
+            read_session.rollback()
+            if bind is None or bind is replica_router.primary:
+                raise
+            replica_router.mark_down(bind)
+
+
+
+def stream_on_replica(statement, batch_size: int):
+    """Generador de las filas de statement leídas con read_session en lotes de batch_size.
+
+    Como run_on_replica, si la réplica falla al ejecutar la consulta se
+    marca caída y se reintenta en la siguiente; una vez entregada la primera
+    fila, un error a mitad del recorrido llega al llamador. La transacción
+    de lectura termina al agotar o cerrar el generador.
+    """
+    while True:
+        try:
+            result = read_session.execute(statement, execution_options={'yield_per': batch_size})
+            break
+        except DBAPIError:
+            bind = read_session.info.get('bind')
+            read_session.rollback()
+            if bind is None or bind is replica_router.primary:
+                raise
+            replica_router.mark_down(bind)
+    try:
+        yield from result
+    finally:
+        result.close()
+        read_session.rollback()  # libera la instantánea aunque no se recorran todas las filas
+
+def copy_sqlite_primary():
+    """Copiar el primario SQLite a cada réplica SQLite con la API de backup"""
+    source = engine.raw_connection()
+    try:
+        for replica in replica_router.replicas:
+            if replica.dialect.name != 'sqlite':
+                continue
+            target = replica.raw_connection()
+            try:
+                source.dbapi_connection.backup(target.dbapi_connection)
+            finally:
+                target.close()
+    finally:
+        source.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estado de las réplicas de lectura")
+    parser.add_argument('--copiar', action='store_true', help="Copiar el primario SQLite a las réplicas SQLite")
+    args = parser.parse_args()
+
+    # Como script este archivo se carga dos veces (__main__ y replicas, que
+    # importa reports): usar la sesión y el router del módulo importado
+    from replicas import replica_router, read_session, copy_sqlite_primary
+    from reports import ReportGenerator
+
+    if args.copiar:
+        copy_sqlite_primary()
+        print("✅ Primario copiado a las réplicas SQLite")
+
+    print("{:<10} {:<55} {:<8}".format("Rol", "URL", "Estado"))
+    print("-" * 75)
+    for index, (bind, healthy) in enumerate(replica_router.status()):
+        role = 'primario' if index == 0 else f"réplica {index}"
+        url = bind.url.render_as_string(hide_password=True)
+        print("{:<10} {:<55} {:<8}".format(role, url, '✅' if healthy else '❌'))
+
+    rows = ReportGenerator.students_by_faculty_report()
+    served_by = read_session.info['last_bind'].url.render_as_string(hide_password=True)
+    print(f"\n📊 Reporte de prueba: {len(rows)} filas desde {served_by}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
-from models import session, Student, Faculty, Course, Major, Enrollment
+from models import session, Student, Faculty, Course, Major, Enrollment, Professor, Department
 from sqlalchemy import func, and_, or_
 import csv
 from datetime import datetime, date
 from typing import List, Dict, Any
 import os
+from replicas import read_session, run_on_replica, stream_on_replica
+from professor_workload import professor_workload
 
 class ReportGenerator:
     REPORTS_DIR = os.path.join(os.path.dirname(__file__), '..', 'reports')
@@ -98,136 +100,243 @@ class ReportGenerator:
         
         return f"Datos exportados a {filename}"
     
+    @staticmethod
+    def build_students_by_faculty_query(faculty_id=None, status=None, year_from=None, year_to=None, age_min=None):
+        """Consulta del reporte de estudiantes por facultad (sin ejecutar)"""
+        query = read_session.query(
+            Student.id,
+            Student.nombre,
+            Student.apellido,
+            Major.nombre.label('carrera'),
+            Faculty.nombre.label('facultad'),
+            Student.fecha_ingreso,
+            Student.estado
+        ).join(Major, Student.carrera_id == Major.id)\
+         .join(Faculty, Major.facultad_id == Faculty.id)
+        
+        # Filtro 1: Por facultad
+        if faculty_id:
+            query = query.filter(Faculty.id == faculty_id)
+        
+        # Filtro 2: Por estado
+        if status:
+            query = query.filter(Student.estado == status)
+        
+        # Filtro 3: Por año de ingreso (desde)
+        if year_from:
+            query = query.filter(Student.fecha_ingreso >= date(year_from, 1, 1))
+        
+        # Filtro 4: Por año de ingreso (hasta)
+        if year_to:
+            query = query.filter(Student.fecha_ingreso <= date(year_to, 12, 31))
+        
+        # Filtro 5: Por edad mínima
+        if age_min:
+            birth_year = datetime.now().year - age_min
+            query = query.filter(Student.fecha_nacimiento <= date(birth_year, 12, 31))
+        
+        return query
+
     @staticmethod
     def students_by_faculty_report(faculty_id=None, status=None, year_from=None, year_to=None, age_min=None):
         """Reporte de estudiantes por facultad con 5 filtros"""
         try:
-            query = session.query(
-                Student.id,
-                Student.nombre,
-                Student.apellido,
-                Major.nombre.label('carrera'),
-                Faculty.nombre.label('facultad'),
-                Student.fecha_ingreso,
-                Student.estado
-            ).join(Major, Student.carrera_id == Major.id)\
-             .join(Faculty, Major.facultad_id == Faculty.id)
-            
-            # Filtro 1: Por facultad
-            if faculty_id:
-                query = query.filter(Faculty.id == faculty_id)
-            
-            # Filtro 2: Por estado
-            if status:
-                query = query.filter(Student.estado == status)
-            
-            # Filtro 3: Por año de ingreso (desde)
-            if year_from:
-                query = query.filter(Student.fecha_ingreso >= date(year_from, 1, 1))
-            
-            # Filtro 4: Por año de ingreso (hasta)
-            if year_to:
-                query = query.filter(Student.fecha_ingreso <= date(year_to, 12, 31))
-            
-            # Filtro 5: Por edad mínima
-            if age_min:
-                birth_year = datetime.now().year - age_min
-                query = query.filter(Student.fecha_nacimiento <= date(birth_year, 12, 31))
-            
-            return query.all()
+            return run_on_replica(lambda: ReportGenerator.build_students_by_faculty_query(
+                faculty_id, status, year_from, year_to, age_min
+            ).all())
             
         except Exception as e:
             raise ValueError(f"Error generating report: {str(e)}")
 
     @staticmethod
-    def courses_by_semester_report(semester=None, faculty_id=None, min_credits=None, max_students=None, professor_id=None):
+    def build_courses_by_semester_query(semester=None, faculty_id=None, min_credits=None, max_students=None, professor_id=None,
+                                        academic_year=None):
+        """Consulta del reporte de cursos por semestre (sin ejecutar)"""
+        # Filtro 1: Por periodo (año y semestre). Va en la condición del LEFT JOIN:
+        # en el WHERE convertiría el join en INNER y descartaría los cursos sin
+        # matrículas. En PostgreSQL solo se leen las particiones del periodo.
+        enrollment_join = Course.id == Enrollment.curso_id
+        if academic_year:
+            enrollment_join = and_(enrollment_join, Enrollment.anio_academico == academic_year)
+        if semester:
+            enrollment_join = and_(enrollment_join, Enrollment.semestre == semester)
+        
+        query = read_session.query(
+            Course.id,
+            Course.codigo,
+            Course.nombre,
+            Course.creditos,
+            Major.nombre.label('carrera'),
+            Faculty.nombre.label('facultad'),
+            func.count(Enrollment.estudiante_id).label('total_estudiantes')
+        ).join(Major, Course.carrera_id == Major.id)\
+         .join(Faculty, Major.facultad_id == Faculty.id)\
+         .outerjoin(Enrollment, enrollment_join)
+        
+        # Filtro 2: Por facultad
+        if faculty_id:
+            query = query.filter(Faculty.id == faculty_id)
+        
+        # Filtro 3: Por créditos mínimos
+        if min_credits:
+            query = query.filter(Course.creditos >= min_credits)
+        
+        # Filtro 4: Por máximo número de estudiantes
+        query = query.group_by(Course.id, Course.codigo, Course.nombre, Course.creditos, Major.nombre, Faculty.nombre)
+        
+        if max_students:
+            query = query.having(func.count(Enrollment.estudiante_id) <= max_students)
+        
+        # Filtro 5: Por profesor (si tienes asignación de profesores)
+        # if professor_id:
+        #     query = query.join(CourseAssignment).filter(CourseAssignment.profesor_id == professor_id)
+        
+        return query
+
+    @staticmethod
+    def courses_by_semester_report(semester=None, faculty_id=None, min_credits=None, max_students=None, professor_id=None,
+                                   academic_year=None):
         """Reporte de cursos por semestre con 5 filtros"""
         try:
-            query = session.query(
-                Course.id,
-                Course.codigo,
-                Course.nombre,
-                Course.creditos,
-                Major.nombre.label('carrera'),
-                Faculty.nombre.label('facultad'),
-                func.count(Enrollment.estudiante_id).label('total_estudiantes')
-            ).join(Major, Course.carrera_id == Major.id)\
-             .join(Faculty, Major.facultad_id == Faculty.id)\
-             .outerjoin(Enrollment, Course.id == Enrollment.curso_id)
-            
-            # Filtro 1: Por semestre
-            if semester:
-                query = query.filter(Enrollment.semestre == semester)
-            
-            # Filtro 2: Por facultad
-            if faculty_id:
-                query = query.filter(Faculty.id == faculty_id)
-            
-            # Filtro 3: Por créditos mínimos
-            if min_credits:
-                query = query.filter(Course.creditos >= min_credits)
-            
-            # Filtro 4: Por máximo número de estudiantes
-            query = query.group_by(Course.id, Course.codigo, Course.nombre, Course.creditos, Major.nombre, Faculty.nombre)
-            
-            if max_students:
-                query = query.having(func.count(Enrollment.estudiante_id) <= max_students)
-            
-            # Filtro 5: Por profesor (si tienes asignación de profesores)
-            # if professor_id:
-            #     query = query.join(CourseAssignment).filter(CourseAssignment.profesor_id == professor_id)
-            
-            return query.all()
+            return run_on_replica(lambda: ReportGenerator.build_courses_by_semester_query(
+                semester, faculty_id, min_credits, max_students, professor_id, academic_year
+            ).all())
             
         except Exception as e:
             raise ValueError(f"Error generating courses report: {str(e)}")
 
+    @staticmethod
+    def build_active_enrollments_query(status='Activa', academic_year=None, semester=None, course_id=None,
+                                       student_id=None, enrolled_from=None):
+        """Consulta del reporte de matrículas (sin ejecutar)"""
+        query = read_session.query(
+            Enrollment.estudiante_id,
+            (Student.nombre + ' ' + Student.apellido).label('estudiante'),
+            Course.codigo,
+            Course.nombre.label('curso'),
+            Enrollment.anio_academico,
+            Enrollment.semestre,
+            Enrollment.estado,
+            Enrollment.fecha_matricula
+        ).join(Student, Enrollment.estudiante_id == Student.id)\
+         .join(Course, Enrollment.curso_id == Course.id)
+        
+        # Filtros 1 y 2: Estado y periodo académico (año y semestre)
+        if status:
+            query = query.filter(Enrollment.estado == status)
+        if academic_year:
+            query = query.filter(Enrollment.anio_academico == academic_year)
+        if semester:
+            query = query.filter(Enrollment.semestre == semester)
+        
+        # Filtro 3: Por curso
+        if course_id:
+            query = query.filter(Enrollment.curso_id == course_id)
+        
+        # Filtro 4: Por estudiante
+        if student_id:
+            query = query.filter(Enrollment.estudiante_id == student_id)
+        
+        # Filtro 5: Por fecha de matrícula
+        if enrolled_from:
+            query = query.filter(Enrollment.fecha_matricula >= enrolled_from)
+        
+        return query.order_by(Enrollment.anio_academico, Enrollment.semestre, Course.codigo)
+
+    @staticmethod
+    def active_enrollments_report(status='Activa', academic_year=None, semester=None, course_id=None,
+                                  student_id=None, enrolled_from=None):
+        """Reporte de matrículas con 5 filtros"""
+        try:
+            return run_on_replica(lambda: ReportGenerator.build_active_enrollments_query(
+                status, academic_year, semester, course_id, student_id, enrolled_from
+            ).all())
+            
+        except Exception as e:
+            raise ValueError(f"Error generating enrollments report: {str(e)}")
+
+    @staticmethod
+    def build_professors_by_department_query(department_id=None, min_salary=None, max_salary=None, active_only=None, hire_year=None):
+        """Consulta del reporte de profesores por departamento (sin ejecutar)"""
+        query = read_session.query(
+            Professor.id,
+            Professor.nombre,
+            Professor.apellido,
+            Professor.especializacion,
+            Professor.salario,
+            Professor.fecha_contratacion,
+            Professor.activo,
+            Department.nombre.label('departamento'),
+            Faculty.nombre.label('facultad')
+        ).join(Department, Professor.departamento_id == Department.id)\
+         .join(Faculty, Department.facultad_id == Faculty.id)
+        
+        # Filtro 1: Por departamento
+        if department_id:
+            query = query.filter(Department.id == department_id)
+        
+        # Filtro 2: Por salario mínimo
+        if min_salary:
+            query = query.filter(Professor.salario >= min_salary)
+        
+        # Filtro 3: Por salario máximo
+        if max_salary:
+            query = query.filter(Professor.salario <= max_salary)
+        
+        # Filtro 4: Solo activos
+        if active_only:
+            query = query.filter(Professor.activo == True)
+        
+        # Filtro 5: Por año de contratación
+        if hire_year:
+            query = query.filter(func.extract('year', Professor.fecha_contratacion) == hire_year)
+        
+        return query
+
     @staticmethod
     def professors_by_department_report(department_id=None, min_salary=None, max_salary=None, active_only=None, hire_year=None):
         """Reporte de profesores por departamento con 5 filtros"""
         try:
-            query = session.query(
-                Professor.id,
-                Professor.nombre,
-                Professor.apellido,
-                Professor.especializacion,
-                Professor.salario,
-                Professor.fecha_contratacion,
-                Professor.activo,
-                Department.nombre.label('departamento'),
-                Faculty.nombre.label('facultad')
-            ).join(Department, Professor.departamento_id == Department.id)\
-             .join(Faculty, Department.facultad_id == Faculty.id)
-            
-            # Filtro 1: Por departamento
-            if department_id:
-                query = query.filter(Department.id == department_id)
-            
-            # Filtro 2: Por salario mínimo
-            if min_salary:
-                query = query.filter(Professor.salario >= min_salary)
-            
-            # Filtro 3: Por salario máximo
-            if max_salary:
-                query = query.filter(Professor.salario <= max_salary)
-            
-            # Filtro 4: Solo activos
-            if active_only:
-                query = query.filter(Professor.activo == True)
-            
-            # Filtro 5: Por año de contratación
-            if hire_year:
-                query = query.filter(func.extract('year', Professor.fecha_contratacion) == hire_year)
-            
-            return query.all()
+            return run_on_replica(lambda: ReportGenerator.build_professors_by_department_query(
+                department_id, min_salary, max_salary, active_only, hire_year
+            ).all())
             
         except Exception as e:
             raise ValueError(f"Error generating professors report: {str(e)}")
 
+    @staticmethod
+    def professor_workload_report(department_id=None, active_only=None, semester=None):
+        """Carga docente por profesor: cursos, coordinaciones, tesis, eventos y laboratorios.
+
+        Sale de la caché de agregados de professor_workload.py, sin consultas por profesor.
+        """
+        try:
+            return professor_workload.report(department_id, True if active_only else None, semester)
+            
+        except Exception as e:
+            raise ValueError(f"Error generating workload report: {str(e)}")
+
+    @staticmethod
+    def stream(query, batch_size: int = 1000):
+        """Filas de un reporte (build_*_query) leídas del cursor en lotes.
+
+        Ver replicas.stream_on_replica: si la réplica falla antes de la primera
+        fila se pasa a otra; si falla a mitad del recorrido el error llega al
+        llamador.
+        """
+        return stream_on_replica(query.statement, batch_size)
+
     @staticmethod
     def export_to_csv(data, filename: str):
-        """Exportar datos a CSV en carpeta específica"""
-        if not data:
+        """Exportar datos a CSV en carpeta específica.
+
+        Acepta una lista o un iterador (ej. ReportGenerator.stream) de tuplas
+        con nombre / Row, o de diccionarios. Las tuplas se escriben tal cual,
+        sin convertir cada fila a diccionario.
+        """
+        rows = iter(data)
+        first = next(rows, None)
+        if first is None:
             raise ValueError("No hay datos para exportar")
         
         # Asegurar que existe el directorio
@@ -237,18 +346,15 @@ class ReportGenerator:
         full_path = os.path.join(reports_dir, filename)
         
         with open(full_path, 'w', newline='', encoding='utf-8') as file:
-            if hasattr(data[0], '_fields'):  # Named tuple
-                fieldnames = data[0]._fields
-            else:  # SQLAlchemy result
-                fieldnames = data[0].keys()
-            
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for row in data:
-                if hasattr(row, '_asdict'):
-                    writer.writerow(row._asdict())
-                else:
-                    writer.writerow(dict(row._asdict() if hasattr(row, '_asdict') else row))
+            writer = csv.writer(file)
+            if hasattr(first, '_fields'):  # Named tuple / Row de SQLAlchemy
+                writer.writerow(first._fields)
+                writer.writerow(first)
+                writer.writerows(rows)
+            else:  # Diccionarios
+                fieldnames = list(first.keys())
+                writer.writerow(fieldnames)
+                writer.writerow([first[key] for key in fieldnames])
+                writer.writerows([row[key] for key in fieldnames] for row in rows)
         
         return f"Datos exportados a {full_path}"
\ No newline at end of file
@@ -0,0 +1,101 @@
+'''
+Escritor único con commit agrupado para SQLite.
+
+SQLite admite un solo escritor a la vez: con muchos hilos escribiendo, cada
+uno espera el lock (busy_timeout) y paga su propio commit. SingleWriter
+ejecuta las operaciones de escritura en un hilo dedicado con su propia
+sesión: toma todas las que estén en cola (hasta max_batch), corre cada una en
+un SAVEPOINT (si una falla no afecta a las demás) y confirma el lote con un
+solo commit.
+
+    resultado = sqlite_writer.submit(operacion, arg1, arg2)   # operacion(db, arg1, arg2)
+
+Se usa para las matrículas (EnrollmentCRUD.enroll_student) cuando la base es
+SQLite en archivo y SQLITE_SINGLE_WRITER no es '0'.
+'''
+
+from models import engine, make_engine
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+import os
+import queue
+import threading
+
+SQLITE_SINGLE_WRITER = os.getenv('SQLITE_SINGLE_WRITER', '1') != '0'
+
+
+class SingleWriter:
+    def __init__(self, session_factory, max_batch: int = 256):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def submit(self, operation, *args):
+        """Encolar operation(db, *args) y esperar su resultado (o su excepción)"""
+        self._ensure_started()
+        request = {'operation': operation, 'args': args, 'done': threading.Event()}
+        self._queue.put(request)
+        request['done'].wait()
+        if 'error' in request:
+            raise request['error']
+        return request['result']
+
+    def _run(self):
+        db = self.session_factory()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for request in batch:
+                try:
+                    with db.begin_nested():
+                        request['result'] = request['operation'](db, *request['args'])
+                except Exception as e:
+                    request['error'] = e
+            try:
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for request in batch:
+                    request.setdefault('error', e)
+            for request in batch:
+                request['done'].set()
+
+
+def _uses_single_writer() -> bool:
+    return (SQLITE_SINGLE_WRITER and engine.dialect.name == 'sqlite'
+            and engine.url.database not in (None, '', ':memory:'))
+
+
+def _writer_sessionmaker():
+    """Sesiones sobre una sola conexión que abre cada lote con BEGIN IMMEDIATE.
+
+    pysqlite no emite BEGIN antes de un SAVEPOINT (el primer RELEASE haría
+    commit): se desactiva su manejo de transacciones y SQLAlchemy emite el
+    BEGIN, tomando el lock de escritura desde el inicio del lote.
+    """
+    writer_engine = make_engine(engine.url.render_as_string(hide_password=False), pool_size=1, max_overflow=0)
+
+    @event.listens_for(writer_engine, 'connect')
+    def _autocommit_driver(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(writer_engine, 'begin')
+    def _begin_immediate(connection):
+        connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+    return sessionmaker(bind=writer_engine)
+
+
+sqlite_writer = SingleWriter(_writer_sessionmaker()) if _uses_single_writer() else None
@@ -0,0 +1,291 @@
+'''
+Snapshots de la base completa para reiniciar ambientes de prueba y staging.
+
+    python snapshots.py capturar semilla      # después de data_generator.py
+    python snapshots.py restaurar semilla     # segundos, en lugar de regenerar
+    python snapshots.py listar
+    python snapshots.py reiniciar             # vaciar todas las tablas
+
+SQLite: el snapshot es una copia del archivo hecha con la API de backup
+(consistente aunque haya otras conexiones) en snapshots/<nombre>.db, y se
+restaura copiando de vuelta con la misma API.
+
+PostgreSQL, dos métodos (--metodo):
+    plantilla  CREATE DATABASE <bd>_snap_<nombre> TEMPLATE <bd>. Restaurar
+               elimina la base (DROP ... WITH (FORCE)) y la recrea desde la
+               plantilla. Es lo más rápido, pero requiere permiso CREATEDB y
+               desconecta a los demás clientes.
+    copy       COPY de cada tabla a snapshots/<nombre>/<tabla>.csv.gz.
+               Restaurar vacía las tablas con TRUNCATE y las carga con COPY
+               en orden de llaves foráneas (padres primero) con los triggers
+               de usuario desactivados, y ajusta las secuencias de los id.
+
+reiniciar usa TRUNCATE ... RESTART IDENTITY CASCADE en PostgreSQL, que no
+dispara los triggers por fila (auditoría) y reinicia las secuencias. En
+SQLite borra las tablas en orden inverso de llaves foráneas.
+'''
+
+from models import session, engine, Base
+from sqlalchemy import create_engine, text
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', 'snapshots')
+METHODS = ('plantilla', 'copy')
+
+
+class DatabaseSnapshots:
+    def __init__(self, snapshot_dir: str = DEFAULT_SNAPSHOT_DIR, method: str = 'plantilla'):
+        if method not in METHODS:
+            raise ValueError(f"Método no soportado: {method}. Opciones: {', '.join(METHODS)}")
+        self.snapshot_dir = snapshot_dir
+        self.method = method
+        self.is_postgres = engine.dialect.name == 'postgresql'
+
+    def _release_connections(self):
+        """Cerrar la sesión y el pool: restaurar reemplaza la base bajo ellas"""
+        session.close()
+        engine.dispose()
+
+    def _path(self, name: str, suffix: str = '') -> str:
+        if not os.path.exists(self.snapshot_dir):
+            os.makedirs(self.snapshot_dir)
+        return os.path.join(self.snapshot_dir, name + suffix)
+
+    # --- Tablas ---
+
+    def tables(self):
+        """Tablas con datos, padres antes que hijas"""
+        if not self.is_postgres:
+            return [table.name for table in Base.metadata.sorted_tables
+                    if table.name in _sqlite_tables()]
+        # Tablas normales y particionadas de nivel superior (las particiones
+        # se copian y vacían a través de su tabla padre)
+        tables = session.execute(text("""
+            SELECT c.relname
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p') AND NOT c.relispartition
+            ORDER BY c.relname
+        """)).scalars().all()
+        return self._dependency_order(tables)
+
+    def _dependency_order(self, tables):
+        """Ordenar `tables` según sus llaves foráneas en PostgreSQL (padres antes que hijas).
+
+        Las llaves se revisan con triggers internos que DISABLE TRIGGER USER
+        no desactiva, así que COPY debe cargar cada padre antes que sus hijas.
+        Las referencias a la misma tabla no cuentan; si hubiera un ciclo, sus
+        tablas quedan al final en orden alfabético.
+        """
+        edges = session.execute(text("""
+            SELECT DISTINCT hija.relname, padre.relname
+            FROM pg_constraint k
+            JOIN pg_class hija ON hija.oid = k.conrelid
+            JOIN pg_class padre ON padre.oid = k.confrelid
+            WHERE k.contype = 'f' AND k.conrelid <> k.confrelid
+        """)).all()
+        parents = {table: set() for table in tables}
+        for child, parent in edges:
+            if child in parents and parent in parents:
+                parents[child].add(parent)
+        ordered = []
+        pending = sorted(tables)
+        while pending:
+            ready = [table for table in pending if not parents[table] - set(ordered)]
+            if not ready:
+                ordered.extend(pending)
+                break
+            ordered.extend(ready)
+            pending = [table for table in pending if table not in ready]
+        return ordered
+
+    def truncate(self, tables=None):
+        """Vaciar `tables` (por defecto todas) sin triggers por fila y reiniciar los id"""
+        tables = tables or self.tables()
+        if self.is_postgres:
+            session.execute(text(
+                f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE"
+            ))
+        else:
+            for table in reversed([table.name for table in Base.metadata.sorted_tables if table.name in tables]):
+                session.execute(text(f"DELETE FROM {table}"))
+            if session.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'")).first():
+                session.execute(text("DELETE FROM sqlite_sequence"))
+        session.commit()
+        return tables
+
+    # --- SQLite ---
+
+    def _sqlite_copy(self, source_path: str, target_path: str):
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(target_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+    # --- PostgreSQL: plantilla ---
+
+    def _admin_engine(self):
+        """Conexión a la base de mantenimiento 'postgres' en modo autocommit"""
+        return create_engine(engine.url.set(database='postgres'), isolation_level='AUTOCOMMIT')
+
+    def _template_name(self, name: str) -> str:
+        return f"{engine.url.database}_snap_{name}"
+
+    # --- PostgreSQL: copy ---
+
+    def _copy_out(self, name: str):
+        directory = self._path(name)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        tables = self.tables()
+        cursor = session.connection().connection.cursor()
+        for table in tables:
+            with gzip.open(os.path.join(directory, f"{table}.csv.gz"), 'wt', encoding='utf-8', newline='') as file:
+                cursor.copy_expert(f"COPY (SELECT * FROM {table}) TO STDOUT WITH (FORMAT csv, HEADER)", file)
+        session.commit()
+        with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as file:
+            json.dump({'tablas': tables}, file)
+        return directory
+
+    def _copy_in(self, name: str):
+        directory = self._path(name)
+        with open(os.path.join(directory, 'manifest.json'), encoding='utf-8') as file:
+            tables = json.load(file)['tablas']
+        # Los manifiestos antiguos guardaban las tablas en orden alfabético
+        tables = self._dependency_order(tables)
+        try:
+            session.execute(text(f"TRUNCATE {', '.join(tables)} RESTART IDENTITY CASCADE"))
+            for table in tables:
+                session.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER USER"))
+            cursor = session.connection().connection.cursor()
+            for table in tables:
+                with gzip.open(os.path.join(directory, f"{table}.csv.gz"), 'rt', encoding='utf-8', newline='') as file:
+                    cursor.copy_expert(f"COPY {table} FROM STDIN WITH (FORMAT csv, HEADER)", file)
+            for table in tables:
+                session.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER USER"))
+                if self._has_serial_id(table):
+                    session.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+                        f"FROM {table}"
+                    ))
+            session.commit()
+        except Exception:
+            session.rollback()  # el ALTER y el TRUNCATE se deshacen con la transacción
+            raise
+
+    def _has_serial_id(self, table: str) -> bool:
+        has_id = session.execute(text("""
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = :table AND column_name = 'id'
+        """), {'table': table}).first()
+        if not has_id:
+            return False
+        return session.execute(
+            text("SELECT pg_get_serial_sequence(:table, 'id') IS NOT NULL"), {'table': table}
+        ).scalar()
+
+    # --- API ---
+
+    def capture(self, name: str) -> str:
+        """Guardar el estado actual de la base como `name`. Retorna dónde quedó"""
+        if not self.is_postgres:
+            target = self._path(name, '.db')
+            if os.path.exists(target):
+                os.remove(target)
+            session.commit()
+            self._sqlite_copy(engine.url.database, target)
+            return target
+        if self.method == 'copy':
+            return self._copy_out(name)
+        template = self._template_name(name)
+        self._release_connections()
+        admin = self._admin_engine()
+        try:
+            with admin.connect() as connection:
+                connection.exec_driver_sql(f'DROP DATABASE IF EXISTS "{template}"')
+                connection.exec_driver_sql(f'CREATE DATABASE "{template}" TEMPLATE "{engine.url.database}"')
+        finally:
+            admin.dispose()
+        return template
+
+    def restore(self, name: str) -> str:
+        """Reemplazar el contenido de la base por el snapshot `name`"""
+        if not self.is_postgres:
+            source = self._path(name, '.db')
+            if not os.path.exists(source):
+                raise ValueError(f"No existe el snapshot {name}")
+            self._release_connections()
+            self._sqlite_copy(source, engine.url.database)
+            return source
+        if self.method == 'copy':
+            self._copy_in(name)
+            return self._path(name)
+        template = self._template_name(name)
+        database = engine.url.database
+        self._release_connections()
+        admin = self._admin_engine()
+        try:
+            with admin.connect() as connection:
+                exists = connection.exec_driver_sql(
+                    "SELECT 1 FROM pg_database WHERE datname = %s", (template,)
+                ).first()
+                if not exists:
+                    raise ValueError(f"No existe el snapshot {name}")
+                connection.exec_driver_sql(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+                connection.exec_driver_sql(f'CREATE DATABASE "{database}" TEMPLATE "{template}"')
+        finally:
+            admin.dispose()
+        return template
+
+    def list_snapshots(self):
+        names = set()
+        if os.path.exists(self.snapshot_dir):
+            for entry in os.listdir(self.snapshot_dir):
+                if entry.endswith('.db') or os.path.isdir(os.path.join(self.snapshot_dir, entry)):
+                    names.add(entry[:-3] if entry.endswith('.db') else entry)
+        if self.is_postgres:
+            prefix = f"{engine.url.database}_snap_"
+            names.update(row[len(prefix):] for row in session.execute(
+                text("SELECT datname FROM pg_database WHERE datname LIKE :prefix"), {'prefix': prefix + '%'}
+            ).scalars())
+            session.commit()
+        return sorted(names)
+
+
+def _sqlite_tables():
+    return set(session.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).scalars())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshots de la base para pruebas y staging")
+    parser.add_argument('accion', choices=['capturar', 'restaurar', 'listar', 'reiniciar'])
+    parser.add_argument('nombre', nargs='?', default='semilla')
+    parser.add_argument('--metodo', choices=METHODS, default='plantilla', help="Solo PostgreSQL")
+    parser.add_argument('--destino', default=DEFAULT_SNAPSHOT_DIR, help="Directorio de los snapshots")
+    args = parser.parse_args()
+
+    snapshots = DatabaseSnapshots(args.destino, args.metodo)
+    start = time.perf_counter()
+    if args.accion == 'capturar':
+        print(f"📸 Snapshot '{args.nombre}' guardado en {snapshots.capture(args.nombre)}")
+    elif args.accion == 'restaurar':
+        print(f"♻️  Base restaurada desde {snapshots.restore(args.nombre)}")
+    elif args.accion == 'reiniciar':
+        print(f"🧹 {len(snapshots.truncate())} tablas vaciadas")
+    else:
+        for name in snapshots.list_snapshots():
+            print(f"  • {name}")
+        return
+    print(f"⏱️  {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
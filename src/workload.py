@@ -0,0 +1,302 @@
+'''
+Generador de carga determinístico y sesgado para benchmarks.
+
+    python workload.py --semilla 42 --escala 5
+    python workload.py --semilla 42 --escala 5 --zipf-cursos 1.5 --crecimiento 0.15
+
+A diferencia de data_generator.py (datos de demostración, aleatorios y
+uniformes), aquí todo sale de un random.Random(semilla) y un Faker con la
+misma semilla, los id se asignan explícitamente y las fechas se calculan a
+partir de ANIO_REFERENCIA y no de hoy: la misma semilla y escala producen
+siempre el mismo conjunto de datos (ver la huella SHA-256 del resumen), y
+los tiempos de distintos commits se pueden comparar.
+
+Distribuciones (DEFAULT_DISTRIBUTIONS, cada una se puede cambiar):
+    zipf_carreras     tamaño de las carreras: pocas muy grandes, muchas pequeñas
+    zipf_cursos       popularidad de los cursos dentro de la carrera y en toda la
+                      universidad: es el control de los cursos calientes (con 1.2
+                      el curso más popular de una carrera recibe varias veces las
+                      matrículas del quinto; 0 los vuelve uniformes)
+    cursos_externos   fracción de matrículas en cursos de otra carrera (con
+                      popularidad Zipf global: cursos calientes en toda la universidad)
+    estudiantes_calientes / cursos_por_periodo_calientes
+                      fracción de estudiantes que llevan muchos cursos por periodo
+                      y cuántos llevan (en lugar de cursos_por_periodo)
+    crecimiento       crecimiento del ingreso por año (más matrículas en periodos recientes)
+    participacion_verano
+                      fracción de estudiantes que llevan cursos en Verano
+    dificultad        cada curso tiene una dificultad que desplaza su distribución de notas
+    retiro            probabilidad de matrícula Retirada en periodos cerrados
+'''
+
+from models import session, engine, Faculty, Department, Major, Professor, Student, Course, Enrollment
+from snapshots import DatabaseSnapshots
+from faker import Faker
+from sqlalchemy import insert, text
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import argparse
+import hashlib
+import itertools
+import random
+import time
+
+ANIO_REFERENCIA = 2025
+SEMESTERS = ('Primer Semestre', 'Verano', 'Segundo Semestre')
+SEMESTER_START = {'Primer Semestre': (1, 15), 'Verano': (6, 10), 'Segundo Semestre': (8, 1)}
+GRADES = ('A', 'B', 'C', 'D', 'F')
+
+DEFAULT_DISTRIBUTIONS = {
+    'facultades': 10,
+    'departamentos_por_facultad': 3,
+    'carreras': 32,
+    'cursos_por_carrera': (5, 12),
+    'profesores': 200,            # por unidad de escala
+    'estudiantes': 1000,          # por unidad de escala
+    'anios': 3,                   # años académicos con matrículas, terminando en ANIO_REFERENCIA
+    'zipf_carreras': 1.1,
+    'zipf_cursos': 1.2,
+    'cursos_externos': 0.15,
+    'cursos_por_periodo': (3, 6),
+    'estudiantes_calientes': 0.05,
+    'cursos_por_periodo_calientes': (8, 12),
+    'crecimiento': 0.08,
+    'participacion_verano': 0.2,
+    'dificultad': (2.0, 5.0),     # parámetros de la beta: la mayoría de cursos son accesibles
+    'retiro': 0.05,
+}
+
+
+def zipf_cumulative_weights(count: int, exponent: float):
+    """Pesos acumulados 1/rango^s para rangos 1..count"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+class WorkloadGenerator:
+    def __init__(self, seed: int, scale: int = 1, reference_year: int = ANIO_REFERENCIA, **distributions):
+        unknown = set(distributions) - set(DEFAULT_DISTRIBUTIONS)
+        if unknown:
+            raise ValueError(f"Distribuciones desconocidas: {', '.join(sorted(unknown))}")
+        self.seed = seed
+        self.scale = scale
+        self.reference_year = reference_year
+        self.config = dict(DEFAULT_DISTRIBUTIONS, **distributions)
+        self.rng = random.Random(seed)
+        self.fake = Faker(['es_ES'])
+        self.fake.seed_instance(seed)
+        self.tables = {}
+        self.digest = hashlib.sha256()
+
+    # --- Utilidades ---
+
+    def _pick(self, population, cumulative, count: int):
+        """`count` elementos distintos con probabilidad según `cumulative`"""
+        count = min(count, len(population))
+        chosen = []
+        total = cumulative[-1]
+        while len(chosen) < count:
+            item = population[bisect_left(cumulative, self.rng.random() * total)]
+            if item not in chosen:
+                chosen.append(item)
+        return chosen
+
+    def _add(self, table: str, rows):
+        self.tables[table] = rows
+        for row in rows:
+            self.digest.update(repr(sorted(row.items())).encode())
+
+    def periods(self):
+        """[(anio, semestre)] en orden cronológico, el último es el vigente"""
+        first_year = self.reference_year - self.config['anios'] + 1
+        return [(year, semester) for year in range(first_year, self.reference_year + 1) for semester in SEMESTERS]
+
+    # --- Catálogo ---
+
+    def generate_catalog(self):
+        config, rng, fake = self.config, self.rng, self.fake
+        faculties = [{
+            'id': index, 'nombre': f"Facultad {index:02d} {fake.last_name()}", 'ubicacion': f"Edificio {chr(64 + index)}",
+            'fecha_fundacion': date(1950 + rng.randrange(60), rng.randint(1, 12), rng.randint(1, 28)),
+            'telefono': f"2{rng.randrange(10 ** 7):07d}", 'decano': fake.name()[:100],
+        } for index in range(1, config['facultades'] + 1)]
+
+        departments = [{
+            'id': index, 'nombre': f"Departamento {index:02d} {fake.word().capitalize()}",
+            'facultad_id': (index - 1) % len(faculties) + 1, 'email': f"depto{index:02d}@sgu.edu",
+        } for index in range(1, len(faculties) * config['departamentos_por_facultad'] + 1)]
+
+        majors = [{
+            'id': index, 'nombre': f"Carrera {index:02d} {fake.word().capitalize()}",
+            'facultad_id': (index - 1) % len(faculties) + 1, 'duracion_anos': rng.randint(4, 6),
+            'creditos_totales': rng.randrange(160, 241, 10), 'titulo': 'Licenciatura',
+        } for index in range(1, config['carreras'] + 1)]
+
+        courses = []
+        for major in majors:
+            for number in range(1, rng.randint(*config['cursos_por_carrera']) + 1):
+                courses.append({
+                    'id': len(courses) + 1, 'codigo': f"C{major['id']:02d}{number:02d}",
+                    'nombre': f"Curso {major['id']:02d}-{number:02d}", 'creditos': rng.randint(2, 5),
+                    'descripcion': None, 'carrera_id': major['id'],
+                })
+
+        professors = [{
+            'id': index, 'nombre': fake.first_name()[:50], 'apellido': fake.last_name()[:50],
+            'especializacion': None, 'departamento_id': rng.randint(1, len(departments)),
+            'fecha_contratacion': date(1995 + rng.randrange(30), rng.randint(1, 12), rng.randint(1, 28)),
+            'salario': Decimal(f"{rng.lognormvariate(9.6, 0.25):.2f}"),
+            'email': f"p{index:06d}@profesores.sgu.edu", 'activo': rng.random() > 0.05,
+        } for index in range(1, config['profesores'] * self.scale + 1)]
+
+        for table, rows in (('facultad', faculties), ('departamento', departments), ('carrera', majors),
+                            ('profesor', professors), ('curso', courses)):
+            self._add(table, rows)
+
+    # --- Estudiantes y matrículas ---
+
+    def generate_students(self):
+        config, rng, fake = self.config, self.rng, self.fake
+        majors = [major['id'] for major in self.tables['carrera']]
+        rng.shuffle(majors)  # qué carrera es la grande depende de la semilla
+        major_weights = zipf_cumulative_weights(len(majors), config['zipf_carreras'])
+
+        # Ingreso creciente: los años recientes reciben más estudiantes
+        intake_years = list(range(self.reference_year - 5, self.reference_year + 1))
+        intake_weights = list(itertools.accumulate(
+            (1 + config['crecimiento']) ** offset for offset in range(len(intake_years))
+        ))
+
+        students = []
+        for index in range(1, config['estudiantes'] * self.scale + 1):
+            intake = intake_years[bisect_left(intake_weights, rng.random() * intake_weights[-1])]
+            states = ('Activo', 'Activo', 'Activo', 'Inactivo') if intake > self.reference_year - 4 else \
+                ('Activo', 'Graduado', 'Graduado', 'Inactivo')
+            students.append({
+                'id': index, 'nombre': fake.first_name()[:50], 'apellido': fake.last_name()[:50],
+                'fecha_nacimiento': date(intake - 18 - rng.randrange(4), rng.randint(1, 12), rng.randint(1, 28)),
+                'direccion': None, 'telefono': f"5{rng.randrange(10 ** 7):07d}",
+                'email': f"e{index:06d}@estudiantes.sgu.edu",
+                'carrera_id': majors[bisect_left(major_weights, rng.random() * major_weights[-1])],
+                'fecha_ingreso': date(intake, 1, 15), 'estado': rng.choice(states),
+            })
+        self._add('estudiante', students)
+
+    def generate_enrollments(self):
+        config, rng = self.config, self.rng
+        by_major = {}
+        for course in self.tables['curso']:
+            by_major.setdefault(course['carrera_id'], []).append(course['id'])
+        popularity = {}
+        for major_id, course_ids in by_major.items():
+            rng.shuffle(course_ids)
+            popularity[major_id] = (course_ids, zipf_cumulative_weights(len(course_ids), config['zipf_cursos']))
+        all_courses = [course['id'] for course in self.tables['curso']]
+        rng.shuffle(all_courses)
+        global_popularity = zipf_cumulative_weights(len(all_courses), config['zipf_cursos'])
+
+        # Dificultad por curso: mueve la distribución de notas hacia F
+        difficulty = {course_id: rng.betavariate(*config['dificultad']) for course_id in all_courses}
+        hot_students = {student['id'] for student in self.tables['estudiante']
+                        if rng.random() < config['estudiantes_calientes']}
+
+        periods = self.periods()
+        current = periods[-1]
+        enrollments = []
+        for year, semester in periods:
+            start_month, start_day = SEMESTER_START[semester]
+            period_start = datetime(year, start_month, start_day, 8, 0)
+            for student in self.tables['estudiante']:
+                if student['fecha_ingreso'].year > year or student['carrera_id'] is None:
+                    continue
+                if student['estado'] != 'Activo' and (year, semester) == current:
+                    continue
+                if semester == 'Verano' and rng.random() >= config['participacion_verano']:
+                    continue
+                low, high = config['cursos_por_periodo_calientes'] if student['id'] in hot_students else config['cursos_por_periodo']
+                wanted = rng.randint(low, high)
+                external = sum(1 for _ in range(wanted) if rng.random() < config['cursos_externos'])
+                course_ids, weights = popularity[student['carrera_id']]
+                chosen = self._pick(course_ids, weights, wanted - external)
+                for course_id in self._pick(all_courses, global_popularity, external + len(chosen)):
+                    if len(chosen) >= wanted:
+                        break
+                    if course_id not in chosen:
+                        chosen.append(course_id)
+
+                for course_id in chosen:
+                    if (year, semester) == current:
+                        state, grade = 'Activa', None
+                    elif rng.random() < config['retiro']:
+                        state, grade = 'Retirada', None
+                    else:
+                        # Índice de nota: 0 (A) .. 4 (F), desplazado por la dificultad del curso
+                        score = rng.gauss(1.2 + 2.5 * difficulty[course_id], 0.9)
+                        state, grade = 'Finalizada', GRADES[min(4, max(0, round(score)))]
+                    enrollments.append({
+                        'estudiante_id': student['id'], 'curso_id': course_id, 'anio_academico': year,
+                        'semestre': semester, 'calificacion': grade, 'estado': state,
+                        'fecha_matricula': period_start - timedelta(days=rng.randrange(1, 21), minutes=rng.randrange(600)),
+                    })
+        self._add('matricula', enrollments)
+
+    # --- Escritura ---
+
+    def write(self, batch_size: int = 5000):
+        """Vaciar las tablas y cargar el conjunto generado con executemany por lotes"""
+        models = [Faculty, Department, Major, Professor, Student, Course, Enrollment]
+        DatabaseSnapshots().truncate([model.__tablename__ for model in models])
+        for model in models:
+            rows = self.tables[model.__tablename__]
+            for start in range(0, len(rows), batch_size):
+                session.execute(insert(model.__table__), rows[start:start + batch_size])
+        if engine.dialect.name == 'postgresql':
+            # Los id se asignaron explícitamente: alinear las secuencias
+            for model in models:
+                if 'id' in model.__table__.c:
+                    session.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', 'id'), "
+                        f"COALESCE(MAX(id), 1)) FROM {model.__tablename__}"
+                    ))
+        session.commit()
+
+    def run(self, write: bool = True):
+        """Generar (y cargar) el conjunto completo. Retorna {tabla: filas} y la huella"""
+        self.generate_catalog()
+        self.generate_students()
+        self.generate_enrollments()
+        if write:
+            self.write()
+        summary = {table: len(rows) for table, rows in self.tables.items()}
+        summary['huella'] = self.digest.hexdigest()
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga determinístico para benchmarks")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--escala', type=int, default=1)
+    parser.add_argument('--zipf-cursos', type=float, default=DEFAULT_DISTRIBUTIONS['zipf_cursos'])
+    parser.add_argument('--zipf-carreras', type=float, default=DEFAULT_DISTRIBUTIONS['zipf_carreras'])
+    parser.add_argument('--crecimiento', type=float, default=DEFAULT_DISTRIBUTIONS['crecimiento'])
+    parser.add_argument('--anios', type=int, default=DEFAULT_DISTRIBUTIONS['anios'])
+    parser.add_argument('--sin-escribir', action='store_true', help="Solo generar y mostrar la huella")
+    args = parser.parse_args()
+
+    from models import init_sqlite_schema
+    init_sqlite_schema()
+    start = time.perf_counter()
+    summary = WorkloadGenerator(
+        args.semilla, args.escala, zipf_cursos=args.zipf_cursos, zipf_carreras=args.zipf_carreras,
+        crecimiento=args.crecimiento, anios=args.anios
+    ).run(write=not args.sin_escribir)
+    fingerprint = summary.pop('huella')
+    print(f"🚀 Carga con semilla {args.semilla}, escala {args.escala}")
+    for table, count in summary.items():
+        print(f"  • {table}: {count}")
+    print(f"🔑 Huella: {fingerprint}")
+    print(f"⏱️  {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()